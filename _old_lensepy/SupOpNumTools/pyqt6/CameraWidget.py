@@ -18,6 +18,7 @@ import cv2
 import sys
 from pyueye import ueye
 import camera
+from SupOpNumTools.sig2D.histogram import histogram_bins
 import time
 
 # Graphical interface
@@ -382,7 +383,7 @@ class MyWindow(QMainWindow):
         '''Global Camera Histogram'''
         max_bins = 2 ** int(self.widget.nBitsPerPixel)
         self.bins = np.linspace(0, max_bins, max_bins + 1)
-        hist, bins = np.histogram(self.widget.cameraRawFrame, bins=self.bins)
+        hist, bins = histogram_bins(self.widget.cameraRawFrame, bins=self.bins)
         print(self.widget.cameraRawFrame.shape)
         print(f'H0={hist[0]}')
         print(f'H1={hist[1]}')
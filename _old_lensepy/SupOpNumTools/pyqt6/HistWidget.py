@@ -27,6 +27,7 @@ from PyQt6.QtCore import Qt
 from pyqtgraph import PlotWidget, BarGraphItem
 
 # Local libraries
+from SupOpNumTools.sig2D.histogram import histogram_bins
 
 
 
@@ -126,7 +127,8 @@ class HistWidget(QWidget):
         """
         self.plot_hist_data = data
         self.plot_bins_data = bins
-        self.plot_hist, self.plot_bins_data = np.histogram(
+        # Fast path for 8 and 16 bits images and bins of width 1
+        self.plot_hist, self.plot_bins_data = histogram_bins(
             self.plot_hist_data,
             bins=self.plot_bins_data)
         
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SupOpNumTools / Institut d'Optique
+
+Fast histograms of 8 and 16 bits images (cameras)
+
+Same results as np.histogram, with np.bincount (one bin per value) when
+the bins have a width of 1. Same function as histogram_bins in the
+supoptools.images.histogram module of the image processing demo.
+
+Created on 18/Oct/2026
+
+@author: LEnsE / IOGS / Palaiseau
+@author: Julien Villemejane
+"""
+
+import numpy as np
+
+
+def histogram_bins(data, bins):
+    """
+    Computes the histogram of all the values of an array, as np.histogram
+
+    Parameters
+    ----------
+    data : array
+        Values (image of any number of channels).
+    bins : array or int
+        Edges of the bins (or number of bins, for np.histogram).
+
+    Returns
+    -------
+    hist : 1-dimension vector - int
+        Number of values in each bin.
+    edges : 1-dimension vector - double
+        Edges of the bins (len(hist) + 1 values).
+
+    Notes
+    -----
+    For 8 and 16 bits data with bins of width 1 from 0 (0, 1, ..., N), as
+    used by the histograms of the cameras, values are counted by np.bincount
+    (one pass, no sort). Other data and bins are processed by np.histogram.
+
+    """
+    data = np.asarray(data)
+    edges = np.asarray(bins)
+    if (data.dtype not in (np.uint8, np.uint16) or edges.ndim != 1 or len(edges) < 2
+            or not np.array_equal(edges, np.arange(len(edges)))):
+        return np.histogram(data, bins=bins)
+    n_bins = len(edges) - 1
+    counts = np.bincount(data.ravel(), minlength=n_bins + 1)
+    hist = counts[:n_bins].astype(np.int64)
+    # Last bin includes its right edge, greater values are not counted
+    hist[-1] += counts[n_bins]
+    return hist, edges.astype(np.float64)
@@ -0,0 +1,285 @@
+# -*- coding: utf-8 -*-
+"""*batch_process* file.
+
+*batch_process* file that contains functions to apply a chain of processes
+(from *process_registry*) to a directory of images, without graphical interface.
+
+Example::
+
+    python batch_process.py ../_data -o ../_output -p blur:size=5 -p binarize:threshold=100
+    python batch_process.py "frames/*.png" -o out -p erode:kernel=cross5 -w 4
+
+Each process is given as *name:option=value,option=value*. The options and
+their limits are the ones of the process in *process_registry*. Missing
+options take their initial value.
+
+.. note:: LEnsE - Institut d'Optique - version 0.1
+
+.. moduleauthor:: Julien VILLEMEJANE <julien.villemejane@institutoptique.fr>
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+import cv2 as cv
+from image import Image
+from image_process import kernels
+from process_registry import get_process
+from process_pipeline import ProcessPipeline
+
+image_extensions = ('.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff', '.pgm', '.ppm')
+
+
+def parse_process(process_spec: str) -> tuple[str, dict]:
+    """
+    Return the name and the parameters of a process from its description.
+
+    :param process_spec: Description of the process, 'name:option=value,option=value'.
+    :type process_spec: str
+
+    :return: Name of the process and dictionary of its parameters.
+    :rtype: tuple[str, dict]
+
+    """
+    process_name, _, options = process_spec.partition(':')
+    operation = get_process(process_name)
+    values = {}
+    for option in options.split(','):
+        if option != '':
+            name, _, value = option.partition('=')
+            values[name.strip()] = value.strip()
+    for parameter in operation.parameters:
+        # Kernels are given by their name
+        if parameter.is_kernel() and parameter.name in values:
+            kernel_name = values[parameter.name]
+            if kernel_name not in kernels:
+                raise ValueError(f'{process_name}: unknown kernel {kernel_name} '
+                                 f'(available: {", ".join(kernels)})')
+            values[parameter.name] = kernels[kernel_name]
+            # A kernel given by its name keeps its size, if no size is given
+            for option in parameter.options:
+                values.setdefault(option.name, kernels[kernel_name].shape[0])
+    return process_name, operation.check_params(values)
+
+
+def list_images(source: str) -> list[str]:
+    """
+    Return the list of the images of a directory or matching a glob pattern.
+
+    :param source: Directory or glob pattern ('frames/*.png', 'data/**/*.jpg').
+    :type source: str
+
+    :return: Sorted list of the paths of the images.
+    :rtype: list[str]
+
+    """
+    if os.path.isdir(source):
+        paths = [os.path.join(source, name) for name in os.listdir(source)]
+    else:
+        paths = glob.glob(source, recursive=True)
+    return sorted(p for p in paths
+                  if os.path.isfile(p) and os.path.splitext(p)[1].lower() in image_extensions)
+
+
+def input_root(source: str) -> str:
+    """
+    Return the directory of the images of a source, before any wildcard.
+
+    :param source: Directory or glob pattern ('frames/*.png', 'data/**/*.jpg').
+    :type source: str
+
+    :return: Directory of the source ('frames', 'data'), '' for the current directory.
+    :rtype: str
+
+    """
+    root = source
+    while glob.has_magic(root):
+        root = os.path.dirname(root)
+    return root
+
+
+# Pipeline of each worker process, created once by _init_worker
+_worker_pipeline = None
+
+
+def _init_worker(steps: list) -> None:
+    """Create the pipeline of a worker process."""
+    global _worker_pipeline
+    # One thread per process, the images are processed in parallel
+    cv.setNumThreads(1)
+    _worker_pipeline = ProcessPipeline()
+    for process_name, params_dict in steps:
+        _worker_pipeline.add(process_name, params_dict)
+
+
+def _process_file(input_path: str, output_path: str) -> tuple[str, bool]:
+    """Open, process and write one image, in a worker process."""
+    image = Image()
+    if not image.open(input_path):
+        return input_path, False
+    result = _worker_pipeline.run(image)
+    return input_path, result.write(output_path)
+
+
+def output_path_for(input_path: str, output_dir: str, suffix: str = '', extension: str = '',
+                    root: str = None) -> str:
+    """
+    Return the path of the processed image.
+
+    The path of the image relative to *root* is kept in *output_dir*, so
+    that images of subdirectories (recursive patterns) do not overwrite
+    each other.
+
+    :param input_path: Path of the initial image.
+    :type input_path: str
+    :param output_dir: Directory of the processed images.
+    :type output_dir: str
+    :param suffix: Text added to the name of the file. Default ''.
+    :type suffix: str
+    :param extension: Extension (format) of the processed image. Default '', same as the initial image.
+    :type extension: str
+    :param root: Directory of the source (see :func:`input_root`). Default None,
+        only the name of the file is kept.
+    :type root: str
+
+    :return: Path of the processed image.
+    :rtype: str
+
+    """
+    if root is None:
+        relative_path = os.path.basename(input_path)
+    else:
+        relative_path = os.path.relpath(input_path, root or os.curdir)
+    stem, ext = os.path.splitext(relative_path)
+    if extension != '':
+        ext = extension if extension.startswith('.') else '.' + extension
+    return os.path.join(output_dir, stem + suffix + ext)
+
+
+def run_batch(input_paths: list[str], output_dir: str, steps: list,
+              workers: int = 0, prefetch: int = 0, suffix: str = '', extension: str = '',
+              root: str = None) -> int:
+    """
+    Process a list of images in parallel (process pool).
+
+    Only *prefetch* images are submitted to the workers at the same time, so
+    that the memory used does not depend on the number of images.
+    Subdirectories of *root* are created in *output_dir*.
+
+    :param input_paths: Paths of the images to process.
+    :type input_paths: list[str]
+    :param output_dir: Directory of the processed images.
+    :type output_dir: str
+    :param steps: List of processes, (name, parameters), from :func:`parse_process`.
+    :type steps: list
+    :param workers: Number of worker processes. Default 0, number of CPUs.
+    :type workers: int
+    :param prefetch: Maximum number of images in progress. Default 0, twice the number of workers.
+    :type prefetch: int
+    :param suffix: Text added to the name of the processed files. Default ''.
+    :type suffix: str
+    :param extension: Extension (format) of the processed images. Default '', same as the initial image.
+    :type extension: str
+    :param root: Directory of the source (see :func:`input_root`). Default None,
+        all the images are written in *output_dir*.
+    :type root: str
+
+    :return: Number of images that failed.
+    :rtype: int
+    :raises ValueError: If two images have the same processed path.
+
+    """
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    if prefetch <= 0:
+        prefetch = 2 * workers
+    output_paths = {}
+    for input_path in input_paths:
+        out_path = output_path_for(input_path, output_dir, suffix, extension, root)
+        if out_path in output_paths:
+            raise ValueError(f'{output_paths[out_path]} and {input_path} '
+                             f'would both be written to {out_path}')
+        output_paths[out_path] = input_path
+    for directory in {os.path.dirname(out_path) for out_path in output_paths}:
+        os.makedirs(directory or os.curdir, exist_ok=True)
+    n_failed = 0
+    n_done = 0
+    remaining = iter(output_paths.items())
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(steps,)) as executor:
+        in_progress = set()
+        while True:
+            # Keep at most prefetch images in progress
+            for out_path, input_path in remaining:
+                in_progress.add(executor.submit(_process_file, input_path, out_path))
+                if len(in_progress) >= prefetch:
+                    break
+            if len(in_progress) == 0:
+                break
+            done, in_progress = wait(in_progress, return_when=FIRST_COMPLETED)
+            for future in done:
+                n_done += 1
+                try:
+                    input_path, success = future.result()
+                except Exception as e:
+                    input_path, success = str(e), False
+                if not success:
+                    n_failed += 1
+                    print(f'Failed : {input_path}')
+            print(f'\r{n_done}/{len(input_paths)} images', end='', flush=True)
+    print()
+    return n_failed
+
+
+def main(argv: list[str] = None) -> int:
+    """
+    Entry point of the batch processing.
+
+    :param argv: Arguments of the command line. Default None, sys.argv.
+    :type argv: list[str]
+
+    :return: Exit code, 0 if all the images were processed.
+    :rtype: int
+
+    """
+    parser = argparse.ArgumentParser(
+        description='Apply a chain of processes (from the registry of processes) to images.')
+    parser.add_argument('source', help='directory or glob pattern of the images')
+    parser.add_argument('-o', '--output', required=True, help='directory of the processed images')
+    parser.add_argument('-p', '--process', action='append', required=True,
+                        help='process to apply, name:option=value,... (repeat to chain)')
+    parser.add_argument('-w', '--workers', type=int, default=0,
+                        help='number of worker processes (default: number of CPUs)')
+    parser.add_argument('--prefetch', type=int, default=0,
+                        help='maximum number of images in progress (default: 2 x workers)')
+    parser.add_argument('--suffix', default='', help='text added to the names of the files')
+    parser.add_argument('--format', default='', help='extension of the processed images (png, jpg...)')
+    args = parser.parse_args(argv)
+
+    try:
+        steps = [parse_process(process_spec) for process_spec in args.process]
+    except ValueError as e:
+        parser.error(str(e))
+    input_paths = list_images(args.source)
+    if len(input_paths) == 0:
+        print(f'No image found in {args.source}')
+        return 1
+
+    t1 = time.perf_counter()
+    try:
+        n_failed = run_batch(input_paths, args.output, steps, args.workers, args.prefetch,
+                             args.suffix, args.format, input_root(args.source))
+    except ValueError as e:
+        print(f'Error : {e}')
+        return 1
+    t2 = time.perf_counter()
+    print(f'{len(input_paths) - n_failed} images processed in {t2 - t1:.2f} s, {n_failed} failed')
+    return 0 if n_failed == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,285 @@
+# -*- coding: utf-8 -*-
+"""*benchmark_image_processing* file.
+
+*benchmark_image_processing* file that times the registered processes,
+:meth:`Image.resize_image_ratio` and :func:`conversion.array_to_qimage` for
+several sizes of images (VGA to 8K), types of pixels and numbers of channels.
+
+Results are written in a JSON file. A previous result file can be given to
+detect regressions between two versions.
+
+Example::
+
+    python benchmark_image_processing.py -o bench_v1.json
+    python benchmark_image_processing.py --sizes vga,fhd --dtypes uint8 -o bench_v2.json --compare bench_v1.json
+
+.. note:: LEnsE - Institut d'Optique - version 0.1
+
+.. moduleauthor:: Julien VILLEMEJANE <julien.villemejane@institutoptique.fr>
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import sys
+import timeit
+
+import numpy as np
+import cv2 as cv
+from image import Image
+from process_registry import get_process, get_process_names
+from batch_process import parse_process
+from supoptools.images.conversion import array_to_qimage
+
+# Sizes of the images (width, height)
+image_sizes = {
+    'vga': (640, 480),
+    'hd': (1280, 720),
+    'fhd': (1920, 1080),
+    '4k': (3840, 2160),
+    '8k': (7680, 4320),
+}
+image_dtypes = ('uint8', 'uint16', 'float32')
+image_channels = (1, 3)
+# Size of the display area for resize_image_ratio
+display_size = (600, 800)
+
+
+def make_pixels(source: np.ndarray, size: tuple[int, int], dtype: str, channels: int) -> np.ndarray:
+    """
+    Return an array of pixels, from an 8 bits color image.
+
+    :param source: 8 bits color image (BGR).
+    :type source: np.ndarray
+    :param size: Size of the image (width, height).
+    :type size: tuple[int, int]
+    :param dtype: Type of the pixels ('uint8', 'uint16', 'float32').
+    :type dtype: str
+    :param channels: Number of channels (1 or 3).
+    :type channels: int
+
+    :return: Array of pixels.
+    :rtype: np.ndarray
+
+    """
+    pixels = cv.resize(source, size, interpolation=cv.INTER_LINEAR)
+    if channels == 1:
+        pixels = cv.cvtColor(pixels, cv.COLOR_BGR2GRAY)
+    if dtype == 'uint16':
+        return pixels.astype(np.uint16) * 257
+    if dtype == 'float32':
+        return pixels.astype(np.float32) / 255
+    return pixels.astype(dtype)
+
+
+def get_benchmarks() -> dict:
+    """
+    Return the functions to time, with their parameters.
+
+    :return: Dictionary of name: function(image) -> result.
+    :rtype: dict
+
+    """
+    benchmarks = {}
+    for process_name in get_process_names():
+        function = get_process(process_name).function
+        _, params_dict = parse_process(process_name)
+        benchmarks[process_name] = \
+            lambda image, f=function, p=params_dict: f(image, p)
+
+    def resize(image):
+        # A new image, the pyramid is built at each call (worst case)
+        new_image = Image()
+        new_image.create(image.getPixels())
+        return new_image.resize_image_ratio(*display_size)
+
+    benchmarks['resize_image_ratio'] = resize
+    benchmarks['array_to_qimage'] = lambda image: array_to_qimage(image.getPixels())
+    return benchmarks
+
+
+def time_function(function, image: Image, repeat: int = 5, min_time: float = 0.2) -> dict:
+    """
+    Time a function, with timeit.
+
+    :param function: Function to time, function(image).
+    :type function: callable
+    :param image: Image given to the function.
+    :type image: Image
+    :param repeat: Number of measures. Default 5.
+    :type repeat: int
+    :param min_time: Minimum duration of a measure, in seconds. Default 0.2.
+    :type min_time: float
+
+    :return: Best and mean time of one call (in seconds), number of calls per measure.
+    :rtype: dict
+
+    """
+    timer = timeit.Timer(lambda: function(image))
+    number = 1
+    while True:
+        duration = timer.timeit(number)
+        if duration >= min_time or number >= 1000:
+            break
+        number *= 2 if duration == 0 else max(2, min(10, int(min_time / duration) + 1))
+    times = [t / number for t in timer.repeat(repeat, number)]
+    return {'best': min(times), 'mean': sum(times) / len(times), 'number': number}
+
+
+def run_benchmarks(sizes: list[str], dtypes: list[str], channels: list[int],
+                   names: list[str] = None, repeat: int = 5, verbose: bool = True) -> dict:
+    """
+    Time all the benchmarks.
+
+    :param sizes: Names of the sizes of the images (keys of image_sizes).
+    :type sizes: list[str]
+    :param dtypes: Types of the pixels.
+    :type dtypes: list[str]
+    :param channels: Numbers of channels.
+    :type channels: list[int]
+    :param names: Names of the benchmarks to run. Default None, all.
+    :type names: list[str]
+    :param repeat: Number of measures. Default 5.
+    :type repeat: int
+    :param verbose: Print each result. Default True.
+    :type verbose: bool
+
+    :return: Results, by 'name/size/dtype/cN' key. Unsupported
+        combinations have an 'error' entry.
+    :rtype: dict
+
+    """
+    source = Image()
+    if not source.open("../_data/robot.jpg"):
+        raise FileNotFoundError('run_benchmarks: ../_data/robot.jpg not found')
+    benchmarks = get_benchmarks()
+    if names is not None:
+        benchmarks = {name: benchmarks[name] for name in names}
+    results = {}
+    for size_name in sizes:
+        for dtype in dtypes:
+            for n_channels in channels:
+                image = Image()
+                image.create(make_pixels(source.getPixels(), image_sizes[size_name], dtype, n_channels))
+                for name, function in benchmarks.items():
+                    key = f'{name}/{size_name}/{dtype}/c{n_channels}'
+                    try:
+                        # Processes print their exceptions and return None
+                        if function(image) is None:
+                            raise ValueError('no result')
+                        results[key] = time_function(function, image, repeat)
+                        if verbose:
+                            print(f'{key:<40} {results[key]["best"] * 1000:10.3f} ms')
+                    except Exception as e:
+                        results[key] = {'error': str(e)}
+                        if verbose:
+                            print(f'{key:<40} {"unsupported":>13}')
+    return results
+
+
+def get_environment() -> dict:
+    """
+    Return a description of the environment of the benchmarks.
+
+    """
+    return {
+        'date': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'opencv': cv.__version__,
+        'opencv_threads': cv.getNumThreads(),
+    }
+
+
+def compare_results(results: dict, reference: dict, tolerance: float = 0.1) -> list[tuple]:
+    """
+    Compare results with reference results.
+
+    :param results: New results, from :func:`run_benchmarks`.
+    :type results: dict
+    :param reference: Reference results.
+    :type reference: dict
+    :param tolerance: Relative increase of time considered as a regression. Default 0.1 (10%).
+    :type tolerance: float
+
+    :return: List of (key, reference time, new time, ratio) of the regressions.
+    :rtype: list[tuple]
+
+    """
+    regressions = []
+    for key, result in results.items():
+        previous = reference.get(key)
+        if previous is None or 'best' not in result or 'best' not in previous:
+            continue
+        ratio = result['best'] / previous['best'] if previous['best'] > 0 else 1.0
+        if ratio > 1 + tolerance:
+            regressions.append((key, previous['best'], result['best'], ratio))
+    return regressions
+
+
+def _split_list(text: str) -> list[str]:
+    """Split a comma-separated list of the command line."""
+    return [value.strip() for value in text.split(',') if value.strip() != '']
+
+
+def main(argv: list[str] = None) -> int:
+    """
+    Entry point of the benchmarks.
+
+    :param argv: Arguments of the command line. Default None, sys.argv.
+    :type argv: list[str]
+
+    :return: Exit code, 1 if a regression is found.
+    :rtype: int
+
+    """
+    benchmark_names = list(get_benchmarks())
+    parser = argparse.ArgumentParser(description='Time the image processes.')
+    parser.add_argument('-o', '--output', default='benchmark_results.json', help='JSON file of the results')
+    parser.add_argument('--sizes', default=','.join(image_sizes),
+                        help=f'sizes of the images, among {",".join(image_sizes)}')
+    parser.add_argument('--dtypes', default=','.join(image_dtypes), help='types of the pixels')
+    parser.add_argument('--channels', default=','.join(str(c) for c in image_channels),
+                        help='numbers of channels')
+    parser.add_argument('--only', default=None,
+                        help=f'benchmarks to run, among {",".join(benchmark_names)}')
+    parser.add_argument('--repeat', type=int, default=5, help='number of measures (default: 5)')
+    parser.add_argument('--compare', default=None, help='JSON file of reference results')
+    parser.add_argument('--tolerance', type=float, default=0.1,
+                        help='relative slowdown considered as a regression (default: 0.1)')
+    args = parser.parse_args(argv)
+
+    sizes = _split_list(args.sizes.lower())
+    for size_name in sizes:
+        if size_name not in image_sizes:
+            parser.error(f'unknown size {size_name}')
+    names = None if args.only is None else _split_list(args.only)
+    if names is not None:
+        for name in names:
+            if name not in benchmark_names:
+                parser.error(f'unknown benchmark {name}')
+    channels = [int(c) for c in _split_list(args.channels)]
+
+    results = run_benchmarks(sizes, _split_list(args.dtypes), channels, names, args.repeat)
+    with open(args.output, 'w') as file:
+        json.dump({'environment': get_environment(), 'results': results}, file, indent=2)
+    print(f'Results written in {args.output}')
+
+    if args.compare is not None:
+        with open(args.compare) as file:
+            reference = json.load(file)
+        regressions = compare_results(results, reference['results'], args.tolerance)
+        for key, previous, new, ratio in regressions:
+            print(f'REGRESSION {key:<40} {previous * 1000:10.3f} ms -> {new * 1000:10.3f} ms (x{ratio:.2f})')
+        print(f'{len(regressions)} regression(s) compared to {args.compare}')
+        return 1 if len(regressions) > 0 else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+"""*comparison_widget* file.
+
+*comparison_widget* file that contains :
+
+    * :class::ComparisonWidget
+
+Several variants of a process (for example binarize with thresholds
+40 / 80 / 120 / 160) are executed at the same time in a thread pool and
+displayed side by side, each one as soon as it is finished. OpenCV releases
+the GIL during the processing, the variants are really processed in parallel.
+
+.. note:: LEnsE - Institut d'Optique - version 0.1
+
+.. moduleauthor:: Julien VILLEMEJANE <julien.villemejane@institutoptique.fr>
+"""
+
+import numpy as np
+from image import Image
+from image_display_widget import ImageDisplayWidget
+from image_process import kernels
+from process_registry import get_process
+from process_worker import ProcessRunnable
+
+from PyQt6.QtWidgets import (
+    QWidget, QLabel,
+    QGridLayout
+)
+from PyQt6.QtCore import Qt, QThreadPool
+
+
+def make_variants(process_name: str, params_dict: dict, number: int = 4) -> list[tuple[str, dict]]:
+    """
+    Return variants of the parameters of a process, for a comparison.
+
+    The first parameter of the process is changed : an integer takes
+    *number* values in its range, a kernel takes the kernels of
+    *image_process* (only binary ones for morphology), the size of a kernel
+    takes *number* odd values.
+
+    :param process_name: Name of the process (in *process_registry*).
+    :type process_name: str
+    :param params_dict: Parameters of the process, the other ones are kept.
+    :type params_dict: dict
+    :param number: Number of values of an integer parameter. Default 4.
+    :type number: int
+
+    :return: List of (description, parameters) of the variants.
+    :rtype: list[tuple[str, dict]]
+
+    """
+    variants = []
+    operation = get_process(process_name)
+    parameter = operation.parameters[0]
+    if parameter.type == 'int':
+        for value in np.linspace(parameter.min, parameter.max, number + 2)[1:-1]:
+            value = int(round(value))
+            variants.append((f'{parameter.name} = {value}', dict(params_dict, **{parameter.name: value})))
+    elif parameter.is_kernel() and len(parameter.options) > 0:
+        # Size of the kernel (mean filter)
+        size_option = parameter.options[0]
+        sizes = np.linspace(size_option.min, size_option.max, number).astype(int) // 2 * 2 + 1
+        for size in sorted(set(int(s) for s in sizes)):
+            variants.append((f'{size_option.name} = {size}', dict(params_dict, **{size_option.name: size})))
+    elif parameter.is_kernel():
+        for kernel_name, kernel in kernels.items():
+            # Structuring elements of morphological processes are binary
+            if process_name != 'convolve' and not np.isin(kernel, (0, 1)).all():
+                continue
+            variants.append((f'{parameter.name} = {kernel_name}', dict(params_dict, **{parameter.name: kernel})))
+    return variants
+
+
+class ComparisonWidget(QWidget):
+    """Display the results of several variants of a process. Children of QWidget.
+
+    :param pool: Thread pool where the variants are processed.
+    :type pool: QThreadPool
+    :param displays: Areas where the results are displayed.
+    :type displays: list[ImageDisplayWidget]
+
+    """
+
+    def __init__(self, columns: int = 2, height: int = 300, width: int = 400) -> None:
+        """
+        Default constructor of the class.
+
+        :param columns: Number of columns of the grid. Default 2.
+        :type columns: int
+        :param height: Height of each result. Default 300.
+        :type height: int
+        :param width: Width of each result. Default 400.
+        :type width: int
+
+        """
+        super().__init__(parent=None)
+        self.columns = columns
+        self.height_img = height
+        self.width_img = width
+        self.pool = QThreadPool()
+        self._generation = 0  # Incremented at each new comparison
+        self._jobs = []
+        self.displays = []
+        self.labels = []
+
+        self.title_label = QLabel('Comparison')
+        self.title_label.setStyleSheet("color: darkblue; font-size: 15px;")
+        self.title_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.main_layout = QGridLayout()
+        self.main_layout.addWidget(self.title_label, 0, 0, 1, self.columns)
+        self.setLayout(self.main_layout)
+
+    def _set_cells(self, number: int) -> None:
+        """Create the areas of the results, if required."""
+        while len(self.displays) < number:
+            index = len(self.displays)
+            label = QLabel('')
+            label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+            display = ImageDisplayWidget(height=self.height_img, width=self.width_img,
+                                         bg=(200, 200, 200))
+            row = 1 + 2 * (index // self.columns)
+            self.main_layout.addWidget(label, row, index % self.columns)
+            self.main_layout.addWidget(display, row + 1, index % self.columns)
+            self.labels.append(label)
+            self.displays.append(display)
+        for index in range(len(self.displays)):
+            self.labels[index].setVisible(index < number)
+            self.displays[index].setVisible(index < number)
+
+    def compare(self, process_name: str, image: Image, variants: list[tuple[str, dict]]) -> None:
+        """
+        Process all the variants of a process, in parallel.
+
+        The previous comparison is cancelled. Results are displayed as soon
+        as they are finished.
+
+        :param process_name: Name of the process (in *process_registry*).
+        :type process_name: str
+        :param image: Image to process.
+        :type image: Image
+        :param variants: List of (description, parameters), from :func:`make_variants`.
+        :type variants: list[tuple[str, dict]]
+
+        """
+        self.cancel()
+        self.title_label.setText(f'Comparison of {process_name}')
+        self._set_cells(len(variants))
+        n_threads = min(len(variants), QThreadPool.globalInstance().maxThreadCount())
+        self.pool.setMaxThreadCount(max(1, n_threads))
+        function = get_process(process_name).function
+        for index, (description, params_dict) in enumerate(variants):
+            self.labels[index].setText(description + ' (...)')
+            self.displays[index].set_image_from_image(image)
+            self.displays[index].resize_image(self.height_img, self.width_img)
+            job = ProcessRunnable(function, image, params_dict, (self._generation, index, description))
+            job.signals.finished.connect(self._variant_finished)
+            self._jobs.append(job)
+            self.pool.start(job)
+
+    def cancel(self) -> None:
+        """
+        Cancel the running comparison. Running variants are not interrupted,
+        but their results are not displayed.
+
+        """
+        self._generation += 1
+        self.pool.clear()  # Variants not yet started
+        for job in self._jobs:
+            job.cancel()
+        self._jobs = []
+
+    def _variant_finished(self, tag, result) -> None:
+        """Action performed when a variant is finished (in the main thread)."""
+        generation, index, description = tag
+        if generation != self._generation:
+            return
+        if result is None:
+            self.labels[index].setText(description + ' (failed)')
+            return
+        self.labels[index].setText(description)
+        self.displays[index].set_image_from_image(result)
+        self.displays[index].resize_image(self.height_img, self.width_img)
+
+    def closeEvent(self, event) -> None:
+        """
+        closeEvent redefinition. The running comparison is cancelled.
+        """
+        self.cancel()
+        self.pool.waitForDone()
+        event.accept()
+
+
+if __name__ == "__main__":
+    import sys
+    from PyQt6.QtWidgets import QApplication
+
+    app = QApplication(sys.argv)
+    image = Image()
+    image.open("../_data/robot.jpg")
+
+    widget = ComparisonWidget()
+    widget.compare('binarize', image, make_variants('binarize', {}))
+    widget.show()
+    sys.exit(app.exec())
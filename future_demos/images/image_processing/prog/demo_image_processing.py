@@ -11,6 +11,7 @@
 """
 
 import sys
+import time
 import numpy as np
 
 from PyQt6.QtWidgets import (
@@ -19,11 +20,22 @@ from PyQt6.QtWidgets import (
     QMessageBox
 )
 from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QKeySequence, QShortcut
 
 from image_display_widget import ImageDisplayWidget
+from histogram_widget import HistogramWidget
 from source_widget import SourceWidget
 from process_list_widget import ProcessListWidget
-from process_list import *
+from process_registry import get_process
+from process_cache import ProcessCache
+from process_history import ProcessHistory
+from roi_process import RoiProcessor
+from process_worker import ProcessExecutor
+from comparison_widget import ComparisonWidget, make_variants
+from video_source import VideoSource, FrameRateCounter
+
+# Cost of a process (see ProcessOperation.estimate_cost) above which a preview is displayed first
+preview_cost = 4e6
 
 
 class DemoImageProcessing(QMainWindow):
@@ -49,7 +61,25 @@ class DemoImageProcessing(QMainWindow):
         self.is_image_set = False  # If an image is selected
         self.is_live_set = False  # If a live source is selected
         self.is_process_set = False  # If a process is selected
+        self.current_process = None  # Name of the last selected process
         self.actual_values = {}
+        # Results of the previous processes, by image, process and parameters
+        self.process_cache = ProcessCache()
+        # Successive results, to undo (Ctrl+Z) and redo (Ctrl+Y) the processes
+        self.history = ProcessHistory(shared_cache=self.process_cache)
+        # Region of interest (x, y, width, height) drawn on the initial image, only this region is processed
+        self.roi = None
+        self.roi_processor = RoiProcessor()
+        # Processes are executed in a background thread
+        self.process_executor = ProcessExecutor()
+        self.process_executor.processed.connect(self.display_processed_image)
+        # Live source (webcam or video file), only the newest frame is processed
+        self.video_source = None
+        self.live_type = ''  # 'webcam' or 'video'
+        self.live_counter = FrameRateCounter()
+        self.live_latency = 0.0
+        # Window to compare variants of a process, created when required
+        self.comparison_widget = None
 
         self.setWindowTitle("Demo Image Processing / LEnsE")
         # Widget geometry information
@@ -67,6 +97,8 @@ class DemoImageProcessing(QMainWindow):
                                                                height=self.height_img,
                                                                width=self.width_img,
                                                                bg=(200, 200, 200))
+        self.initial_image_display_widget.enable_roi()
+        self.initial_image_display_widget.roi_selected.connect(self.update_roi)
         self.process_image_display_widget = ImageDisplayWidget(name='Output Image',
                                                                height=self.height_img,
                                                                width=self.width_img,
@@ -83,21 +115,27 @@ class DemoImageProcessing(QMainWindow):
         self.source_widget = SourceWidget()
         # TO DO : resize logo and widget on window resizing
         self.source_widget.load_image.connect(self.load_source_image)
-        self.source_widget.webcam_source_button.setEnabled(False)
+        self.source_widget.start_webcam.connect(self.start_live_source)
+        self.source_widget.load_video.connect(self.start_live_source)
         self.source_widget.sensor_source_button.setEnabled(False)
         self.process_list_widget = ProcessListWidget()
         self.process_list_widget.changed.connect(self.update_process_image)
         self.process_list_widget.checked.connect(self.check_process)
         self.process_list_widget.clicked.connect(self.update_options)
+        self.process_list_widget.compared.connect(self.compare_process)
         self.process_list_widget.disable()
+        # Histogram and statistics of the output image
+        self.histogram_widget = HistogramWidget()
 
         # internal left widget
         left_widget = QWidget()
         left_layout = QGridLayout()
         left_layout.addWidget(self.source_widget, 0, 0)
         left_layout.addWidget(self.process_list_widget, 1, 0)
+        left_layout.addWidget(self.histogram_widget, 2, 0)
         left_layout.setRowStretch(0, 1)
         left_layout.setRowStretch(1, 2)
+        left_layout.setRowStretch(2, 1)
         left_widget.setLayout(left_layout)
 
         self.central_layout.addWidget(left_widget, 0, 0, alignment=Qt.AlignmentFlag.AlignCenter)
@@ -110,6 +148,10 @@ class DemoImageProcessing(QMainWindow):
         self.central_widget.setLayout(self.central_layout)
         self.setCentralWidget(self.central_widget)
 
+        QShortcut(QKeySequence.StandardKey.Undo, self, self.undo_process)
+        QShortcut(QKeySequence.StandardKey.Redo, self, self.redo_process)
+        QShortcut(QKeySequence('Ctrl+Y'), self, self.redo_process)
+
     def load_source_image(self, event) -> None:
         """
         Action performed after a click in the source widget.
@@ -119,8 +161,19 @@ class DemoImageProcessing(QMainWindow):
         try:
             event_data = event.split(';')
             if event_data[0] == 'image':
+                self.stop_live_source()
                 self.is_image_set = self.initial_image_display_widget.set_image_from_path(event_data[1], 10, 10)
                 self.process_image_display_widget.set_image_from_path(event_data[1], 10, 10)
+                if self.is_image_set:
+                    self.histogram_widget.set_image(self.process_image_display_widget.get_image())
+                else:
+                    self.histogram_widget.clear()
+                self.initial_image_display_widget.clear_roi()
+                self.roi = None
+                self.roi_processor.clear()
+                self.history.clear()
+                if self.is_image_set:
+                    self.history.push('initial', {}, self.initial_image_display_widget.get_image())
                 self.handle_resize()
             if self.is_image_set:
                 self.process_list_widget.enable()
@@ -137,11 +190,11 @@ class DemoImageProcessing(QMainWindow):
             if len(event_split) > 1:
                 option_name = event_split[2]
                 process_name = event_split[0]
-                if self.actual_values.get(process_name + ':' + option_name):
-                    values = self.process_list_widget.processes_dict[process_name].params_window.get_values()
+                values = self.process_list_widget.processes_dict[process_name].params_window.get_values()
+                if option_name in values:
                     self.actual_values[process_name + ':' + option_name] = values[option_name]
                 else:
-                    new_value = process_list[process_name][option_name].split(':')[-1]
+                    new_value = get_process(process_name).get_parameter(option_name).init
                     self.actual_values[process_name + ':' + option_name] = new_value
             else:
                 process_name = event
@@ -154,21 +207,18 @@ class DemoImageProcessing(QMainWindow):
         """Action performed when "Options" button is clicked.
         """
         try:
-            all_params = process_list[event]['params']
             dict_values = {}
-            for id, option_name in enumerate(all_params.split(';')):
-                option_type = get_options_type(event, option_name)
-                dict_values[option_name] = 127
-                # Depending on the type of the option
-                if option_type == 'int':
-                    # If a value was not already set, take the initial value from process_list.
-                    if self.actual_values.get(event + ':' + option_name) is None:
-                        new_value = get_options_int()[-1]
-                        self.actual_values[event + ':' + option_name] = new_value
-                        dict_values[option_name] = new_value
-                    # Else get the previous stored value.
-                    else:
-                        dict_values[option_name] = self.actual_values.get(event + ':' + option_name)
+            # Integers and options of the kernels (as their size)
+            for parameter in get_process(event).get_value_parameters():
+                option_name = parameter.name
+                # If a value was not already set, take the initial value of the process.
+                if self.actual_values.get(event + ':' + option_name) is None:
+                    new_value = parameter.init
+                    self.actual_values[event + ':' + option_name] = new_value
+                    dict_values[option_name] = new_value
+                # Else get the previous stored value.
+                else:
+                    dict_values[option_name] = self.actual_values.get(event + ':' + option_name)
             self.process_list_widget.processes_dict[event].params_window.set_values(dict_values)
         except Exception as e:
             print("Exception - update_options: " + str(e) + "")
@@ -180,41 +230,289 @@ class DemoImageProcessing(QMainWindow):
             input_image = self.initial_image_display_widget.get_image()
             # If the process is checked, process the image and display it.
             if self.process_list_widget.processes_dict[event].check_item.isChecked():
-                all_options = process_list[event]['params']
-                for id, option in enumerate(all_options.split(';')):
-                    option_items = process_list[event][option]
-                    item = option_items.split(':')
-                    option_name = option
-                    if self.actual_values.get(event + ':' + option_name) is None:
-                        new_value = int(process_list[event][option_name].split(':')[-1])
-                        self.actual_values[event + ':' + option_name] = new_value
+                for parameter in get_process(event).parameters:
+                    # Kernels, integers and options of the kernels (as their size)
+                    for option in [parameter] + parameter.options:
+                        if self.actual_values.get(event + ':' + option.name) is None:
+                            self.actual_values[event + ':' + option.name] = option.init
                 self.process_image(event)
             # If the process is not checked, then display initial image in the process display area.
             else:
-                self.process_image_display_widget.set_image_from_image(input_image)
+                self.current_process = None
+                self.process_executor.cancel()
+                self.display_output_image(input_image)
+                if self.video_source is None:
+                    self.history.push('initial', {}, input_image)
             self.handle_resize()
         except Exception as e:
             print("Exception - check_process: " + str(e) + "")
 
+    def get_process_params(self, process_name: str) -> dict:
+        """
+        Return the actual values of the parameters of a process.
+
+        :param process_name: Name of the process.
+        :type process_name: str
+
+        :return: Dictionary of parameters of the process.
+        :rtype: dict
+
+        """
+        # Parameters without a value take their initial value.
+        process_dict = get_process(process_name).default_params()
+        for name in process_dict:
+            value = self.actual_values.get(process_name + ':' + name)
+            if value is not None:
+                process_dict[name] = value
+        return process_dict
+
     def process_image(self, event):
         """Process the image with the appropriate function."""
         try:
             input_image = self.initial_image_display_widget.get_image()
             option_event = event.split(':')
             process_name = option_event[0]
-            process_dict = {}
-            all_options = get_process_options(process_name)
-            # For each parameter of the process, collect the value of the parameters.
-            for id, option_name in enumerate(all_options.split(';')):
-                option_type = get_options_type(process_name, option_name)
-                if option_type == 'int':
-                    process_dict[option_name] = self.actual_values[process_name + ':' + option_name]
-            # Process the new image.
-            temp_image = process_list[process_name]["function"](input_image, process_dict)
-            self.process_image_display_widget.set_image_from_image(temp_image)
+            self.current_process = process_name
+            process_dict = self.get_process_params(process_name)
+            if self.roi is not None:
+                # Only the region of interest, processed by tiles (cached)
+                roi = self.roi
+                self.process_executor.submit(
+                    lambda image, params: self.roi_processor.process(process_name, image, params, roi),
+                    input_image, process_dict, {'roi': roi})
+                return
+            # Process the new image, if not already done with the same parameters.
+            # Hash of the input image computed once (read-only array of the history)
+            image_hash = self.process_cache.get_hash(input_image)
+            cache_key = self.process_cache.make_key(image_hash, process_name, process_dict)
+            tag = {'cache_key': cache_key, 'process': process_name, 'params': process_dict}
+            temp_image = self.process_cache.get(cache_key)
+            if temp_image is None:
+                operation = get_process(process_name)
+                function = operation.function
+                # Process a reduced image first, then the initial image, if the process is long.
+                preview_image = input_image
+                if operation.estimate_cost(input_image.getPixels().shape, process_dict) > preview_cost:
+                    preview_image = input_image.get_preview(self.height_img, self.width_img)
+                if preview_image is not input_image:
+                    self.process_executor.submit(function, preview_image, process_dict,
+                                                 {'cache_key': None})
+                    self.process_executor.refine(function, input_image, process_dict, tag)
+                else:
+                    self.process_executor.submit(function, input_image, process_dict, tag)
+            else:
+                self.process_executor.cancel()
+                self.display_output_image(temp_image)
+                self.history.push(process_name, process_dict, temp_image)
         except Exception as e:
             print("Exception - process_image: " + str(e) + "")
 
+    def compare_process(self, event) -> None:
+        """
+        Action performed when the "Compare" button of a process is clicked.
+
+        Variants of the first parameter of the process are processed in
+        parallel and displayed in a grid.
+
+        :param event: Name of the process.
+        :type event: str
+        """
+        try:
+            input_image = self.initial_image_display_widget.get_image()
+            process_dict = self.get_process_params(event)
+            if self.comparison_widget is None:
+                self.comparison_widget = ComparisonWidget()
+            self.comparison_widget.compare(event, input_image, make_variants(event, process_dict))
+            self.comparison_widget.show()
+            self.comparison_widget.raise_()
+        except Exception as e:
+            print("Exception - compare_process: " + str(e) + "")
+
+    def display_processed_image(self, tag: dict, image) -> None:
+        """
+        Action performed when a process is finished in the background thread.
+
+        :param tag: Data of the job. 'cache_key', 'process' and 'params' entries
+            for a still image (key of the result in the cache of processes, None
+            for a preview), 'timestamp' entry for a live frame (time of the capture),
+            'roi' entry for a region of interest.
+        :type tag: dict
+        :param image: Processed image.
+        :type image: Image
+
+        """
+        try:
+            if tag.get('cache_key') is not None:
+                self.process_cache.put(tag['cache_key'], image)
+                self.history.push(tag['process'], tag['params'], image)
+            self.display_output_image(image)
+            if 'timestamp' in tag:
+                self.update_live_info(tag['timestamp'])
+            else:
+                self.handle_resize()
+        except Exception as e:
+            print("Exception - display_processed_image: " + str(e) + "")
+
+    def display_output_image(self, image) -> None:
+        """
+        Display an image in the output area, with its histogram and statistics.
+
+        :param image: Image to display.
+        :type image: Image
+        """
+        self.process_image_display_widget.set_image_from_image(image)
+        self.histogram_widget.set_image(image)
+
+    def update_roi(self, roi) -> None:
+        """
+        Action performed when the region of interest is changed on the initial image.
+
+        :param roi: Region (x, y, width, height) in pixels, None for the whole image.
+        :type roi: tuple
+        """
+        try:
+            if self.video_source is not None:
+                return
+            self.roi = roi
+            if self.current_process is not None:
+                self.process_image(self.current_process)
+        except Exception as e:
+            print("Exception - update_roi: " + str(e) + "")
+
+    def undo_process(self) -> None:
+        """
+        Action performed when Ctrl+Z is pressed. Display the previous result.
+        """
+        self.display_history_step(self.history.undo())
+
+    def redo_process(self) -> None:
+        """
+        Action performed when Ctrl+Y is pressed. Display the next result.
+        """
+        self.display_history_step(self.history.redo())
+
+    def display_history_step(self, step) -> None:
+        """
+        Display the image of a step of the history.
+
+        :param step: Step of the history, None if there is nothing to display.
+        :type step: HistoryStep
+        """
+        try:
+            if step is None or self.video_source is not None:
+                return
+            # A running process would replace the displayed step
+            self.process_executor.cancel()
+            self.display_output_image(self.history.get_image(step))
+            self.handle_resize()
+        except Exception as e:
+            print("Exception - display_history_step: " + str(e) + "")
+
+    def start_live_source(self, event) -> None:
+        """
+        Action performed after a click on the webcam or video buttons of the source widget.
+
+        :param event: Triggering event, 'webcam;', 'video;filename;' or 'stop;'.
+        :type event: str
+        """
+        try:
+            event_data = event.split(';')
+            # A second click on a running source stops it
+            running = self.live_type
+            self.stop_live_source()
+            if event_data[0] == 'stop' or (event_data[0] == 'webcam' and running == 'webcam'):
+                return
+            if event_data[0] == 'webcam':
+                self.video_source = VideoSource(0)
+                name = 'Camera 0'
+            else:
+                self.video_source = VideoSource(event_data[1])
+                name = event_data[1].split('/')[-1]
+            self.live_type = event_data[0]
+            self.live_counter.reset()
+            # The frames are processed entirely
+            self.roi = None
+            self.initial_image_display_widget.enable_roi(False)
+            self.video_source.frame_ready.connect(self.update_live_frame)
+            self.video_source.error.connect(self.live_source_error)
+            self.video_source.start()
+            self.source_widget.set_live_state(self.live_type, name)
+            self.is_image_set = True
+            self.process_list_widget.enable()
+        except Exception as e:
+            print("Exception - start_live_source: " + str(e) + "")
+
+    def stop_live_source(self) -> None:
+        """
+        Stop the live source, if running.
+        """
+        if self.video_source is None:
+            return
+        self.video_source.frame_ready.disconnect(self.update_live_frame)
+        self.video_source.error.disconnect(self.live_source_error)
+        self.video_source.stop()
+        self.video_source = None
+        self.initial_image_display_widget.enable_roi()
+        self.source_widget.set_live_info(self.live_type, 'STOPPED')
+        self.live_type = ''
+        self.source_widget.set_live_state()
+
+    def live_source_error(self, message: str) -> None:
+        """
+        Action performed when the live source can not be read.
+
+        :param message: Description of the error.
+        :type message: str
+        """
+        print(message)
+        live_type = self.live_type
+        self.stop_live_source()
+        self.source_widget.set_live_info(live_type, 'ERROR')
+
+    def update_live_frame(self) -> None:
+        """
+        Action performed when a new frame of the live source is available.
+
+        The frame is always displayed. It is processed only if no other frame
+        is being processed : the processing never falls behind the source.
+        """
+        try:
+            if self.video_source is None:
+                return
+            frame = self.video_source.get_latest()
+            if frame is None:
+                return
+            pixels, timestamp = frame
+            self.initial_image_display_widget.display_from_webcam(pixels)
+            input_image = self.initial_image_display_widget.get_image()
+            if self.current_process is None:
+                self.display_output_image(input_image)
+                self.update_live_info(timestamp)
+            elif not self.process_executor.is_busy():
+                function = get_process(self.current_process).function
+                process_dict = self.get_process_params(self.current_process)
+                self.process_executor.submit(function, input_image, process_dict,
+                                             {'timestamp': timestamp})
+        except Exception as e:
+            print("Exception - update_live_frame: " + str(e) + "")
+
+    def update_live_info(self, timestamp: float) -> None:
+        """
+        Update the frame rates and the latency of the live source.
+
+        :param timestamp: Time of the capture of the displayed frame (time.perf_counter).
+        :type timestamp: float
+        """
+        if self.video_source is None:
+            return
+        now = time.perf_counter()
+        fps = self.live_counter.tick(now)
+        self.live_latency += 0.1 * ((now - timestamp) - self.live_latency)
+        capture_fps = self.video_source.capture_counter.fps
+        self.source_widget.set_live_info(
+            self.live_type,
+            f'{fps:.1f}/{capture_fps:.1f} fps - {self.live_latency * 1000:.0f} ms')
+
     def handle_resize(self):
         """
         Action performed when the window is resized.
@@ -263,6 +561,12 @@ class DemoImageProcessing(QMainWindow):
                                      QMessageBox.StandardButton.No)
 
         if reply == QMessageBox.StandardButton.Yes:
+            self.stop_live_source()
+            if self.comparison_widget is not None:
+                self.comparison_widget.close()
+            self.process_executor.cancel()
+            self.process_executor.wait_for_done()
+            self.history.clear()
             event.accept()
         else:
             event.ignore()
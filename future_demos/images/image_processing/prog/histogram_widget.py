@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""*histogram_widget* file.
+
+*histogram_widget* file that contains :
+
+    * :class::HistogramCanvas
+    * :class::HistogramWidget
+
+.. note:: LEnsE - Institut d'Optique - version 0.1
+
+.. moduleauthor:: Julien VILLEMEJANE <julien.villemejane@institutoptique.fr>
+"""
+import numpy as np
+from image import Image
+
+from PyQt6.QtWidgets import (
+    QWidget, QLabel,
+    QVBoxLayout
+)
+from PyQt6.QtGui import QColor, QPainter, QPen, QPolygonF
+from PyQt6.QtCore import Qt, QPointF
+
+# Number of bins displayed (16 bits histograms are summed by groups of values)
+display_bins = 256
+# Colors of the curves, by channel (gray, or blue / green / red)
+channel_colors = [QColor(0, 0, 255), QColor(0, 160, 0), QColor(255, 0, 0)]
+
+
+class HistogramCanvas(QWidget):
+    """Area where the histograms of the channels are painted. Children of QWidget.
+
+    Each channel is a curve, normalized by the highest bin of all the channels.
+
+    """
+
+    def __init__(self) -> None:
+        """
+        Default constructor of the class.
+
+        """
+        super().__init__(parent=None)
+        self.curves = None
+        self.setMinimumHeight(80)
+
+    def set_curves(self, curves: np.ndarray = None) -> None:
+        """
+        Set the histograms to paint.
+
+        :param curves: Histograms, one row per channel. Default None, nothing is painted.
+        :type curves: np.ndarray
+
+        """
+        self.curves = curves
+        self.update()
+
+    def paintEvent(self, event) -> None:
+        """
+        paintEvent redefinition. Paint a curve per channel.
+        """
+        if self.curves is None or self.curves.size == 0:
+            return
+        width = self.width()
+        height = self.height()
+        highest = max(float(self.curves.max()), 1.0)
+        n_bins = self.curves.shape[1]
+        x = np.arange(n_bins) * (width - 1) / max(n_bins - 1, 1)
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        for k, curve in enumerate(self.curves):
+            color = QColor(0, 0, 0) if len(self.curves) == 1 else channel_colors[k % len(channel_colors)]
+            painter.setPen(QPen(color, 1))
+            y = (height - 1) * (1 - curve / highest)
+            painter.drawPolyline(QPolygonF([QPointF(x_k, y_k) for x_k, y_k in zip(x, y)]))
+        painter.end()
+
+
+class HistogramWidget(QWidget):
+    """Display the histogram and the statistics of an image. Children of QWidget.
+
+    The histogram and the statistics are given by the ImageStatistics of the
+    image (one pass on the pixels). The histogram is displayed in 256 bins,
+    from 0 to the maximum value of the bit depth of the image.
+
+    :param canvas: Area where the histograms are painted.
+    :type canvas: HistogramCanvas
+    :param stats_label: Label of the statistics (mean, std, min, max, median).
+    :type stats_label: QLabel
+
+    """
+
+    def __init__(self) -> None:
+        """
+        Default constructor of the class.
+
+        """
+        super().__init__(parent=None)
+        self.canvas = HistogramCanvas()
+        self.stats_label = QLabel()
+        self.stats_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.stats_label.setWordWrap(True)
+        self.main_layout = QVBoxLayout()
+        self.main_layout.addWidget(QLabel('Histogram'))
+        self.main_layout.addWidget(self.canvas)
+        self.main_layout.addWidget(self.stats_label)
+        self.setLayout(self.main_layout)
+
+    def set_image(self, image: Image, mask: np.ndarray = None) -> None:
+        """
+        Set the image whose histogram and statistics are displayed.
+
+        :param image: Image to analyze.
+        :type image: Image
+        :param mask: Region of interest, nonzero values are used. Default None, all the image.
+        :type mask: np.ndarray
+
+        """
+        stats = image.get_statistics(mask)
+        hist, _ = stats.histogram()
+        if stats.is_integer():
+            # Values above the bit depth are not displayed, then groups of values
+            n_values = min(hist.shape[1], 2 ** image.bit_depth)
+            hist = hist[:, :n_values]
+            if n_values > display_bins:
+                hist = hist.reshape(hist.shape[0], display_bins, -1).sum(axis=2)
+        self.canvas.set_curves(hist)
+        self.stats_label.setText(self._format_stats(stats.get_stats()))
+
+    @staticmethod
+    def _format_stats(stats: dict) -> str:
+        """Return the statistics as a text, one value per channel."""
+        text = []
+        for name in ['mean', 'std', 'min', 'max', 'median']:
+            values = np.atleast_1d(stats[name])
+            text.append(name + ' ' + ' / '.join(f'{value:.4g}' for value in values))
+        return ' - '.join(text)
+
+    def clear(self) -> None:
+        """
+        Remove the displayed histogram.
+
+        """
+        self.canvas.set_curves(None)
+        self.stats_label.setText('')
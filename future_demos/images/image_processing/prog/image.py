@@ -1,6 +1,35 @@
 import numpy as np
 import cv2 as cv
 import os
+from image_stats import ImageStatistics
+from lut import PointwiseChain
+
+
+def _get_bit_depth(dtype: np.dtype) -> int:
+    """Return the number of bits of a type of pixels, 0 for floating point values."""
+    if np.dtype(dtype).kind in 'ui':
+        return 8 * np.dtype(dtype).itemsize
+    return 0
+
+
+def get_max_value(dtype: np.dtype, bit_depth: int = None) -> float:
+    """
+    Return the maximum value of a pixel.
+
+    :param dtype: Type of the pixels.
+    :type dtype: np.dtype
+    :param bit_depth: Number of significant bits. Default None, all the bits of the type.
+    :type bit_depth: int
+
+    :return: 2 ** bit_depth - 1, or 1.0 for floating point values.
+    :rtype: float
+
+    """
+    if bit_depth is None:
+        bit_depth = _get_bit_depth(dtype)
+    if bit_depth == 0:
+        return 1.0
+    return float(2 ** bit_depth - 1)
 
 
 class Image:
@@ -17,6 +46,16 @@ class Image:
     :type type: str
     :param pixels: Value of each pixel.
     :type pixels: numpy.ndarray
+    :param bit_depth: Number of significant bits of the pixels (8, 10, 12, 16...),
+        0 for floating point values (between 0 and 1).
+    :type bit_depth: int
+
+    The type of the pixels of the file is kept (8 or 16 bits, gray or color).
+    Conversion to 8 bits is only done to display the image.
+
+    A pyramid of reduced images (each level is half the size of the previous
+    one, computed with cv.pyrDown) is built only when needed, and cleared
+    when the pixels are modified.
     
     """
 
@@ -30,6 +69,8 @@ class Image:
         self.channels = 0  # Number of color values for each pixel
         self.type = None  # Type of image (PNG, JPG, PGM...)
         self.pixels = np.array([])  # Value of each pixel
+        self.bit_depth = 8  # Number of significant bits of the pixels
+        self._pyramid = None  # Levels of reduced images, level 0 is pixels
 
     def open(self, filename: str = '') -> bool:
         """
@@ -42,9 +83,14 @@ class Image:
         :rtype: bool
 
         """
-        self.pixels = cv.imread(filename);
+        # Type (8 or 16 bits) and number of channels of the file are kept
+        self.pixels = cv.imread(filename, cv.IMREAD_UNCHANGED)
+        self._pyramid = None
         if self.pixels is None:
             return False
+        if self.pixels.ndim > 2 and self.pixels.shape[2] == 4:
+            # Transparency is not used
+            self.pixels = cv.cvtColor(self.pixels, cv.COLOR_BGRA2BGR)
         temp_str = os.path.splitext(filename)[1]
         self.type = temp_str[1:].upper()
         self.height = self.pixels.shape[0];
@@ -53,6 +99,7 @@ class Image:
             self.channels = self.pixels.shape[2]
         else:
             self.channels = 1
+        self.bit_depth = _get_bit_depth(self.pixels.dtype)
         return True
 
     def write(self, filename: str) -> bool:
@@ -71,16 +118,26 @@ class Image:
         success = cv.imwrite(filename, self.pixels)
         return success
 
-    def create(self, pixels: np.ndarray) -> None:
+    def create(self, pixels: np.ndarray, bit_depth: int = None) -> None:
         """
         Create an image from an array.
         
         :param pixels: Array of pixels.
         :type pixels: np.ndarray
+        :param bit_depth: Number of significant bits of the pixels. Default None,
+            the bit depth of the image is kept if the type of the pixels is
+            unchanged, otherwise all the bits of the type.
+        :type bit_depth: int
         
         """
         try:
+            if bit_depth is None:
+                bit_depth = self.bit_depth
+                if self.pixels.size == 0 or self.pixels.dtype != pixels.dtype:
+                    bit_depth = _get_bit_depth(pixels.dtype)
             self.pixels = pixels
+            self._pyramid = None
+            self.bit_depth = bit_depth
             self.height = self.pixels.shape[0]
             self.width = self.pixels.shape[1]
             if len(self.pixels.shape) > 2:
@@ -140,32 +197,218 @@ class Image:
         """
         return self.channels
 
-    def change_contrast(self, contrast: float) -> None:
+    def set_bit_depth(self, bit_depth: int) -> None:
+        """
+        Set the number of significant bits of the pixels (for example 10 or
+        12 bits data of a sensor, stored in 16 bits).
+
+        :param bit_depth: Number of significant bits.
+        :type bit_depth: int
+
+        """
+        self.bit_depth = bit_depth
+
+    def get_max_value(self) -> float:
+        """
+        Return the maximum value of a pixel, from the bit depth.
+
+        :return: 2 ** bit_depth - 1, or 1.0 for floating point values.
+        :rtype: float
+
+        """
+        return get_max_value(self.pixels.dtype, self.bit_depth)
+
+    def change_contrast(self, contrast: float, in_place: bool = False) -> None:
         """
         Change the contrast of the image.
 
+        8 bits images are processed with a lookup table (:class:`PointwiseChain`
+        of *lut* file) : use :meth:`apply_lut` with a chain of operations to
+        change the contrast and the brightness in one pass.
+
         :param contrast: Contrast, between 0 to 10.
         :type contrast: float
+        :param in_place: Modify the array of pixels, instead of creating a
+            new one. Default False.
+        :type in_place: bool
 
         """
+        if self._is_lut_image():
+            self.apply_lut(PointwiseChain().contrast(contrast), in_place)
+            return
         if contrast < 0:
             contrast = 1.0
-        self.pixels = cv.convertScaleAbs(self.pixels, alpha=contrast)
+        self._scale_pixels(contrast, 0, in_place)
 
-    def change_brightness(self, brightness: int) -> None:
+    def change_brightness(self, brightness: int, in_place: bool = False) -> None:
         """
         Change the brightness of the image.
 
+        8 bits images are processed with a lookup table, as :meth:`change_contrast`.
+
         :param brightness: Brightness in percent, between -100 to 100.
         :type brightness: int
+        :param in_place: Modify the array of pixels, instead of creating a
+            new one. Default False.
+        :type in_place: bool
 
         """
+        if self._is_lut_image():
+            self.apply_lut(PointwiseChain().brightness(brightness), in_place)
+            return
         if brightness > 100:
             brightness = 100
         elif brightness < -100:
             brightness = -100
-        brightness = brightness * 127 / 100
-        self.pixels = cv.convertScaleAbs(self.pixels, beta=brightness)
+        # Same change as for 8 bits images, scaled to the bit depth
+        brightness = brightness * 127 / 100 * self.get_max_value() / 255
+        self._scale_pixels(1.0, brightness, in_place)
+
+    def _scale_pixels(self, alpha: float, beta: float, in_place: bool) -> None:
+        """Compute alpha * pixels + beta, saturated, with the same type."""
+        if self.pixels.dtype == np.uint8:
+            self.pixels = cv.convertScaleAbs(self.pixels, dst=self._in_place_dst(in_place),
+                                             alpha=alpha, beta=beta)
+        else:
+            dst = self.pixels if in_place and self.pixels.flags.writeable else None
+            self.pixels = cv.addWeighted(self.pixels, alpha, self.pixels, 0, beta, dst=dst)
+            if self.pixels.dtype.kind in 'ui' and self.bit_depth < 8 * self.pixels.itemsize:
+                # Saturation to the significant bits
+                np.minimum(self.pixels, int(self.get_max_value()), out=self.pixels)
+        self._pyramid = None
+
+    def apply_lut(self, lut, in_place: bool = False) -> None:
+        """
+        Apply a lookup table to the pixels (8 bits only), in one pass.
+
+        :param lut: Table of 256 values, or a chain of pointwise operations
+            (:class:`PointwiseChain` of *lut* file).
+        :type lut: np.ndarray | PointwiseChain
+        :param in_place: Modify the array of pixels, instead of creating a new one. Default False.
+        :type in_place: bool
+
+        """
+        if not isinstance(lut, np.ndarray):
+            lut = lut.table()
+        if self.pixels.dtype != np.uint8:
+            raise ValueError(f'Image.apply_lut: 8 bits image required, not {self.pixels.dtype}')
+        self.pixels = cv.LUT(self.pixels, lut, dst=self._in_place_dst(in_place))
+        self._pyramid = None
+
+    def _is_lut_image(self) -> bool:
+        """Return True if the pointwise operations use a lookup table (8 bits pixels)."""
+        return self.pixels.dtype == np.uint8 and self.bit_depth == 8
+
+    def _in_place_dst(self, in_place: bool) -> np.ndarray:
+        """Return the pixels if they can be modified in place by cv.convertScaleAbs, else None."""
+        if in_place and self.pixels.dtype == np.uint8 and self.pixels.flags.writeable:
+            return self.pixels
+        return None
+
+    def get_statistics(self, mask: np.ndarray = None) -> ImageStatistics:
+        """
+        Return the statistics of the image (histogram, mean, std, min, max, percentiles).
+
+        :param mask: Region of interest, nonzero values are used. Default None, all the image.
+        :type mask: np.ndarray
+
+        :return: Statistics of the pixels.
+        :rtype: ImageStatistics
+
+        """
+        return ImageStatistics(self.pixels, mask)
+
+    def get_histogram(self, mask: np.ndarray = None) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Return the histogram of the image.
+
+        :param mask: Region of interest, nonzero values are used. Default None, all the image.
+        :type mask: np.ndarray
+
+        :return: Histogram (one row per channel) and edges of the bins.
+        :rtype: tuple[np.ndarray, np.ndarray]
+
+        """
+        return self.get_statistics(mask).histogram()
+
+    def get_pyramid_level(self, level: int) -> np.ndarray:
+        """
+        Return a level of the pyramid of reduced images.
+
+        Levels are computed only once, when required.
+
+        :param level: Level of the pyramid. 0 is the initial image, each level
+            is half the size of the previous one.
+        :type level: int
+
+        :return: Array of pixels of the level (or of the smallest level).
+        :rtype: np.ndarray
+
+        """
+        if self._pyramid is None:
+            self._pyramid = [self.pixels]
+        while len(self._pyramid) <= level:
+            previous = self._pyramid[-1]
+            if min(previous.shape[0], previous.shape[1]) < 2:
+                break
+            self._pyramid.append(cv.pyrDown(previous))
+        return self._pyramid[min(level, len(self._pyramid) - 1)]
+
+    def get_level_for_size(self, new_height: int, new_width: int) -> int:
+        """
+        Return the smallest level of the pyramid larger than a display area.
+
+        :param new_height: Height of the area.
+        :type new_height: int
+        :param new_width: Width of the area.
+        :type new_width: int
+
+        :return: Level of the pyramid.
+        :rtype: int
+
+        """
+        if self.width == 0 or self.height == 0 or new_height <= 0 or new_width <= 0:
+            return 0
+        n_height, n_width = self._size_ratio(new_height, new_width)
+        level = 0
+        height, width = self.height, self.width
+        while height // 2 >= n_height and width // 2 >= n_width and min(height, width) >= 2:
+            height, width = (height + 1) // 2, (width + 1) // 2
+            level += 1
+        return level
+
+    def get_preview(self, new_height: int, new_width: int) -> 'Image':
+        """
+        Return a reduced image, from the pyramid, for a display area.
+
+        Processing the preview first is faster than processing the initial image.
+
+        :param new_height: Height of the area.
+        :type new_height: int
+        :param new_width: Width of the area.
+        :type new_width: int
+
+        :return: Reduced image (the image itself if no reduction is possible).
+        :rtype: Image
+
+        """
+        level = self.get_level_for_size(new_height, new_width)
+        if level == 0:
+            return self
+        preview = Image()
+        preview.create(self.get_pyramid_level(level), self.bit_depth)
+        preview.type = self.type
+        return preview
+
+    def _size_ratio(self, new_height: int, new_width: int) -> tuple[int, int]:
+        """Return the size in an area, with the same aspect ratio."""
+        aspect_ratio = self.width / self.height
+        n_width = new_width
+        n_height = int(n_width / aspect_ratio)
+        if n_height > new_height:
+            n_height = new_height
+            n_width = int(n_height * aspect_ratio)
+        return n_height, n_width
 
     def resize_image_ratio(self, new_height: int, new_width: int) -> np.ndarray:
         """
@@ -180,22 +423,15 @@ class Image:
         :rtype: Image       
 
         """
-        aspect_ratio = self.width / self.height
-
         # Calculate new size with same aspect_ratio
-        n_width = new_width
-        n_height = int(n_width / aspect_ratio)
-        if n_height > new_height:
-            n_height = new_height
-            n_width = int(n_height * aspect_ratio)
-        else:
-            n_width = new_width
-            n_height = int(n_width / aspect_ratio)
+        n_height, n_width = self._size_ratio(new_height, new_width)
 
-        resized_array = cv.resize(self.pixels, (n_width, n_height))
+        # Start from the nearest level of the pyramid
+        level = self.get_level_for_size(new_height, new_width)
+        resized_array = cv.resize(self.get_pyramid_level(level), (n_width, n_height))
         # Generate a new image
         resized_image = Image()
-        resized_image.create(resized_array)
+        resized_image.create(resized_array, self.bit_depth)
         return resized_image
 
     def __str__(self) -> str:
@@ -3,6 +3,7 @@
 
 *image_display_widget* file that contains :
 
+    * :class::ImageCanvas
     * :class::ImageDisplayWidget
 
 .. note:: LEnsE - Institut d'Optique - version 0.1
@@ -11,26 +12,280 @@
 """
 import numpy as np
 from image import Image
+from supoptools.images.conversion import array_to_8bits, get_window
 
 from PyQt6.QtWidgets import (
     QWidget, QLabel,
     QVBoxLayout
 )
-from PyQt6.QtGui import QPixmap, QImage, QColor, QPalette
-from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QImage, QColor, QPainter, QPen
+from PyQt6.QtCore import Qt, QRectF, QSize, QPointF, pyqtSignal
+
+
+class ImageCanvas(QWidget):
+    """Area where an array of pixels is painted. Children of QWidget.
+
+    The QImage is built once on the array of pixels (no copy). The array is
+    kept as long as the QImage exists. The image is scaled at paint time in
+    a rectangle with the same aspect ratio, no resized copy is created.
+
+    Images with more than 8 bits (or floating point values) are kept as they
+    are : only the painted array is converted to 8 bits, with a window of
+    values (minimum and maximum of the image by default).
+
+    When the selection is enabled, a region of interest is drawn with the
+    mouse (a drag inside the region moves it). The signal *roi_changed* is
+    emitted with the region (x1, y1, x2, y2) as fractions of the size of the
+    image, or None when the region is removed (click without drag).
+
+    """
+
+    roi_changed = pyqtSignal(object)
+
+    def __init__(self) -> None:
+        """
+        Default constructor of the class.
+
+        """
+        super().__init__(parent=None)
+        self.q_image = None
+        self._source = None  # Array of pixels given to set_array
+        self._buffer = None  # Array of pixels used by q_image, must stay alive
+        self._window = None  # Values (low, high) displayed as 0 and 255, None for auto
+        self.target_height = 0
+        self.target_width = 0
+        # Region of interest, as fractions of the image (x1, y1, x2, y2)
+        self.roi_enabled = False
+        self._roi = None
+        self._drag_start = None
+        self._drag_roi = None  # Region when a move started, None for a new region
+
+    def set_array(self, pixels: np.ndarray) -> None:
+        """
+        Set the array of pixels to paint.
+
+        :param pixels: Array of pixels, gray (2D) or BGR (3D). Types other
+            than 8 bits are converted to 8 bits for the display only.
+        :type pixels: np.ndarray
+
+        """
+        self._source = pixels
+        # Windowing and conversion to 8 bits in one pass (not for 8 bits arrays)
+        buffer = array_to_8bits(pixels, self.get_window())
+        height, width = buffer.shape[:2]
+        if buffer.ndim == 2:
+            format_image = QImage.Format.Format_Grayscale8
+        else:
+            format_image = QImage.Format.Format_BGR888
+        self._buffer = buffer
+        self.q_image = QImage(buffer, width, height, buffer.strides[0], format_image)
+        self.updateGeometry()
+        self.update()
+
+    def get_array(self) -> np.ndarray:
+        """
+        Return the array of pixels painted.
+
+        :return: Array of pixels given to set_array (not converted to 8 bits).
+        :rtype: np.ndarray
+
+        """
+        return self._source
+
+    def set_window(self, low: float = None, high: float = None) -> None:
+        """
+        Set the values displayed as black and white (not for 8 bits images).
+
+        :param low: Value displayed as black. Default None, automatic window.
+        :type low: float
+        :param high: Value displayed as white. Default None, automatic window.
+        :type high: float
+
+        """
+        if low is None or high is None:
+            self._window = None
+        else:
+            self._window = (float(low), float(high))
+        if self._source is not None and self._source.dtype != np.uint8:
+            self.set_array(self._source)
+
+    def get_window(self) -> tuple[float, float]:
+        """
+        Return the values displayed as black and white.
+
+        :return: Window (low, high). Minimum and maximum of the image for an
+            automatic window.
+        :rtype: tuple[float, float]
+
+        """
+        if self._window is not None:
+            return self._window
+        if self._source is None:
+            return 0.0, 255.0
+        return get_window(self._source)
+
+    def set_target_size(self, h: int, w: int) -> None:
+        """
+        Set the maximum size of the painted image.
+
+        :param h: Maximum height of the image.
+        :type h: int
+        :param w: Maximum width of the image.
+        :type w: int
+
+        """
+        self.target_height = h
+        self.target_width = w
+        self.updateGeometry()
+        self.update()
+
+    def _fit_size(self, h: int, w: int) -> tuple[int, int]:
+        """Return the size of the image in an area, with the same aspect ratio."""
+        if self.q_image is None or self.q_image.isNull() or h <= 0 or w <= 0:
+            return 0, 0
+        aspect_ratio = self.q_image.width() / self.q_image.height()
+        n_width = w
+        n_height = int(n_width / aspect_ratio)
+        if n_height > h:
+            n_height = h
+            n_width = int(n_height * aspect_ratio)
+        return n_height, n_width
+
+    def sizeHint(self) -> QSize:
+        """
+        sizeHint redefinition. Size of the image in the target area.
+        """
+        n_height, n_width = self._fit_size(self.target_height, self.target_width)
+        return QSize(n_width, n_height)
+
+    def image_rect(self) -> QRectF:
+        """
+        Return the rectangle where the image is painted in the widget.
+
+        :return: Rectangle of the image, centered in the widget.
+        :rtype: QRectF
+
+        """
+        h = min(self.height(), self.target_height) if self.target_height > 0 else self.height()
+        w = min(self.width(), self.target_width) if self.target_width > 0 else self.width()
+        n_height, n_width = self._fit_size(h, w)
+        x = (self.width() - n_width) / 2
+        y = (self.height() - n_height) / 2
+        return QRectF(x, y, n_width, n_height)
+
+    def paintEvent(self, event) -> None:
+        """
+        paintEvent redefinition. Paint the image scaled in its rectangle.
+        """
+        if self.q_image is None or self.q_image.isNull():
+            return
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+        rect = self.image_rect()
+        painter.drawImage(rect, self.q_image)
+        if self._roi is not None:
+            x1, y1, x2, y2 = self._roi
+            painter.setPen(QPen(QColor(255, 60, 60), 2))
+            painter.drawRect(QRectF(rect.x() + x1 * rect.width(), rect.y() + y1 * rect.height(),
+                                    (x2 - x1) * rect.width(), (y2 - y1) * rect.height()))
+        painter.end()
+
+    def set_roi(self, roi: tuple = None) -> None:
+        """
+        Set the region of interest.
+
+        :param roi: Region (x1, y1, x2, y2) as fractions of the size of the image.
+            Default None, no region.
+        :type roi: tuple
+
+        """
+        self._roi = roi
+        self.update()
+
+    def get_roi(self) -> tuple:
+        """
+        Return the region of interest (x1, y1, x2, y2) as fractions of the size
+        of the image, or None.
+
+        """
+        return self._roi
+
+    def _to_fraction(self, position: QPointF) -> tuple[float, float]:
+        """Return a position in the widget as fractions of the image (clipped)."""
+        rect = self.image_rect()
+        if rect.width() <= 0 or rect.height() <= 0:
+            return 0.0, 0.0
+        x = (position.x() - rect.x()) / rect.width()
+        y = (position.y() - rect.y()) / rect.height()
+        return min(max(x, 0.0), 1.0), min(max(y, 0.0), 1.0)
+
+    def mousePressEvent(self, event) -> None:
+        """
+        mousePressEvent redefinition. Start a new region, or a move of the region.
+        """
+        if not self.roi_enabled or event.button() != Qt.MouseButton.LeftButton:
+            return
+        x, y = self._to_fraction(event.position())
+        self._drag_start = (x, y)
+        self._drag_roi = None
+        if self._roi is not None:
+            x1, y1, x2, y2 = self._roi
+            if x1 <= x <= x2 and y1 <= y <= y2:
+                self._drag_roi = self._roi
+
+    def mouseMoveEvent(self, event) -> None:
+        """
+        mouseMoveEvent redefinition. Update the region during a drag.
+        """
+        if self._drag_start is None:
+            return
+        x, y = self._to_fraction(event.position())
+        x0, y0 = self._drag_start
+        if self._drag_roi is not None:
+            # Move of the region, kept in the image
+            x1, y1, x2, y2 = self._drag_roi
+            dx = min(max(x - x0, -x1), 1.0 - x2)
+            dy = min(max(y - y0, -y1), 1.0 - y2)
+            roi = (x1 + dx, y1 + dy, x2 + dx, y2 + dy)
+        else:
+            roi = (min(x0, x), min(y0, y), max(x0, x), max(y0, y))
+        if roi != self._roi:
+            self.set_roi(roi)
+            self.roi_changed.emit(roi)
+
+    def mouseReleaseEvent(self, event) -> None:
+        """
+        mouseReleaseEvent redefinition. End of the drag, a click removes the region.
+        """
+        if self._drag_start is None:
+            return
+        x, y = self._to_fraction(event.position())
+        if (x, y) == self._drag_start and self._roi is not None:
+            self.set_roi(None)
+            self.roi_changed.emit(None)
+        self._drag_start = None
+        self._drag_roi = None
+
 
 class ImageDisplayWidget(QWidget):
     """Generate a widget to display an image. Children of QWidget.
+
+    The signal *roi_selected* is emitted with the region of interest
+    (x, y, width, height) in pixels of the image, or None.
     
     :param image: Image to display.
     :type image: Image
+    :param name_label: Name of the image, displayed above the image.
+    :type name_label: QLabel
     :param image_display: Graphical object to contain the image.
-    :type image_display: QLabel
+    :type image_display: ImageCanvas
     :param main_layout: Main layout of the widget.
     :type main_layout: QVBoxLayout
     
     """
-    
+
+    roi_selected = pyqtSignal(object)
+
     def __init__(self, name: str = '', height: int = 0, width: int = 0,
                  bg: tuple[int, int, int] = (0, 0, 0)) -> None:
         """
@@ -56,10 +311,11 @@ class ImageDisplayWidget(QWidget):
         self.height = height
         self.width = width
         
+        self.name = name
         self.image = Image()  # Initial image
-        self.image_resized = Image() # Resized image
-        self.image_display = QLabel(name)
-        self.image_display.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.image_display = ImageCanvas()
+        self.image_display.set_target_size(self.height, self.width)
+        self.image_display.roi_changed.connect(self.action_roi_changed)
         blank_image = np.ones((self.height, self.width, 3), dtype=np.uint8)
         blank_image[:,:,0] = bg[0]*blank_image[:,:,0]
         blank_image[:,:,1] = bg[1]*blank_image[:,:,1]
@@ -67,7 +323,11 @@ class ImageDisplayWidget(QWidget):
         self.set_image_from_array(blank_image)
                 
         # Graphical elements of the interface
+        self.name_label = QLabel(name)
+        self.name_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.name_label.setVisible(name != '')
         self.main_layout = QVBoxLayout() 
+        self.main_layout.addWidget(self.name_label)
         self.main_layout.addWidget(self.image_display)
         
         self.setLayout(self.main_layout)
@@ -81,9 +341,52 @@ class ImageDisplayWidget(QWidget):
 
         """
         self.image = image
-        self.image_resized = image
         self.display_image()
 
+    def enable_roi(self, value: bool = True) -> None:
+        """
+        Enable the selection of a region of interest with the mouse.
+
+        :param value: True to enable the selection. Default True.
+        :type value: bool
+
+        """
+        self.image_display.roi_enabled = value
+        if not value:
+            self.image_display.set_roi(None)
+
+    def get_roi(self) -> tuple:
+        """
+        Return the region of interest.
+
+        :return: Region (x, y, width, height) in pixels of the image, or None.
+        :rtype: tuple
+
+        """
+        roi = self.image_display.get_roi()
+        if roi is None or self.image.width == 0:
+            return None
+        x1, y1, x2, y2 = roi
+        x, y = int(x1 * self.image.width), int(y1 * self.image.height)
+        width = int(np.ceil(x2 * self.image.width)) - x
+        height = int(np.ceil(y2 * self.image.height)) - y
+        if width <= 0 or height <= 0:
+            return None
+        return x, y, width, height
+
+    def clear_roi(self) -> None:
+        """
+        Remove the region of interest.
+
+        """
+        self.image_display.set_roi(None)
+
+    def action_roi_changed(self, event) -> None:
+        """
+        Action performed when the region of interest is changed with the mouse.
+        """
+        self.roi_selected.emit(self.get_roi())
+
     def set_image_from_path(self, filename: str, h: int = 0, w: int = 0) -> bool:
         """
         Open an image file from its path and filename.
@@ -101,11 +404,7 @@ class ImageDisplayWidget(QWidget):
         """
         success = self.image.open(filename)
         if w != 0 or h != 0:
-            self.image_resized = self.image.resize_image_ratio(h, w)
-        elif self.width != 0 or self.height != 0:
-            self.image_resized = self.image.resize_image_ratio(self.height, self.width)
-        else:
-            self.image_resized = self.image
+            self.image_display.set_target_size(h, w)
         self.display_image()
         return success
         
@@ -121,7 +420,6 @@ class ImageDisplayWidget(QWidget):
 
         """
         self.image.create(pixels)
-        self.image_resized = self.image
         self.display_image()
 
     def set_size_display(self, h: int, w: int) -> None:
@@ -157,42 +455,40 @@ class ImageDisplayWidget(QWidget):
         :type w: int 
         
         """
-        max_height, max_width = self.image.getSize()
-         
-        if h > max_height or w > max_width:
-            # Resize at the maximum initial image size
-            self.image_resized = self.image
+        # The image is scaled when painted, no resized copy is needed.
         if h > 20 and w > 20:
-            self.image_resized = self.image.resize_image_ratio(h-20, w-20)
+            self.image_display.set_target_size(h-20, w-20)
         else:
-            self.image_resized = self.image.resize_image_ratio(h, w)
+            self.image_display.set_target_size(h, w)
         self.display_image()
 
     def display_image(self) -> None:
         """
         Display the image.
 
-        """    
-        height, width = self.image_resized.getSize()
-        channels = self.image_resized.getChannels() 
-        
-        # Convert OpenCV image to QImage
-        bytes_per_line = channels * width
-        if channels == 1:
-            format_image = QImage.Format.Format_Grayscale8
-        else:
-            format_image = QImage.Format.Format_BGR888
-        q_image = QImage(self.image_resized.getPixels(), width, height, bytes_per_line, format_image)
-        
-        # Display QImage in QLabel
-        self.image_display.setPixmap(QPixmap.fromImage(q_image))
+        """
+        # The nearest level of the pyramid is scaled when painted.
+        level = self.image.get_level_for_size(self.image_display.target_height,
+                                              self.image_display.target_width)
+        pixels = self.image.get_pyramid_level(level)
+        # The QImage is built on the array of pixels, without copy. It is built
+        # again for the same array : its pixels may have been modified in place.
+        self.image_display.set_array(pixels)
 
-    def display_from_webcam(self) -> None:
+    def display_from_webcam(self, pixels: np.ndarray) -> None:
         """
-        Display image from a live acquisition (webcam).
+        Display image from a live acquisition (webcam or video file).
 
-        """  
-        pass
+        A new image is created for each frame : the previous one can still
+        be used by a process running in another thread.
+
+        :param pixels: Array of pixels of the frame.
+        :type pixels: np.ndarray
+
+        """
+        frame = Image()
+        frame.create(pixels)
+        self.set_image_from_image(frame)
 
     def display_from_sensor(self) -> None:
         """
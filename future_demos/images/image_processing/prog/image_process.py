@@ -2,6 +2,8 @@ import numpy as np
 import cv2 as cv
 import os
 from image import Image
+from kernel_filters import filter_kernel, resize_kernel
+from lut import PointwiseChain
 
 # Square-shaped kernel - size 3
 square3 = np.array((
@@ -43,6 +45,10 @@ sobelY = np.array((
     [0, 0, 0],
     [1, 2, 1]), dtype="int")
 
+# Disk-shaped kernel (normalized) - size 31 : defocus blur, not separable
+disk31 = cv.getStructuringElement(cv.MORPH_ELLIPSE, (31, 31)).astype(np.float32)
+disk31 /= disk31.sum()
+
 kernels = {
     "laplacian": laplacian,
     "sobel_x": sobelX,
@@ -50,10 +56,58 @@ kernels = {
     "square3": square3,
     "square5": square5,
     "cross3": cross3,
-    "cross5": cross5
+    "cross5": cross5,
+    "disk31": disk31
 }
 
 
+def get_output_image(dst, shape: tuple, dtype: np.dtype,
+                     bit_depth: int = None) -> tuple[Image, np.ndarray]:
+    """
+    Return the resulting image of a process and the array where to write it.
+
+    :param dst: Destination of the result. None for a new image. The array of
+        an Image is reused if it has the right shape and type.
+    :type dst: Image | np.ndarray
+    :param shape: Shape of the result.
+    :type shape: tuple
+    :param dtype: Type of the pixels of the result.
+    :type dtype: np.dtype
+    :param bit_depth: Number of significant bits of the result (bit depth of the
+        processed image). Default None, see Image.create.
+    :type bit_depth: int
+
+    :return: Resulting image and its array of pixels.
+    :rtype: tuple[Image, np.ndarray]
+
+    """
+    if isinstance(dst, Image):
+        pixels = dst.getPixels()
+        # Read-only arrays are shared (history of the processes) : copy on write
+        if pixels.shape != shape or pixels.dtype != dtype or not pixels.flags.writeable:
+            pixels = np.empty(shape, dtype=dtype)
+        result = dst
+    elif dst is None:
+        pixels = np.empty(shape, dtype=dtype)
+        result = Image()
+    else:
+        if dst.shape != shape or dst.dtype != dtype:
+            raise ValueError(f'destination array {dst.shape} {dst.dtype} is not {shape} {dtype}')
+        pixels = dst
+        result = Image()
+    # The pixels are modified : the pyramid of the image is cleared
+    result.create(pixels, bit_depth)
+    return result, pixels
+
+
+def _to_gray(pixels: np.ndarray, out: np.ndarray) -> np.ndarray:
+    """Return the grayscale pixels, converted in out if the image is in color."""
+    if pixels.ndim == 2:
+        return pixels
+    cv.cvtColor(pixels, cv.COLOR_BGR2GRAY, dst=out)
+    return out
+
+
 class ImageProcess:
     """
     Class to represent a process for image.
@@ -64,31 +118,78 @@ class ImageProcess:
     """
 
     @classmethod
-    def binarize(self, image: Image, params_dict: dict) -> Image:
+    def binarize(self, image: Image, params_dict: dict, dst=None) -> Image:
         """
         Binarize an image.
         
         :param image: Image to process.
         :type image: Image
-        :param params_dict: Dictionary of parameters. 'threshold' entry is required.
+        :param params_dict: Dictionary of parameters. 'threshold' entry is required,
+            between 0 and 255 (scaled to the bit depth of the image).
         :type params_dict: dict
+        :param dst: Image or array where to write the result. Default None, a new image.
+            The input image can be given to process it in place.
+        :type dst: Image | np.ndarray
         
-        :return: New image.
+        :return: Processed image (dst if given as an Image).
         :rtype: Image
         
         """
         try:
-            threshold = int(params_dict["threshold"])
-            result = Image()
-            im_gray = cv.cvtColor(image.getPixels(), cv.COLOR_BGR2GRAY)
-            ret, temp_array = cv.threshold(im_gray, threshold, 255, cv.THRESH_BINARY)
-            result.create(temp_array)
+            max_value = image.get_max_value()
+            threshold = int(params_dict["threshold"]) * max_value / 255
+            pixels = image.getPixels()
+            result, out = get_output_image(dst, pixels.shape[:2], pixels.dtype, image.bit_depth)
+            if pixels.dtype == np.uint8:
+                # Lookup table : same result as cv.threshold (integer values above the threshold)
+                chain = PointwiseChain().threshold(int(threshold), int(max_value))
+                chain.apply(_to_gray(pixels, out), dst=out)
+            else:
+                cv.threshold(_to_gray(pixels, out), threshold, max_value, cv.THRESH_BINARY, dst=out)
             return result
         except Exception as e:
             print("Exception - Image.binarize: " + str(e) + "")
 
     @classmethod
-    def blur(self, image: Image, params_dict: dict) -> Image:
+    def adjust(self, image: Image, params_dict: dict, dst=None) -> Image:
+        """
+        Change the contrast and the brightness of an image.
+
+        8 bits images are processed in one pass, with a lookup table composing
+        the two operations (:class:`PointwiseChain` of *lut* file).
+
+        :param image: Image to process.
+        :type image: Image
+        :param params_dict: Dictionary of parameters. 'contrast' entry (in percent,
+            100 for no change) and 'brightness' entry (in percent, between -100
+            and 100) are required.
+        :type params_dict: dict
+        :param dst: Image or array where to write the result. Default None, a new image.
+            The input image can be given to process it in place.
+        :type dst: Image | np.ndarray
+
+        :return: Processed image (dst if given as an Image).
+        :rtype: Image
+
+        """
+        try:
+            contrast = int(params_dict['contrast']) / 100
+            brightness = int(params_dict['brightness'])
+            pixels = image.getPixels()
+            result, out = get_output_image(dst, pixels.shape, pixels.dtype, image.bit_depth)
+            if pixels.dtype == np.uint8 and image.bit_depth == 8:
+                PointwiseChain().contrast(contrast).brightness(brightness).apply(pixels, dst=out)
+            else:
+                if out is not pixels:
+                    np.copyto(out, pixels)
+                result.change_contrast(contrast, in_place=True)
+                result.change_brightness(brightness, in_place=True)
+            return result
+        except Exception as e:
+            print("Exception - Image.adjust: " + str(e) + "")
+
+    @classmethod
+    def blur(self, image: Image, params_dict: dict, dst=None) -> Image:
         """
         Blur an image. Process a mean filter on the image.
         
@@ -96,40 +197,47 @@ class ImageProcess:
         :type image: Image
         :param params_dict: Dictionary of parameters. 'size' entry is required.
         :type params_dict: dict
+        :param dst: Image or array where to write the result. Default None, a new image.
+            The input image can be given to process it in place.
+        :type dst: Image | np.ndarray
         
-        :return: New image.
+        :return: Processed image (dst if given as an Image).
         :rtype: Image
         
         """
         size = params_dict['size']
-        result = Image()
-        temp_array = cv.blur(image.getPixels(), (size, size));
-        result.create(temp_array)
+        pixels = image.getPixels()
+        result, out = get_output_image(dst, pixels.shape, pixels.dtype, image.bit_depth)
+        cv.blur(pixels, (size, size), dst=out)
         return result
 
     @classmethod
-    def convolve(self, image: Image, params_dict: dict) -> Image:
+    def convolve(self, image: Image, params_dict: dict, dst=None) -> Image:
         """
         Process a convolution on an image with a specific kernel.
         
         :param image: Image to process.
         :type image: Image
-        :param params_dict: Dictionary of parameters. 'kernel' entry is required.
+        :param params_dict: Dictionary of parameters. 'kernel' entry is required,
+            'size' entry resamples the kernel to size x size (same sum of coefficients).
         :type params_dict: dict
+        :param dst: Image or array where to write the result. Default None, a new image.
+            The input image can be given to process it in place.
+        :type dst: Image | np.ndarray
         
-        :return: New image.
+        :return: Processed image (dst if given as an Image).
         :rtype: Image
         
         """
-        result = Image()
-        kernel = params_dict['kernel']
-        im_gray = cv.cvtColor(image.getPixels(), cv.COLOR_BGR2GRAY)
-        temp_array = cv.filter2D(src=im_gray, ddepth=-1, kernel=kernel)
-        result.create(temp_array)
+        kernel = resize_kernel(params_dict['kernel'], params_dict.get('size'))
+        pixels = image.getPixels()
+        result, out = get_output_image(dst, pixels.shape[:2], pixels.dtype, image.bit_depth)
+        # Separable and constant kernels use faster filters
+        filter_kernel(_to_gray(pixels, out), kernel, dst=out)
         return result
 
     @classmethod
-    def erode(self, image: Image, params_dict: dict) -> Image:
+    def erode(self, image: Image, params_dict: dict, dst=None) -> Image:
         """
         Process an erosion on an image with a specific kernel.
         
@@ -137,20 +245,23 @@ class ImageProcess:
         :type image: Image
         :param params_dict: Dictionary of parameters. 'kernel' entry is required.
         :type params_dict: dict
+        :param dst: Image or array where to write the result. Default None, a new image.
+            The input image can be given to process it in place.
+        :type dst: Image | np.ndarray
         
-        :return: New image.
+        :return: Processed image (dst if given as an Image).
         :rtype: Image
         
         """
-        result = Image()
         kernel = params_dict['kernel']
-        im_gray = cv.cvtColor(image.getPixels(), cv.COLOR_BGR2GRAY)
-        temp_array = cv.erode(im_gray, kernel, cv.BORDER_REFLECT)
-        result.create(temp_array)
+        pixels = image.getPixels()
+        result, out = get_output_image(dst, pixels.shape[:2], pixels.dtype, image.bit_depth)
+        cv.erode(_to_gray(pixels, out), kernel, dst=out,
+                 borderType=cv.BORDER_REFLECT)
         return result
 
     @classmethod
-    def dilate(self, image: Image, params_dict: dict) -> Image:
+    def dilate(self, image: Image, params_dict: dict, dst=None) -> Image:
         """
         Process a dilatation on an image with a specific kernel.
         
@@ -158,20 +269,23 @@ class ImageProcess:
         :type image: Image
         :param params_dict: Dictionary of parameters. 'kernel' entry is required.
         :type params_dict: dict
+        :param dst: Image or array where to write the result. Default None, a new image.
+            The input image can be given to process it in place.
+        :type dst: Image | np.ndarray
         
-        :return: New image.
+        :return: Processed image (dst if given as an Image).
         :rtype: Image
         
         """
-        result = Image()
         kernel = params_dict['kernel']
-        im_gray = cv.cvtColor(image.getPixels(), cv.COLOR_BGR2GRAY)
-        temp_array = cv.dilate(im_gray, kernel, cv.BORDER_REFLECT)
-        result.create(temp_array)
+        pixels = image.getPixels()
+        result, out = get_output_image(dst, pixels.shape[:2], pixels.dtype, image.bit_depth)
+        cv.dilate(_to_gray(pixels, out), kernel, dst=out,
+                  borderType=cv.BORDER_REFLECT)
         return result
 
     @classmethod
-    def opening(self, image: Image, params_dict: dict) -> Image:
+    def opening(self, image: Image, params_dict: dict, dst=None) -> Image:
         """
         Process an opening on an image with a specific kernel.
         
@@ -179,20 +293,23 @@ class ImageProcess:
         :type image: Image
         :param params_dict: Dictionary of parameters. 'kernel' entry is required.
         :type params_dict: dict
+        :param dst: Image or array where to write the result. Default None, a new image.
+            The input image can be given to process it in place.
+        :type dst: Image | np.ndarray
 
-        :return: New image.
+        :return: Processed image (dst if given as an Image).
         :rtype: Image
         
         """
-        result = Image()
         kernel = params_dict['kernel']
-        im_gray = cv.cvtColor(image.getPixels(), cv.COLOR_BGR2GRAY)
-        temp_array = cv.morphologyEx(im_gray, cv.MORPH_OPEN, kernel, cv.BORDER_REFLECT)
-        result.create(temp_array)
+        pixels = image.getPixels()
+        result, out = get_output_image(dst, pixels.shape[:2], pixels.dtype, image.bit_depth)
+        cv.morphologyEx(_to_gray(pixels, out), cv.MORPH_OPEN, kernel, dst=out,
+                        borderType=cv.BORDER_REFLECT)
         return result
 
     @classmethod
-    def closing(self, image: Image, params_dict: dict) -> Image:
+    def closing(self, image: Image, params_dict: dict, dst=None) -> Image:
         """
         Process an opening on an image with a specific kernel.
         
@@ -200,16 +317,19 @@ class ImageProcess:
         :type image: Image
         :param params_dict: Dictionary of parameters. 'kernel' entry is required.
         :type params_dict: dict
+        :param dst: Image or array where to write the result. Default None, a new image.
+            The input image can be given to process it in place.
+        :type dst: Image | np.ndarray
                 
-        :return: New image.
+        :return: Processed image (dst if given as an Image).
         :rtype: Image
         
         """
-        result = Image()
         kernel = params_dict['kernel']
-        im_gray = cv.cvtColor(image.getPixels(), cv.COLOR_BGR2GRAY)
-        temp_array = cv.morphologyEx(im_gray, cv.MORPH_CLOSE, kernel, cv.BORDER_REFLECT)
-        result.create(temp_array)
+        pixels = image.getPixels()
+        result, out = get_output_image(dst, pixels.shape[:2], pixels.dtype, image.bit_depth)
+        cv.morphologyEx(_to_gray(pixels, out), cv.MORPH_CLOSE, kernel, dst=out,
+                        borderType=cv.BORDER_REFLECT)
         return result
 
     # Main function
@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+"""*image_stats* file.
+
+*image_stats* file that contains :
+
+    * :class::ImageStatistics
+
+Histogram and statistics (mean, standard deviation, minimum, maximum,
+percentiles) of an array of pixels, with a fast method for each type :
+
+    * 8 bits images use cv.calcHist, 16 bits images use np.bincount
+      (histogram of supoptools.images.histogram),
+    * other types use np.histogram (256 bins), cv.meanStdDev and cv.minMaxLoc.
+
+For 8 and 16 bits images, all the statistics are computed from the
+histogram, which can be updated when only a region of the image changed.
+
+.. note:: LEnsE - Institut d'Optique - version 0.1
+
+.. moduleauthor:: Julien VILLEMEJANE <julien.villemejane@institutoptique.fr>
+"""
+
+import numpy as np
+import cv2 as cv
+from supoptools.images.histogram import as_mask, get_channels, histogram
+
+# Number of bins of the histogram for non-integer types
+float_bins = 256
+
+
+class ImageStatistics:
+    """
+    Class to compute the statistics of an array of pixels.
+
+    Values are given by channel : a float for a grayscale image, an array
+    (one value per channel) for a color image.
+
+    :param count: Number of pixels (in the region of interest).
+    :type count: int
+    :param channels: Number of channels.
+    :type channels: int
+
+    """
+
+    def __init__(self, pixels: np.ndarray, mask: np.ndarray = None) -> None:
+        """
+        Initialize the ImageStatistics object.
+
+        :param pixels: Array of pixels (gray or color).
+        :type pixels: np.ndarray
+        :param mask: Region of interest, nonzero values are used. Default None, all the pixels.
+        :type mask: np.ndarray
+
+        """
+        self.dtype = pixels.dtype
+        self.channels = 1 if pixels.ndim == 2 else pixels.shape[2]
+        mask = as_mask(mask)
+        self._hist = None  # Histogram, one bin per value (8 and 16 bits)
+        self._float_stats = None  # Statistics of the other types
+        if self.is_integer():
+            self._hist = histogram(pixels, mask)
+            self.count = int(self._hist[0].sum())
+        else:
+            self._compute_float(pixels, mask)
+
+    def is_integer(self) -> bool:
+        """
+        Return True if the statistics are computed from a histogram (8 and 16 bits).
+
+        """
+        return self.dtype in (np.uint8, np.uint16)
+
+    def _compute_float(self, pixels: np.ndarray, mask: np.ndarray) -> None:
+        """Compute the statistics of a non-integer array."""
+        mean, std = cv.meanStdDev(pixels, mask=mask)
+        stats = {'mean': mean.ravel(), 'std': std.ravel(),
+                 'min': [], 'max': [], 'hist': [], 'edges': []}
+        for channel in get_channels(pixels):
+            min_v, max_v, _, _ = cv.minMaxLoc(channel, mask=mask)
+            values = channel[mask != 0] if mask is not None else channel
+            hist, edges = np.histogram(values, bins=float_bins, range=(min_v, max_v))
+            stats['min'].append(min_v)
+            stats['max'].append(max_v)
+            stats['hist'].append(hist)
+            stats['edges'].append(edges)
+        self.count = int(np.sum(stats['hist'][0]))
+        self._float_stats = stats
+
+    def _per_channel(self, values) -> float | np.ndarray:
+        """Return a float for a single channel, an array otherwise."""
+        values = np.asarray(values, dtype=np.float64)
+        return float(values[0]) if self.channels == 1 else values
+
+    def histogram(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Return the histogram and the edges of its bins.
+
+        :return: Histogram (one row per channel) and edges of the bins
+            (len(histogram) + 1 values, one row per channel for non-integer types).
+        :rtype: tuple[np.ndarray, np.ndarray]
+
+        """
+        if self.is_integer():
+            return self._hist, np.arange(self._hist.shape[1] + 1)
+        return np.array(self._float_stats['hist']), np.array(self._float_stats['edges'])
+
+    def mean(self) -> float | np.ndarray:
+        """
+        Return the mean value of the pixels.
+
+        """
+        if not self.is_integer():
+            return self._per_channel(self._float_stats['mean'])
+        values = np.arange(self._hist.shape[1], dtype=np.float64)
+        return self._per_channel(self._hist @ values / max(self.count, 1))
+
+    def std(self) -> float | np.ndarray:
+        """
+        Return the standard deviation of the pixels.
+
+        """
+        if not self.is_integer():
+            return self._per_channel(self._float_stats['std'])
+        values = np.arange(self._hist.shape[1], dtype=np.float64)
+        count = max(self.count, 1)
+        mean = self._hist @ values / count
+        variance = self._hist @ (values ** 2) / count - mean ** 2
+        return self._per_channel(np.sqrt(np.maximum(variance, 0)))
+
+    def min(self) -> float | np.ndarray:
+        """
+        Return the minimum value of the pixels.
+
+        """
+        if not self.is_integer():
+            return self._per_channel(self._float_stats['min'])
+        return self._per_channel([np.flatnonzero(h)[0] if h.any() else 0 for h in self._hist])
+
+    def max(self) -> float | np.ndarray:
+        """
+        Return the maximum value of the pixels.
+
+        """
+        if not self.is_integer():
+            return self._per_channel(self._float_stats['max'])
+        return self._per_channel([np.flatnonzero(h)[-1] if h.any() else 0 for h in self._hist])
+
+    def percentile(self, q: float) -> float | np.ndarray:
+        """
+        Return a percentile of the pixels, from the cumulative histogram.
+
+        The value is exact for 8 and 16 bits images (nearest rank), and
+        approximated by the edges of the bins for the other types.
+
+        :param q: Percentile, between 0 and 100.
+        :type q: float
+
+        :return: Value under which q percent of the pixels are.
+        :rtype: float | np.ndarray
+
+        """
+        hist, edges = self.histogram()
+        rank = max(1, int(np.ceil(q / 100 * self.count)))
+        values = []
+        for k in range(self.channels):
+            index = min(np.searchsorted(np.cumsum(hist[k]), rank), hist.shape[1] - 1)
+            if self.is_integer():
+                values.append(index)
+            else:
+                values.append(edges[k][index + 1])
+        return self._per_channel(values)
+
+    def update_region(self, old_region: np.ndarray, new_region: np.ndarray,
+                      mask: np.ndarray = None) -> None:
+        """
+        Update the statistics when a region of the image changed (8 and 16 bits only).
+
+        Only the pixels of the region are read : the histogram of the old
+        values is removed, the histogram of the new values is added.
+
+        :param old_region: Previous values of the pixels of the region.
+        :type old_region: np.ndarray
+        :param new_region: New values of the pixels of the region.
+        :type new_region: np.ndarray
+        :param mask: Part of the region in the region of interest. Default None, all the region.
+        :type mask: np.ndarray
+
+        """
+        if not self.is_integer():
+            raise ValueError('ImageStatistics.update_region: 8 or 16 bits image required, '
+                             f'not {self.dtype}')
+        self._hist -= histogram(old_region, mask)
+        self._hist += histogram(new_region, mask)
+
+    def get_stats(self) -> dict:
+        """
+        Return the main statistics of the pixels.
+
+        :return: Dictionary with count, mean, std, min, max and median.
+        :rtype: dict
+
+        """
+        return {
+            'count': self.count,
+            'mean': self.mean(),
+            'std': self.std(),
+            'min': self.min(),
+            'max': self.max(),
+            'median': self.percentile(50),
+        }
+
+
+if __name__ == "__main__":
+    import time
+    from image import Image
+
+    image = Image()
+    image.open("../_data/robot.jpg")
+    gray = cv.cvtColor(cv.resize(image.getPixels(), (3840, 2160)), cv.COLOR_BGR2GRAY)
+
+    t1 = time.perf_counter()
+    np.histogram(gray, bins=np.arange(257))
+    t2 = time.perf_counter()
+    stats = ImageStatistics(gray)
+    t3 = time.perf_counter()
+    print(f'np.histogram {(t2 - t1) * 1000:.1f} ms / ImageStatistics {(t3 - t2) * 1000:.1f} ms')
+    print(stats.get_stats())
+
+    # Only a region changed
+    new_region = 255 - gray[100:300, 200:600]
+    stats.update_region(gray[100:300, 200:600], new_region)
+    gray[100:300, 200:600] = new_region
+    print(stats.get_stats())
+    print(ImageStatistics(gray).get_stats())
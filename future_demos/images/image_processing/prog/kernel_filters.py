@@ -0,0 +1,311 @@
+# -*- coding: utf-8 -*-
+"""*kernel_filters* file.
+
+*kernel_filters* file that contains functions to apply a linear filter
+(convolution kernel) to an image, with the fastest available method :
+
+    * constant kernels (box / mean filters) use cv.boxFilter, with running
+      sums : the cost does not depend on the size of the kernel,
+    * rank-1 kernels (Sobel, Gaussian, square...) are separated in a column
+      and a row kernel and use cv.sepFilter2D,
+    * other kernels use cv.filter2D (direct) or a FFT convolution by blocks
+      (overlap-save), chosen from a cost model depending on the size of the
+      kernel and of the image.
+
+The analysis of a kernel (SVD) is done only once for each kernel, and the
+spectrum of a kernel is computed only once for each size of FFT block.
+
+.. note:: LEnsE - Institut d'Optique - version 0.1
+
+.. moduleauthor:: Julien VILLEMEJANE <julien.villemejane@institutoptique.fr>
+"""
+
+from collections import OrderedDict
+from functools import lru_cache
+
+import numpy as np
+import cv2 as cv
+
+# Relative tolerance on the second singular value for a rank-1 kernel
+separable_tolerance = 1e-6
+# Minimum number of coefficients to use the unnormalized box filter path
+box_min_area = 100
+# Size of the FFT blocks for large images (overlap-save)
+fft_block_size = 512
+# Relative costs per pixel of each method (cost model, measured on 8 bits images)
+cost_spatial = 1.0  # per coefficient of the kernel
+cost_separable = 2.0  # per coefficient of the row and column kernels
+cost_fft = 7.0  # per log2(size of the block), for a block of the size of the output
+max_spectra = 32  # Number of kernel spectra kept in cache
+
+_cv_depths = {
+    np.dtype(np.uint8): cv.CV_8U,
+    np.dtype(np.uint16): cv.CV_16U,
+    np.dtype(np.int16): cv.CV_16S,
+    np.dtype(np.float32): cv.CV_32F,
+    np.dtype(np.float64): cv.CV_64F,
+}
+
+
+def kernel_key(kernel: np.ndarray) -> tuple:
+    """
+    Return a hashable key of a kernel (shape, type and values).
+
+    :param kernel: Kernel of the filter.
+    :type kernel: np.ndarray
+
+    :return: Key of the kernel.
+    :rtype: tuple
+
+    """
+    kernel = np.ascontiguousarray(kernel)
+    return kernel.shape, kernel.dtype.str, kernel.tobytes()
+
+
+@lru_cache(maxsize=256)
+def _analyse_kernel(shape: tuple, dtype_str: str, data: bytes) -> tuple:
+    """Return the type of a kernel : ('box', value), ('separable', column, row) or ('general',)."""
+    kernel = np.frombuffer(data, dtype=dtype_str).reshape(shape).astype(np.float64)
+    if kernel.ndim != 2 or kernel.size == 0:
+        return ('general',)
+    first = kernel.flat[0]
+    if np.all(kernel == first):
+        return ('box', float(first))
+    u, s, vt = np.linalg.svd(kernel)
+    if s[0] > 0 and (len(s) < 2 or s[1] <= separable_tolerance * s[0]):
+        column = u[:, 0] * np.sqrt(s[0])
+        row = vt[0, :] * np.sqrt(s[0])
+        column.setflags(write=False)
+        row.setflags(write=False)
+        return ('separable', column, row)
+    return ('general',)
+
+
+def analyse_kernel(kernel: np.ndarray) -> tuple:
+    """
+    Return the type of a kernel. The result is cached for each kernel.
+
+    :param kernel: Kernel of the filter.
+    :type kernel: np.ndarray
+
+    :return: ('box', value) for a constant kernel, ('separable', column, row)
+        for a rank-1 kernel (kernel = column x row), ('general',) otherwise.
+    :rtype: tuple
+
+    """
+    return _analyse_kernel(*kernel_key(kernel))
+
+
+@lru_cache(maxsize=64)
+def _resize_kernel(shape: tuple, dtype_str: str, data: bytes, size: int) -> np.ndarray:
+    """Return a kernel resampled to size x size, with the same sum of coefficients."""
+    kernel = np.frombuffer(data, dtype=dtype_str).reshape(shape).astype(np.float32)
+    interpolation = cv.INTER_AREA if size < max(shape[:2]) else cv.INTER_LINEAR
+    resized = cv.resize(kernel, (size, size), interpolation=interpolation)
+    total, resized_total = kernel.sum(), resized.sum()
+    if total != 0 and resized_total != 0:
+        resized *= total / resized_total
+    resized.setflags(write=False)
+    return resized
+
+
+def resize_kernel(kernel: np.ndarray, size: int = None) -> np.ndarray:
+    """
+    Return a kernel of size x size coefficients (size option of a kernel).
+
+    The kernel is resampled, with the same sum of coefficients (a normalized
+    kernel stays normalized). The result is cached for each kernel and size.
+
+    :param kernel: Kernel of the filter.
+    :type kernel: np.ndarray
+    :param size: Number of rows and columns of the kernel. Default None, no change.
+    :type size: int
+
+    :return: Kernel of the required size (read-only if resampled).
+    :rtype: np.ndarray
+
+    """
+    if size is None or kernel.shape[:2] == (size, size):
+        return kernel
+    return _resize_kernel(*kernel_key(kernel), int(size))
+
+
+def _fft_block_shape(shape: tuple, kernel_shape: tuple) -> tuple[int, int]:
+    """Return the size of the FFT blocks, for an image and a kernel."""
+    block_shape = []
+    for n, k in zip(shape[:2], kernel_shape[:2]):
+        size = n + k - 1
+        if size > fft_block_size:
+            size = max(fft_block_size, 4 * (k - 1))
+        block_shape.append(cv.getOptimalDFTSize(size))
+    return block_shape[0], block_shape[1]
+
+
+def estimate_costs(shape: tuple, kernel: np.ndarray) -> dict:
+    """
+    Return the estimated costs of each method to filter an image by a kernel.
+
+    Costs are relative, per pixel of the image.
+
+    :param shape: Shape of the image.
+    :type shape: tuple
+    :param kernel: Kernel of the filter.
+    :type kernel: np.ndarray
+
+    :return: Costs of the methods 'spatial', 'separable' (if possible) and 'fft'.
+    :rtype: dict
+
+    """
+    k_height, k_width = kernel.shape[:2]
+    costs = {'spatial': cost_spatial * k_height * k_width}
+    if analyse_kernel(kernel)[0] != 'general':
+        costs['separable'] = cost_separable * (k_height + k_width)
+    b_height, b_width = _fft_block_shape(shape, kernel.shape)
+    out_height = min(shape[0], b_height - k_height + 1)
+    out_width = min(shape[1], b_width - k_width + 1)
+    ratio = (b_height * b_width) / (out_height * out_width)
+    costs['fft'] = cost_fft * ratio * np.log2(b_height * b_width)
+    return costs
+
+
+class _SpectrumCache:
+    """Spectra of the kernels (flipped and zero-padded), by kernel and block size."""
+
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        self._spectra = OrderedDict()
+
+    def get(self, kernel: np.ndarray, block_shape: tuple) -> np.ndarray:
+        key = (kernel_key(kernel), block_shape)
+        spectrum = self._spectra.get(key)
+        if spectrum is not None:
+            self._spectra.move_to_end(key)
+            return spectrum
+        k_height, k_width = kernel.shape[:2]
+        padded = np.zeros(block_shape, dtype=np.float32)
+        # cv.filter2D is a correlation : the kernel is flipped for the convolution
+        padded[:k_height, :k_width] = kernel[::-1, ::-1]
+        spectrum = cv.dft(padded)
+        self._spectra[key] = spectrum
+        if len(self._spectra) > self.max_size:
+            self._spectra.popitem(last=False)
+        return spectrum
+
+
+_spectrum_cache = _SpectrumCache(max_spectra)
+
+
+def fft_filter(src: np.ndarray, kernel: np.ndarray, dst: np.ndarray = None) -> np.ndarray:
+    """
+    Apply a linear filter to an array with a FFT, as cv.filter2D(src, -1, kernel).
+
+    The image is processed by blocks (overlap-save), the spectrum of the
+    kernel is computed once for each block size.
+
+    :param src: Array to filter.
+    :type src: np.ndarray
+    :param kernel: Kernel of the filter.
+    :type kernel: np.ndarray
+    :param dst: Array where to write the result (same size and type as src). Default None.
+    :type dst: np.ndarray
+
+    :return: Filtered array.
+    :rtype: np.ndarray
+
+    """
+    if dst is None:
+        dst = np.empty_like(src)
+    if src.ndim > 2:
+        for channel in range(src.shape[2]):
+            dst[..., channel] = fft_filter(np.ascontiguousarray(src[..., channel]), kernel)
+        return dst
+    height, width = src.shape
+    k_height, k_width = kernel.shape[:2]
+    anchor_y, anchor_x = k_height // 2, k_width // 2
+    # Same border as cv.filter2D
+    padded = cv.copyMakeBorder(src, anchor_y, k_height - 1 - anchor_y,
+                               anchor_x, k_width - 1 - anchor_x, cv.BORDER_REFLECT_101)
+    padded = padded.astype(np.float32)
+    block_shape = _fft_block_shape(src.shape, kernel.shape)
+    spectrum = _spectrum_cache.get(kernel, block_shape)
+    tile_height = block_shape[0] - k_height + 1
+    tile_width = block_shape[1] - k_width + 1
+    block = np.zeros(block_shape, dtype=np.float32)
+    result = np.empty((height, width), dtype=np.float32)
+    for y in range(0, height, tile_height):
+        t_height = min(tile_height, height - y)
+        for x in range(0, width, tile_width):
+            t_width = min(tile_width, width - x)
+            window = padded[y:y + t_height + k_height - 1, x:x + t_width + k_width - 1]
+            block.fill(0)
+            block[:window.shape[0], :window.shape[1]] = window
+            product = cv.mulSpectrums(cv.dft(block), spectrum, 0)
+            filtered = cv.idft(product, flags=cv.DFT_SCALE | cv.DFT_REAL_OUTPUT)
+            result[y:y + t_height, x:x + t_width] = \
+                filtered[k_height - 1:k_height - 1 + t_height, k_width - 1:k_width - 1 + t_width]
+    # Rounding and saturation, as cv.filter2D
+    depth = _cv_depths.get(src.dtype, cv.CV_32F)
+    return cv.multiply(result, 1.0, dst=dst, dtype=depth)
+
+
+def filter_kernel(src: np.ndarray, kernel: np.ndarray, dst: np.ndarray = None) -> np.ndarray:
+    """
+    Apply a linear filter to an array, as cv.filter2D(src, -1, kernel).
+
+    :param src: Array to filter.
+    :type src: np.ndarray
+    :param kernel: Kernel of the filter.
+    :type kernel: np.ndarray
+    :param dst: Array where to write the result (same size and type as src). Default None.
+    :type dst: np.ndarray
+
+    :return: Filtered array.
+    :rtype: np.ndarray
+
+    """
+    kernel_type = analyse_kernel(kernel)
+    k_height, k_width = kernel.shape[:2]
+    area = k_height * k_width
+    if kernel_type[0] == 'box':
+        value = kernel_type[1]
+        if np.isclose(value * area, 1.0):
+            # Mean filter
+            return cv.boxFilter(src, -1, (k_width, k_height), dst=dst)
+        depth = _cv_depths.get(src.dtype)
+        if area >= box_min_area and depth is not None:
+            sums = cv.boxFilter(src, cv.CV_32F, (k_width, k_height), normalize=False)
+            return cv.multiply(sums, 1.0, dst=dst, scale=value, dtype=depth)
+        kernel_type = ('separable',
+                       np.full(k_height, np.sqrt(abs(value))),
+                       np.full(k_width, np.sign(value) * np.sqrt(abs(value))))
+    costs = estimate_costs(src.shape, kernel)
+    method = min(costs, key=costs.get)
+    if method == 'separable':
+        _, column, row = kernel_type
+        return cv.sepFilter2D(src, -1, row, column, dst=dst)
+    if method == 'fft':
+        return fft_filter(src, kernel, dst=dst)
+    return cv.filter2D(src, -1, kernel, dst=dst)
+
+
+if __name__ == "__main__":
+    import time
+    from image import Image
+    from image_process import kernels
+
+    image = Image()
+    image.open("../_data/robot.jpg")
+    im_gray = cv.cvtColor(image.getPixels(), cv.COLOR_BGR2GRAY)
+    im_gray = cv.resize(im_gray, (3840, 2160))
+
+    gaussian = cv.getGaussianKernel(15, 3) @ cv.getGaussianKernel(15, 3).T
+    test_kernels = dict(kernels, gaussian15=gaussian, box21=np.ones((21, 21)))
+    for name, kernel in test_kernels.items():
+        t1 = time.perf_counter()
+        reference = cv.filter2D(im_gray, -1, kernel)
+        t2 = time.perf_counter()
+        result = filter_kernel(im_gray, kernel)
+        t3 = time.perf_counter()
+        error = np.max(np.abs(result.astype(int) - reference.astype(int)))
+        print(f'{name:>10} / {analyse_kernel(kernel)[0]:>10} / filter2D {(t2 - t1) * 1000:6.1f} ms'
+              f' / fast {(t3 - t2) * 1000:6.1f} ms / max error {error}')
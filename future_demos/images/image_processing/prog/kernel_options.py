@@ -9,7 +9,7 @@ a window to set the options of a kernel.
 .. moduleauthor:: Julien VILLEMEJANE <julien.villemejane@institutoptique.fr>
 """
 
-from process_list import *
+from process_registry import get_process
 
 from PyQt6.QtWidgets import (
     QWidget, QLabel,
@@ -48,27 +48,20 @@ class KernelOptions(QWidget):
         self.elem = {}
         try:
             # Create all the subitem from list of params
-            all_options = get_options_ker(name)
-            print(f'ALL options : {all_options}')
-            for id, option in enumerate(all_options):
-                if option == 'ker':
-                    print('Kernel')
-                    # TO DO LATER !
-                else:
-                    kernel_options = get_options_ker_param(name, option)
-                    print(f'Option Type = {kernel_options}')
-
-                    if kernel_options[0] == 'odd':  # odd number
-                        self.elem[option] = WidgetIncDecStep(option, integer=True,
-                                                             inc=2.0)
-                        min_v = int(kernel_options[1])
-                        max_v = int(kernel_options[2])
-                        self.elem[option].set_limits((min_v, max_v))
-                        inc_v = int(kernel_options[3])
-                        self.elem[option].set_value(inc_v)
-                        self.elem[option].increased.connect(self.elem_updated)
-                        self.elem[option].decreased.connect(self.elem_updated)
-                        self.main_layout.addWidget(self.elem[option])
+            kernel_parameter = get_process(name).get_parameter('kernel')
+            print(f'ALL options : {kernel_parameter.options}')
+            for kernel_option in kernel_parameter.options:
+                option = kernel_option.name
+                print(f'Option Type = {kernel_option}')
+
+                if kernel_option.type == 'odd':  # odd number
+                    self.elem[option] = WidgetIncDecStep(option, integer=True,
+                                                         inc=2.0)
+                    self.elem[option].set_limits((kernel_option.min, kernel_option.max))
+                    self.elem[option].set_value(kernel_option.init)
+                    self.elem[option].increased.connect(self.elem_updated)
+                    self.elem[option].decreased.connect(self.elem_updated)
+                    self.main_layout.addWidget(self.elem[option])
                 '''
                 if option_type == 'int':
                     option_vals = get_options_int(name, option)
@@ -99,37 +92,26 @@ class KernelOptions(QWidget):
             print("Exception - update_options: " + str(e) + "")
 
     def set_values(self, dict_values) -> None:
-        """Update displayed values.
+        """Update displayed values of the options of the kernel.
         """
         try:
-            # Create all the subitem from list of params
-            all_options = get_process_options(self.name)
-            for id, option in enumerate(all_options.split(';')):
-                option_type = get_options_type(self.name, option)
-                if option_type == 'int':
+            for option in self.elem:
+                if option in dict_values:
                     self.elem[option].set_value(dict_values[option])
         except Exception as e:
             print("Exception - set_values: " + str(e) + "")
 
     def get_values(self) -> dict:
-        """Get the values of the process parameters.
+        """Get the values of the options of the kernel.
         """
         try:
-            result_dict = {}
-            # Create all the subitem from list of params
-            all_options = get_process_options(self.name)
-            for id, option in enumerate(all_options.split(';')):
-                option_type = get_options_type(self.name, option)
-                if option_type == 'int':
-                    result_dict[option] = self.elem[option].get_real_value()
-            return result_dict
+            return {option: self.elem[option].get_real_value() for option in self.elem}
         except Exception as e:
-            print("Exception - set_values: " + str(e) + "")
+            print("Exception - get_values: " + str(e) + "")
 
     def elem_updated(self, event):
-        """Action performed when a param is updated."""
-        # new_value = self.elem[event].get_real_value()
-        print(f'elem_updated {event} / New Value = {new_value}')
+        """Action performed when an option is updated."""
+        self.changed.emit(self.name + ':' + event)
 
 
 if __name__ == "__main__":
@@ -144,7 +126,7 @@ if __name__ == "__main__":
     main_window.setWindowTitle("Source_Widget test")
     main_window.setGeometry(500, 100, 400, 600)
     central_widget = KernelOptions(name="blur")
-    dict = {"threshold": 100}
+    dict = {"size": 5}
     central_widget.set_values(dict)
     main_window.setCentralWidget(central_widget)
 
@@ -16,9 +16,23 @@ from PyQt6.QtWidgets import (
     QWidget, QLineEdit, QLabel, QPushButton
 )
 
+from collections import OrderedDict
+
 import numpy as np
 from image_display_widget import *
-from process_list import *
+from kernel_filters import resize_kernel
+from kernel_options import KernelOptions
+from process_registry import get_process
+
+
+# Rendered previews of kernels, by kernel and size of the cells (read-only arrays)
+_preview_cache = OrderedDict()
+preview_cache_size = 32
+# Maximum size of a preview, in pixels (cells are smaller for large kernels)
+max_preview_size = 400
+# Width and gray level of the border around the preview
+preview_border = 10
+preview_border_value = 200
 
 
 def expand_array(initial_array: np.ndarray, n_size: int) -> np.ndarray:
@@ -32,18 +46,7 @@ def expand_array(initial_array: np.ndarray, n_size: int) -> np.ndarray:
     Returns:
     numpy.ndarray: The expanded array.
     """
-    # Determine the size of the expanded array
-    expanded_size = n_size * initial_array.shape[0]
-
-    # Create an expanded array filled with zeros
-    expanded_array = np.zeros((expanded_size, expanded_size), dtype=initial_array.dtype)
-
-    # Iterate over the initial array and deploy each value on a square of N cells
-    for i in range(initial_array.shape[0]):
-        for j in range(initial_array.shape[1]):
-            value = initial_array[i, j]
-            expanded_array[i * n_size:(i + 1) * n_size, j * n_size:(j + 1) * n_size] = value
-    return expanded_array
+    return np.repeat(np.repeat(initial_array, n_size, axis=0), n_size, axis=1)
 
 
 def add_border(array, n_cells, value=0):
@@ -58,15 +61,63 @@ def add_border(array, n_cells, value=0):
     Returns:
     numpy.ndarray: The array with the border added.
     """
-    height, width = array.shape
+    return np.pad(array, n_cells, mode='constant', constant_values=value)
 
-    # Create a larger array to accommodate the border
-    bordered_array = np.full((height + 2 * n_cells, width + 2 * n_cells), value, dtype=array.dtype)
 
-    # Copy the original array into the center of the bordered array
-    bordered_array[n_cells:n_cells + height, n_cells:n_cells + width] = array
+def gray_levels(values, min_ker: float, max_ker: float):
+    """
+    Return the gray levels (0 to 255) of coefficients of a kernel.
 
-    return bordered_array
+    :param values: Coefficients.
+    :type values: np.ndarray | float
+    :param min_ker: Minimum coefficient of the kernel (black).
+    :type min_ker: float
+    :param max_ker: Maximum coefficient of the kernel (white).
+    :type max_ker: float
+
+    :return: Gray levels.
+    :rtype: np.ndarray | float
+
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if max_ker == min_ker:
+        # Constant kernel : white, or black if all the coefficients are 0
+        return np.full(values.shape, 255.0 if max_ker != 0 else 0.0)
+    return np.rint(255 * (values - min_ker) / (max_ker - min_ker))
+
+
+def render_kernel(kernel: np.ndarray, cell_size: int) -> np.ndarray:
+    """
+    Return the preview of a kernel : a square of cell_size pixels for each
+    coefficient, in a border. Previews are cached.
+
+    :param kernel: Kernel to display.
+    :type kernel: np.ndarray
+    :param cell_size: Size of the square of each coefficient, in pixels.
+    :type cell_size: int
+
+    :return: Preview, 8 bits, read-only.
+    :rtype: np.ndarray
+
+    """
+    kernel = np.asarray(kernel)
+    key = (kernel.tobytes(), kernel.shape, kernel.dtype.str, cell_size)
+    preview = _preview_cache.get(key)
+    if preview is not None:
+        _preview_cache.move_to_end(key)
+        return preview
+    height, width = kernel.shape
+    levels = gray_levels(kernel, kernel.min(), kernel.max()).astype(np.uint8)
+    preview = np.full((height * cell_size + 2 * preview_border, width * cell_size + 2 * preview_border),
+                      preview_border_value, dtype=np.uint8)
+    # Each coefficient is broadcast on its square, without intermediate array
+    cells = preview[preview_border:-preview_border, preview_border:-preview_border]
+    cells.reshape(height, cell_size, width, cell_size)[...] = levels[:, None, :, None]
+    preview.setflags(write=False)
+    _preview_cache[key] = preview
+    if len(_preview_cache) > preview_cache_size:
+        _preview_cache.popitem(last=False)
+    return preview
 
 
 class KernelWidget(QWidget):
@@ -119,21 +170,15 @@ class KernelWidget(QWidget):
 
         self.setLayout(self.main_layout)
 
+    def get_cell_size(self) -> int:
+        """Return the size of the square of each coefficient, limited for large kernels."""
+        return max(1, min(self.display_size, max_preview_size // max(self.kernel.shape)))
+
     def update_display(self):
         """Update the displayed kernel."""
         try:
-            max_ker = np.max(self.kernel)
-            min_ker = np.min(self.kernel)
-            if max_ker == min_ker:
-                new_array = 255 * (self.kernel / max_ker)
-            else:
-                delta = (max_ker - min_ker) + 1
-                new_array = 255 * (self.kernel - min_ker / delta)
-            new_disp_array = expand_array(new_array, self.display_size)
-            new_disp_array = np.array(new_disp_array, dtype=np.uint8)
-            self.kernel_display = new_disp_array
-            display_with_border = add_border(new_disp_array, 10, 200)
-            self.kernel_display_widget.set_image_from_array(display_with_border)
+            self.kernel_display = render_kernel(self.kernel, self.get_cell_size())
+            self.kernel_display_widget.set_image_from_array(self.kernel_display)
         except Exception as e:
             print("Exception - update_display: " + str(e) + "")
 
@@ -148,17 +193,27 @@ class KernelWidget(QWidget):
         """
         if display_size != 0 and display_size > 0:
             self.display_size = display_size
-        self.kernel = kernel
-        self.size = kernel.shape[0]
+        self.kernel = np.asarray(kernel)
+        self.size = self.kernel.shape[0]
+        self.size_label.setText('Size = ' + str(self.size))
         self.update_display()
 
     def action_modify(self, event):
-        """Action performed when the "Modify" button is clicked."""
-        print(f'Modify {event}')
-        self.params_window = ProcessOptions(self.name_label.text())
+        """Action performed when the "Modify" button is clicked. Open the options of the kernel."""
+        self.params_window = KernelOptions(self.name)
         self.params_window.changed.connect(self.action_changed_params)
         self.params_window.show()
 
+    def action_changed_params(self, event):
+        """Action performed when an option of the kernel (as its size) is changed."""
+        try:
+            size = self.params_window.get_values().get('size')
+            kernel = get_process(self.name).get_parameter('kernel').init
+            self.set_kernel(resize_kernel(kernel, None if size is None else int(size)))
+        except Exception as e:
+            print("Exception - action_changed_params: " + str(e) + "")
+
+
 if __name__ == "__main__":
     import sys
     from PyQt6.QtWidgets import (QApplication, QMainWindow)
@@ -167,18 +222,16 @@ if __name__ == "__main__":
     main_window = QMainWindow()
     main_window.setWindowTitle("KernelWidget test")
     main_window.setGeometry(800, 100, 300, 400)
-    central_widget = KernelWidget("Test Kernel")
+    central_widget = KernelWidget("blur")
     main_window.setCentralWidget(central_widget)
     kernel_init = np.array([[1, 5, 2], [3, 8, 1], [1, 5, 2]])
 
-    # Init from process_list file
-    type_k = "blur"
-    options = get_process_options(type_k)
-    type_param = get_options_type(type_k, options)
-    print(type_param)
+    # Init from the registry of processes
+    parameter = get_process("blur").parameters[0]
+    print(parameter.type)
 
-    if type_param == 'ker':
-        kernel_init = get_options_ker_kernel(type_k, options)
+    if parameter.is_kernel():
+        kernel_init = parameter.init
         print(f'widget : {kernel_init}')
 
     central_widget.set_kernel(kernel_init)
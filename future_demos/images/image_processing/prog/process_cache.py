@@ -0,0 +1,268 @@
+# -*- coding: utf-8 -*-
+"""*process_cache* file.
+
+*process_cache* file that contains :
+
+    * :class::ProcessCache
+
+Least recently used cache of processed images, with a memory budget in bytes.
+Arrays shared with the history of the processes follow it on the disk
+(:meth:`ProcessCache.replace_pixels`), so that writing old steps of the
+history in files really frees the memory.
+
+.. note:: LEnsE - Institut d'Optique - version 0.1
+
+.. moduleauthor:: Julien VILLEMEJANE <julien.villemejane@institutoptique.fr>
+"""
+
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
+from image import Image
+
+
+def hash_array(array: np.ndarray) -> str:
+    """
+    Return a content hash of an array (values, shape and type).
+
+    :param array: Array to hash.
+    :type array: np.ndarray
+
+    :return: Hexadecimal digest of the array.
+    :rtype: str
+
+    """
+    array = np.ascontiguousarray(array)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(str((array.shape, array.dtype.str)).encode())
+    digest.update(memoryview(array).cast('B'))
+    return digest.hexdigest()
+
+
+def _freeze_value(value):
+    """Return a hashable version of a parameter value."""
+    if isinstance(value, np.ndarray):
+        return hash_array(value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze_value(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze_value(v) for v in value)
+    return str(value)
+
+
+class ProcessCache:
+    """
+    Class to store the results of image processes.
+
+    Results are indexed by a key built from the content of the input image,
+    the name of the process and its parameters. When the total size of the
+    stored images exceeds the budget, the least recently used results are
+    removed.
+
+    :param max_bytes: Maximum size of the stored images, in bytes.
+    :type max_bytes: int
+    :param hits: Number of requests found in the cache.
+    :type hits: int
+    :param misses: Number of requests not found in the cache.
+    :type misses: int
+
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024) -> None:
+        """
+        Initialize the ProcessCache object.
+
+        :param max_bytes: Maximum size of the stored images, in bytes. Default 256 MB.
+        :type max_bytes: int
+
+        """
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        # Last hashed array and its hash
+        self._pixels = None
+        self._hash = None
+
+    def get_hash(self, image: Image) -> str:
+        """
+        Return the content hash of an image, to build the keys of its results.
+
+        The hash is computed again only for a new array or a writeable array
+        (a read-only array, as the arrays of the history, is not modified).
+
+        :param image: Input image of the processes.
+        :type image: Image
+
+        :return: Hexadecimal digest of the pixels, from :func:`hash_array`.
+        :rtype: str
+
+        """
+        pixels = image.getPixels()
+        if pixels is not self._pixels or pixels.flags.writeable:
+            self._pixels = pixels
+            self._hash = hash_array(pixels)
+        return self._hash
+
+    @staticmethod
+    def make_key(image_hash: str, process_name: str, params_dict: dict) -> tuple:
+        """
+        Return the key of a processed image.
+
+        :param image_hash: Content hash of the input image, from :meth:`get_hash`.
+        :type image_hash: str
+        :param process_name: Name of the process.
+        :type process_name: str
+        :param params_dict: Dictionary of parameters of the process.
+        :type params_dict: dict
+
+        :return: Key of the result in the cache.
+        :rtype: tuple
+
+        """
+        return image_hash, process_name, _freeze_value(params_dict)
+
+    @staticmethod
+    def make_tile_key(image_hash: str, process_name: str, params_dict: dict, tile: tuple) -> tuple:
+        """
+        Return the key of a processed tile of an image.
+
+        :param image_hash: Content hash of the input image, from :func:`hash_array`.
+        :type image_hash: str
+        :param process_name: Name of the process.
+        :type process_name: str
+        :param params_dict: Dictionary of parameters of the process.
+        :type params_dict: dict
+        :param tile: Region of the tile (y, x, height, width).
+        :type tile: tuple
+
+        :return: Key of the result in the cache.
+        :rtype: tuple
+
+        """
+        return image_hash, process_name, _freeze_value(params_dict), tuple(tile)
+
+    def get(self, key: tuple) -> Image:
+        """
+        Return a stored result, or None if the key is not in the cache.
+
+        :param key: Key of the result, from :meth:`make_key`.
+        :type key: tuple
+
+        :return: Processed image or None.
+        :rtype: Image
+
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key: tuple, image: Image) -> None:
+        """
+        Store a result in the cache.
+
+        Results larger than the budget are not stored.
+
+        :param key: Key of the result, from :meth:`make_key`.
+        :type key: tuple
+        :param image: Processed image.
+        :type image: Image
+
+        """
+        n_bytes = self._memory_size(image.getPixels())
+        if n_bytes > self.max_bytes:
+            return
+        if key in self._entries:
+            self.size_bytes -= self._entries.pop(key)[1]
+        # Entries : [image, size in memory]
+        self._entries[key] = [image, n_bytes]
+        self.size_bytes += n_bytes
+        while self.size_bytes > self.max_bytes:
+            _, removed = self._entries.popitem(last=False)
+            self.size_bytes -= removed[1]
+
+    def replace_pixels(self, pixels: np.ndarray, new_pixels: np.ndarray = None) -> None:
+        """
+        Replace an array of pixels shared with another store, as the history.
+
+        Used when the array is written on the disk by the other store : the
+        results use the memory-mapped array, that is not counted in the
+        budget, and the array in memory can be freed.
+
+        :param pixels: Array of pixels stored in the cache.
+        :type pixels: np.ndarray
+        :param new_pixels: Same values (memory-mapped array). Default None,
+            the results using the array are removed.
+        :type new_pixels: np.ndarray
+
+        """
+        for key, entry in list(self._entries.items()):
+            if entry[0].getPixels() is not pixels:
+                continue
+            self.size_bytes -= entry[1]
+            if new_pixels is None:
+                del self._entries[key]
+                continue
+            image = Image()
+            image.create(new_pixels, entry[0].bit_depth)
+            entry[0] = image
+            entry[1] = self._memory_size(new_pixels)
+            self.size_bytes += entry[1]
+
+    @staticmethod
+    def _memory_size(pixels: np.ndarray) -> int:
+        """Return the size of an array in memory, 0 for a memory-mapped file."""
+        return 0 if isinstance(pixels, np.memmap) else pixels.nbytes
+
+    def clear(self) -> None:
+        """
+        Remove all the stored results. Counters are kept.
+
+        """
+        self._entries.clear()
+        self.size_bytes = 0
+
+    def get_stats(self) -> dict:
+        """
+        Return the statistics of the cache.
+
+        :return: Dictionary with hits, misses, number of entries and size in bytes.
+        :rtype: dict
+
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'entries': len(self._entries),
+            'size_bytes': self.size_bytes
+        }
+
+    def __len__(self) -> int:
+        """
+        Return the number of stored results.
+
+        """
+        return len(self._entries)
+
+
+if __name__ == "__main__":
+    from image_process import ImageProcess
+
+    image = Image()
+    image.open("../_data/robot.jpg")
+    cache = ProcessCache(max_bytes=1024 * 1024)
+
+    for threshold in [40, 80, 120, 80, 40, 120]:
+        params = {'threshold': threshold}
+        key = cache.make_key(cache.get_hash(image), 'binarize', params)
+        result = cache.get(key)
+        if result is None:
+            result = ImageProcess.binarize(image, params)
+            cache.put(key, result)
+    print(cache.get_stats())
@@ -0,0 +1,340 @@
+# -*- coding: utf-8 -*-
+"""*process_history* file.
+
+*process_history* file that contains :
+
+    * :class::HistoryStep
+    * :class::ProcessHistory
+
+Undo / redo history of the processed images. The arrays of pixels are not
+copied : they are set read-only and shared between the steps (and with the
+displayed images and the cache of the processes). Steps with the same content
+share the same buffer. When the memory used by the history exceeds its budget,
+the least recently used buffers are written in temporary .npy files and
+replaced by memory-mapped arrays, in the history and in the shared cache.
+
+.. note:: LEnsE - Institut d'Optique - version 0.1
+
+.. moduleauthor:: Julien VILLEMEJANE <julien.villemejane@institutoptique.fr>
+"""
+
+import os
+import shutil
+import tempfile
+from collections import OrderedDict
+
+import numpy as np
+from image import Image
+from process_cache import ProcessCache, hash_array
+
+
+class HistoryStep:
+    """
+    Class to represent a step of the history.
+
+    :param name: Name of the process ('initial' for the initial image).
+    :type name: str
+    :param params: Parameters of the process.
+    :type params: dict
+    :param key: Content hash of the pixels of the result.
+    :type key: str
+    :param bit_depth: Number of significant bits of the pixels.
+    :type bit_depth: int
+
+    """
+
+    def __init__(self, name: str, params: dict, key: str, bit_depth: int = 8) -> None:
+        """
+        Initialize the HistoryStep object.
+
+        :param name: Name of the process.
+        :type name: str
+        :param params: Parameters of the process.
+        :type params: dict
+        :param key: Content hash of the pixels of the result.
+        :type key: str
+        :param bit_depth: Number of significant bits of the pixels. Default 8.
+        :type bit_depth: int
+
+        """
+        self.name = name
+        self.params = dict(params)
+        self.key = key
+        self.bit_depth = bit_depth
+
+    def __repr__(self) -> str:
+        """Description of the step."""
+        return f'HistoryStep({self.name}, {self.params})'
+
+
+class ProcessHistory:
+    """
+    Class to store the successive results of the processes, to undo and redo them.
+
+    When a result of the same process as the current step is added (new
+    value of a parameter), the current step is amended instead of adding
+    a new step.
+
+    :param max_bytes: Maximum size of the buffers kept in memory, in bytes.
+    :type max_bytes: int
+    :param max_steps: Maximum number of steps, the oldest ones are removed.
+    :type max_steps: int
+    :param size_bytes: Size of the buffers kept in memory, in bytes.
+    :type size_bytes: int
+    :param spilled_bytes: Size of the buffers written on the disk, in bytes.
+    :type spilled_bytes: int
+    :param shared_cache: Cache of the processes storing the same arrays.
+    :type shared_cache: ProcessCache
+
+    """
+
+    def __init__(self, max_bytes: int = 512 * 1024 * 1024, max_steps: int = 100,
+                 spill_dir: str = None, shared_cache: ProcessCache = None) -> None:
+        """
+        Initialize the ProcessHistory object.
+
+        :param max_bytes: Maximum size of the buffers kept in memory, in bytes. Default 512 MB.
+        :type max_bytes: int
+        :param max_steps: Maximum number of steps. Default 100.
+        :type max_steps: int
+        :param spill_dir: Directory of the files of the old buffers. Default None,
+            a temporary directory.
+        :type spill_dir: str
+        :param shared_cache: Cache of the processes storing the same arrays, that
+            follows the buffers written on the disk. Default None.
+        :type shared_cache: ProcessCache
+
+        """
+        self.max_bytes = max_bytes
+        self.max_steps = max_steps
+        self.size_bytes = 0
+        self.spilled_bytes = 0
+        self.amend_same_process = True
+        self._spill_root = spill_dir
+        self.shared_cache = shared_cache
+        self._spill_dir = None
+        self._steps = []
+        self._index = -1  # Index of the current step
+        # Buffers by content hash, least recently used first : [pixels, path, references]
+        self._buffers = OrderedDict()
+
+    def __len__(self) -> int:
+        """
+        Return the number of steps.
+
+        """
+        return len(self._steps)
+
+    def current(self) -> HistoryStep:
+        """
+        Return the current step, or None if the history is empty.
+
+        """
+        if self._index < 0:
+            return None
+        return self._steps[self._index]
+
+    def can_undo(self) -> bool:
+        """
+        Return True if there is a previous step.
+
+        """
+        return self._index > 0
+
+    def can_redo(self) -> bool:
+        """
+        Return True if there is a next step.
+
+        """
+        return self._index < len(self._steps) - 1
+
+    def push(self, name: str, params: dict, image: Image) -> bool:
+        """
+        Add the result of a process, after the current step.
+
+        The next steps (undone steps) are removed. The array of pixels of
+        the image is not copied : it is set read-only, for the caller too.
+        Any further in-place modification of this array (as the dst parameter
+        of a process) creates a new array instead. An array still referenced
+        outside the history and its shared cache (as a displayed image) is not
+        freed when it is written on the disk.
+
+        :param name: Name of the process.
+        :type name: str
+        :param params: Parameters of the process.
+        :type params: dict
+        :param image: Result of the process.
+        :type image: Image
+
+        :return: False if the result is the same as the current step.
+        :rtype: bool
+
+        """
+        pixels = image.getPixels()
+        key = hash_array(pixels)
+        current = self.current()
+        if current is not None and current.key == key:
+            return False
+        self._add_buffer(key, pixels)
+        step = HistoryStep(name, params, key, image.bit_depth)
+        # Redo is not possible anymore
+        while len(self._steps) > self._index + 1:
+            self._release_buffer(self._steps.pop().key)
+        if (current is not None and self.amend_same_process
+                and current.name == name and name != 'initial'):
+            # New parameters of the same process
+            self._release_buffer(current.key)
+            self._steps[self._index] = step
+        else:
+            self._steps.append(step)
+            self._index += 1
+        while len(self._steps) > self.max_steps:
+            self._release_buffer(self._steps.pop(0).key)
+            self._index -= 1
+        self._check_memory()
+        return True
+
+    def undo(self) -> HistoryStep:
+        """
+        Go to the previous step.
+
+        :return: The previous step, or None if there is no previous step.
+        :rtype: HistoryStep
+
+        """
+        if not self.can_undo():
+            return None
+        self._index -= 1
+        return self.current()
+
+    def redo(self) -> HistoryStep:
+        """
+        Go to the next step.
+
+        :return: The next step, or None if there is no next step.
+        :rtype: HistoryStep
+
+        """
+        if not self.can_redo():
+            return None
+        self._index += 1
+        return self.current()
+
+    def get_image(self, step: HistoryStep = None) -> Image:
+        """
+        Return the image of a step (read-only pixels).
+
+        :param step: Step of the history. Default None, the current step.
+        :type step: HistoryStep
+
+        :return: Image of the step, or None if the history is empty.
+        :rtype: Image
+
+        """
+        if step is None:
+            step = self.current()
+            if step is None:
+                return None
+        buffer = self._buffers[step.key]
+        self._buffers.move_to_end(step.key)
+        image = Image()
+        image.create(buffer[0], step.bit_depth)
+        return image
+
+    def clear(self) -> None:
+        """
+        Remove all the steps and the files of the history.
+
+        """
+        self._steps = []
+        self._index = -1
+        for buffer in self._buffers.values():
+            if buffer[1] is not None and self.shared_cache is not None:
+                self.shared_cache.replace_pixels(buffer[0])
+        self._buffers.clear()
+        self.size_bytes = 0
+        self.spilled_bytes = 0
+        if self._spill_dir is not None:
+            shutil.rmtree(self._spill_dir, ignore_errors=True)
+            self._spill_dir = None
+
+    def _add_buffer(self, key: str, pixels: np.ndarray) -> None:
+        """Add a reference to a buffer, stored if it is a new content."""
+        buffer = self._buffers.get(key)
+        if buffer is None:
+            # Shared with the image : any further modification creates a new array
+            pixels.setflags(write=False)
+            self._buffers[key] = [pixels, None, 1]
+            self.size_bytes += pixels.nbytes
+        else:
+            buffer[2] += 1
+            self._buffers.move_to_end(key)
+
+    def _release_buffer(self, key: str) -> None:
+        """Remove a reference to a buffer, deleted when it is not used anymore."""
+        buffer = self._buffers[key]
+        buffer[2] -= 1
+        if buffer[2] > 0:
+            return
+        del self._buffers[key]
+        if buffer[1] is None:
+            self.size_bytes -= buffer[0].nbytes
+        else:
+            self.spilled_bytes -= os.path.getsize(buffer[1])
+            # Memory-mapped file must be closed before removal
+            if self.shared_cache is not None:
+                self.shared_cache.replace_pixels(buffer[0])
+            buffer[0] = None
+            try:
+                os.remove(buffer[1])
+            except OSError as e:
+                print("Exception - ProcessHistory: " + str(e))
+
+    def _check_memory(self) -> None:
+        """Write the least recently used buffers on the disk, until the budget is respected."""
+        current = self.current()
+        for key in list(self._buffers):
+            if self.size_bytes <= self.max_bytes:
+                break
+            buffer = self._buffers[key]
+            if buffer[1] is not None or (current is not None and key == current.key):
+                continue
+            if self._spill_dir is None:
+                self._spill_dir = tempfile.mkdtemp(prefix='process_history_', dir=self._spill_root)
+            path = os.path.join(self._spill_dir, key + '.npy')
+            np.save(path, buffer[0])
+            self.size_bytes -= buffer[0].nbytes
+            self.spilled_bytes += os.path.getsize(path)
+            # Read back as a memory-mapped array (read-only), the cache must
+            # not keep the array in memory either
+            pixels = np.load(path, mmap_mode='r')
+            if self.shared_cache is not None:
+                self.shared_cache.replace_pixels(buffer[0], pixels)
+            buffer[0] = pixels
+            buffer[1] = path
+
+
+if __name__ == "__main__":
+    from image_process import ImageProcess
+
+    image = Image()
+    image.open("../_data/robot.jpg")
+
+    cache = ProcessCache()
+    history = ProcessHistory(max_bytes=2 * image.getPixels().nbytes, shared_cache=cache)
+    history.push('initial', {}, image)
+    for threshold in (40, 80, 120):
+        # Same process : the current step is amended
+        result = ImageProcess.binarize(image, {'threshold': threshold})
+        cache.put(cache.make_key(cache.get_hash(image), 'binarize', {'threshold': threshold}), result)
+        history.push('binarize', {'threshold': threshold}, result)
+    result = ImageProcess.blur(image, {'size': 5})
+    cache.put(cache.make_key(cache.get_hash(image), 'blur', {'size': 5}), result)
+    history.push('blur', {'size': 5}, result)
+    history.push('initial', {}, image)  # Same buffer as the first step
+    print(f'{len(history)} steps / memory {history.size_bytes} bytes / '
+          f'disk {history.spilled_bytes} bytes / cache {cache.size_bytes} bytes')
+    while history.can_undo():
+        step = history.undo()
+        print(step, history.get_image().getPixels().shape)
+    history.clear()
@@ -30,6 +30,7 @@ class ProcessItem(QWidget):
     clicked = pyqtSignal(str)
     checked = pyqtSignal(str)
     changed = pyqtSignal(str)
+    compared = pyqtSignal(str)
 
     def __init__(self, name='') -> None:
         """Default constructor of the class.
@@ -45,6 +46,8 @@ class ProcessItem(QWidget):
         self.check_item.clicked.connect(self.check_options)
         self.params_item = QPushButton('Options')
         self.params_item.clicked.connect(self.click_on_options)
+        self.compare_item = QPushButton('Compare')
+        self.compare_item.clicked.connect(self.click_on_compare)
 
         # Graphical elements of the interface
         self.main_layout = QGridLayout()
@@ -52,6 +55,7 @@ class ProcessItem(QWidget):
         self.main_layout.addWidget(self.check_item, 0, 0)
         self.main_layout.addWidget(self.name_label, 0, 1)
         self.main_layout.addWidget(self.params_item, 0, 2)
+        self.main_layout.addWidget(self.compare_item, 0, 3)
         try:
             self.disable()
         except Exception as e:
@@ -63,8 +67,10 @@ class ProcessItem(QWidget):
         """
         if self.check_item.isChecked():
             self.params_item.setEnabled(True)
+            self.compare_item.setEnabled(True)
         else:
             self.params_item.setEnabled(False)
+            self.compare_item.setEnabled(False)
         self.checked.emit(self.name_label.text())
 
     def click_on_options(self, event) -> None:
@@ -79,6 +85,11 @@ class ProcessItem(QWidget):
         except Exception as e:
             print("Exception - click_on_options: " + str(e) + "")
 
+    def click_on_compare(self, event) -> None:
+        """Action performed when 'Compare' button is clicked.
+        """
+        self.compared.emit(self.name_label.text())
+
     def action_changed_params(self, event):
         """Action performed when an option parameter is changed.
         """
@@ -90,14 +101,17 @@ class ProcessItem(QWidget):
         self.check_item.setEnabled(True)
         if self.check_item.isChecked():
             self.params_item.setEnabled(True)
+            self.compare_item.setEnabled(True)
         else:
             self.params_item.setEnabled(False)
+            self.compare_item.setEnabled(False)
 
     def disable(self):
         """Set disabled the interactive objects.
         """
         self.check_item.setEnabled(False)
         self.params_item.setEnabled(False)
+        self.compare_item.setEnabled(False)
 
 
 if __name__ == "__main__":
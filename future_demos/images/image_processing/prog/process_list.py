@@ -11,7 +11,8 @@
 """
 
 import numpy as np
-from image_process import ImageProcess
+from image_process import ImageProcess, kernels
+from process_registry import get_process, register_from_dict
 
 
 def get_process_options(process_name) -> str:
@@ -19,12 +20,12 @@ def get_process_options(process_name) -> str:
 
     Each parameters are separated by ;
     """
-    return process_list[process_name]['params']
+    return ';'.join(parameter.name for parameter in get_process(process_name).parameters)
 
 
 def get_options_type(process_name, option_name) -> str:
     """Return the type of an option for a process."""
-    return process_list[process_name][option_name].split(':')[0]
+    return get_process(process_name).get_parameter(option_name).type
 
 
 def get_options_int(process_name, option_name) -> tuple[int, int, int]:
@@ -33,31 +34,25 @@ def get_options_int(process_name, option_name) -> tuple[int, int, int]:
     :return: A tuple corresponding to minimum, maximum, init value
     :rtype: tuple[int, int, int]
     """
-    params = process_list[process_name][option_name].split(':')
-    min_v = params[1]
-    max_v = params[2]
-    init_v = params[3]
-    return min_v, max_v, init_v
+    parameter = get_process(process_name).get_parameter(option_name)
+    return parameter.min, parameter.max, parameter.init
 
 
 def get_options_ker_kernel(process_name, option_name) -> np.ndarray:
     """Get the initial kernel if exists."""
-    options_values = process_list[process_name][option_name].split(':')
-    if len(options_values) > 1:
-        kernel_init = process_list[process_name][option_name + '_init']
-        return kernel_init
-    init_size = (3, 3)
-    return np.ones(init_size, dtype=np.uint8)
+    return get_process(process_name).get_parameter(option_name).init
 
 
-def get_options_ker(process_name) -> str:
-    """Get the initial kernel if exists."""
-    options_values = process_list[process_name]['kernel'].split(':')
-    return options_values
-def get_options_ker_param(process_name, option_name) -> str:
-    """Get the initial kernel if exists."""
-    options_values = process_list[process_name]['kernel_'+option_name].split(':')
-    return options_values
+def get_options_ker(process_name) -> list:
+    """Get the list of the parameters of the kernel, as ['ker', 'size']."""
+    parameter = get_process(process_name).get_parameter('kernel')
+    return ['ker'] + [option.name for option in parameter.options]
+
+
+def get_options_ker_param(process_name, option_name) -> list:
+    """Get the description of a parameter of the kernel, as ['odd', 1, 7, 3]."""
+    option = get_process(process_name).get_parameter(option_name)
+    return [option.type, option.min, option.max, option.init]
 
 '''
 "kernel": "ker:size",
@@ -66,6 +61,12 @@ def get_options_ker_param(process_name, option_name) -> str:
 '''
 
 # List of parameters for all the available process
+adjust_params = {
+    "function": ImageProcess.adjust,
+    "params": 'contrast;brightness',
+    "contrast": 'int:0:300:100',
+    "brightness": 'int:-100:100:0'
+}
 binarize_params = {
     "function": ImageProcess.binarize,
     "params": 'threshold',
@@ -76,7 +77,14 @@ blur_params = {
     "params": 'kernel',
     "kernel": "ker:size",
     "kernel_init": np.ones((3, 3)),
-    "kernel_size": 'odd:1:7:3'
+    "kernel_size": 'odd:1:31:3'
+}
+convolve_params = {
+    "function": ImageProcess.convolve,
+    "params": 'kernel',
+    "kernel": "ker:size",
+    "kernel_init": kernels['disk31'],
+    "kernel_size": 'odd:1:63:15'
 }
 dilate_params = {
     "function": ImageProcess.dilate,
@@ -91,18 +99,33 @@ erode_params = {
 
 # List of the available process / filters
 process_list = {
+    "adjust": adjust_params,
     "binarize": binarize_params,
     "blur": blur_params,
+    "convolve": convolve_params,
     "dilate": dilate_params,
     "erode": erode_params
 }
 '''
     "opening": ImageProcess.opening,
-    "closing": ImageProcess.closing,
-    "convolve": ImageProcess.convolve
+    "closing": ImageProcess.closing
 }
 '''
 
+# Relative costs of the processes (per pixel, per element of the kernel)
+process_costs = {
+    "adjust": (1.0, 0.0),
+    "binarize": (1.0, 0.0),
+    "blur": (2.0, 0.0),
+    "convolve": (1.0, 0.1),
+    "dilate": (1.0, 0.5),
+    "erode": (1.0, 0.5)
+}
+
+# The processes are parsed once and registered (see *process_registry*)
+for _name, _process_dict in process_list.items():
+    register_from_dict(_name, _process_dict, *process_costs.get(_name, (1.0, 0.0)))
+
 if __name__ == "__main__":
     type = get_options_type("binarize", "threshold")
     print(f'Type = {type}')
@@ -10,7 +10,7 @@
 .. moduleauthor:: Julien VILLEMEJANE <julien.villemejane@institutoptique.fr>
 """
 from supoptools.pyqt6.widget_slider import WidgetSlider
-from process_list import *
+from process_registry import get_process_names
 from process_item import ProcessItem
 
 from PyQt6.QtWidgets import (
@@ -31,6 +31,7 @@ class ProcessListWidget(QWidget):
     clicked = pyqtSignal(str)
     checked = pyqtSignal(str)
     changed = pyqtSignal(str)
+    compared = pyqtSignal(str)
 
     def __init__(self) -> None:
         """Default constructor of the class.
@@ -44,11 +45,12 @@ class ProcessListWidget(QWidget):
         # Graphical elements of the interface
         self.selected = None
         self.processes_dict = {}
-        for i, (item_name, item_function) in enumerate(process_list.items()):
+        for item_name in get_process_names():
             self.processes_dict[item_name] = ProcessItem(item_name)
             self.processes_dict[item_name].checked.connect(self.check_options_list)
             self.processes_dict[item_name].clicked.connect(self.click_on_options_list)
             self.processes_dict[item_name].changed.connect(self.update_process)
+            self.processes_dict[item_name].compared.connect(self.compare_process)
             self.processes_dict[item_name].enable()
             self.main_layout.addWidget(self.processes_dict[item_name])
 
@@ -76,22 +78,27 @@ class ProcessListWidget(QWidget):
         """
         self.changed.emit(event)
 
+    def compare_process(self, event):
+        """Action performed when a "Compare" button is clicked.
+        """
+        self.compared.emit(event)
+
 
     def uncheck_all(self) -> None:
         """Uncheck all the checkbox.
         """
-        for i, (item_name, item_function) in enumerate(process_list.items()):
+        for item_name in self.processes_dict:
             self.processes_dict[item_name].check_item.setChecked(False)
             self.processes_dict[item_name].enable()
 
     def enable(self):
         """Set enabled the process list."""
-        for i, (item_name, item_function) in enumerate(process_list.items()):
+        for item_name in self.processes_dict:
             self.processes_dict[item_name].enable()
 
     def disable(self):
         """Set disabled the process list."""
-        for i, (item_name, item_function) in enumerate(process_list.items()):
+        for item_name in self.processes_dict:
             self.processes_dict[item_name].disable()
 
 
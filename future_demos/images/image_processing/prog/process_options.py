@@ -10,7 +10,7 @@ a window to set the options of a process.
 """
 
 from supoptools.pyqt6.widget_slider import WidgetSlider
-from process_list import *
+from process_registry import get_process
 
 from PyQt6.QtWidgets import (
     QWidget, QLabel,
@@ -48,24 +48,16 @@ class ProcessOptions(QWidget):
         self.elem = {}
         try:
             # Create all the subitem from list of params
-            all_options = get_process_options(name)
-            for id, option in enumerate(all_options.split(';')):
-                option_type = get_options_type(name, option)
-                print(f'Option Type = {option_type}')
-                if option_type == 'int':
-                    option_vals = get_options_int(name, option)
-                    self.elem[option] = WidgetSlider(name=option, integer=True, signal_name=option)
-                    self.elem[option].set_min_max_slider(float(option_vals[0]), float(option_vals[1]))
-                    self.elem[option].slider_changed_signal.connect(self.update_options)
-                    self.main_layout.addWidget(self.elem[option])
-                elif option_type == 'ker':
-                    print('KERNEL')
-                    self.elem[option] = QLabel(option)
-                    self.main_layout.addWidget(self.elem[option])
-                elif option_type == 'odd':
-                    print('ODD')
+            for parameter in get_process(name).parameters:
+                option = parameter.name
+                if parameter.is_kernel():
                     self.elem[option] = QLabel(option)
                     self.main_layout.addWidget(self.elem[option])
+                    # Options of the kernel, as its size
+                    for kernel_option in parameter.options:
+                        self.add_slider(kernel_option)
+                else:
+                    self.add_slider(parameter)
 
         except Exception as e:
             print("Exception - params_init: " + str(e) + "")
@@ -73,6 +65,18 @@ class ProcessOptions(QWidget):
         self.setFixedSize(300, 400)
         self.setLayout(self.main_layout)
 
+    def add_slider(self, parameter) -> None:
+        """Add a slider for an integer (or odd) parameter.
+
+        :param parameter: Parameter of the process, or of its kernel.
+        :type parameter: ProcessParameter
+        """
+        option = parameter.name
+        self.elem[option] = WidgetSlider(name=option, integer=True, signal_name=option)
+        self.elem[option].set_min_max_slider(float(parameter.min), float(parameter.max))
+        self.elem[option].slider_changed_signal.connect(self.update_options)
+        self.main_layout.addWidget(self.elem[option])
+
     def update_options(self, event):
         try:
             param_event = event.split(':')[-1]
@@ -85,11 +89,8 @@ class ProcessOptions(QWidget):
         """
         try:
             # Create all the subitem from list of params
-            all_options = get_process_options(self.name)
-            for id, option in enumerate(all_options.split(';')):
-                option_type = get_options_type(self.name, option)
-                if option_type == 'int':
-                    self.elem[option].set_value(dict_values[option])
+            for parameter in get_process(self.name).get_value_parameters():
+                self.elem[parameter.name].set_value(dict_values[parameter.name])
         except Exception as e:
             print("Exception - set_values: " + str(e) + "")
 
@@ -99,11 +100,12 @@ class ProcessOptions(QWidget):
         try:
             result_dict = {}
             # Create all the subitem from list of params
-            all_options = get_process_options(self.name)
-            for id, option in enumerate(all_options.split(';')):
-                option_type = get_options_type(self.name, option)
-                if option_type == 'int':
-                    result_dict[option] = self.elem[option].get_real_value()
+            for parameter in get_process(self.name).get_value_parameters():
+                value = self.elem[parameter.name].get_real_value()
+                if parameter.type == 'odd' and value % 2 == 0:
+                    # Nearest odd value in the range
+                    value = value + 1 if value < parameter.max else value - 1
+                result_dict[parameter.name] = value
             return result_dict
         except Exception as e:
             print("Exception - set_values: " + str(e) + "")
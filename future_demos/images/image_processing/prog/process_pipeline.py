@@ -0,0 +1,342 @@
+# -*- coding: utf-8 -*-
+"""*process_pipeline* file.
+
+*process_pipeline* file that contains :
+
+    * :class::ProcessPipeline
+
+A pipeline records a chain of processes (same names and parameters as in
+*process_list*) and runs it in one pass : the grayscale conversion is done
+only once, intermediate results are written in two preallocated buffers
+(ping-pong), adjacent morphological steps are fused and adjacent pointwise
+steps (contrast, brightness, threshold) are composed in a single lookup table.
+
+.. note:: LEnsE - Institut d'Optique - version 0.1
+
+.. moduleauthor:: Julien VILLEMEJANE <julien.villemejane@institutoptique.fr>
+"""
+
+import numpy as np
+import cv2 as cv
+from image import Image, get_max_value
+from image_process import get_output_image
+from kernel_filters import filter_kernel, resize_kernel
+from lut import PointwiseChain
+
+
+def _same_kernel(kernel1: np.ndarray, kernel2: np.ndarray) -> bool:
+    """Return True if the two kernels are identical."""
+    return kernel1.shape == kernel2.shape and np.array_equal(kernel1, kernel2)
+
+
+def _step_binarize(src: np.ndarray, dst: np.ndarray, params: dict) -> None:
+    """Binarize src in dst, the threshold (0 to 255) is scaled to the bit depth."""
+    max_value = params.get('max_value', get_max_value(src.dtype))
+    cv.threshold(src, int(params['threshold']) * max_value / 255, max_value,
+                 cv.THRESH_BINARY, dst=dst)
+
+
+def _step_adjust(src: np.ndarray, dst: np.ndarray, params: dict) -> None:
+    """Contrast and brightness of src in dst, saturated to max_value (as Image.change_contrast / change_brightness)."""
+    max_value = params['max_value']
+    brightness = min(max(int(params['brightness']), -100), 100) * 127 / 100 * max_value / 255
+    # Saturation after each operation
+    for alpha, beta in ((int(params['contrast']) / 100, 0), (1.0, brightness)):
+        cv.addWeighted(src, alpha, src, 0, beta, dst=dst)
+        if dst.dtype.kind in 'ui':
+            np.minimum(dst, int(max_value), out=dst)
+        src = dst
+
+
+def _step_pointwise(src: np.ndarray, dst: np.ndarray, params: dict) -> None:
+    """Pointwise processes of src in dst (possibly fused steps), in one pass for 8 bits images."""
+    max_value = params['max_value']
+    if src.dtype == np.uint8 and max_value == 255:
+        chain = PointwiseChain()
+        for process_name, step_params in params['operations']:
+            if process_name == 'binarize':
+                chain.threshold(int(step_params['threshold']), 255)
+            else:
+                chain.contrast(int(step_params['contrast']) / 100).brightness(int(step_params['brightness']))
+        chain.apply(src, dst=dst)
+        return
+    for process_name, step_params in params['operations']:
+        step = _step_binarize if process_name == 'binarize' else _step_adjust
+        step(src, dst, dict(step_params, max_value=max_value))
+        src = dst
+
+
+def _step_blur(src: np.ndarray, dst: np.ndarray, params: dict) -> None:
+    """Mean filter of src in dst."""
+    size = int(params['size'])
+    cv.blur(src, (size, size), dst=dst)
+
+
+def _step_convolve(src: np.ndarray, dst: np.ndarray, params: dict) -> None:
+    """Convolution of src by a kernel (resampled to its size option) in dst."""
+    filter_kernel(src, resize_kernel(params['kernel'], params.get('size')), dst=dst)
+
+
+def _step_morphology(src: np.ndarray, dst: np.ndarray, params: dict) -> None:
+    """Morphological operation of src in dst (possibly fused steps)."""
+    cv.morphologyEx(src, params['operation'], params['kernel'], dst=dst,
+                    iterations=params.get('iterations', 1),
+                    borderType=cv.BORDER_REFLECT)
+
+
+# For each process : function to call, True if a grayscale image is required.
+_steps = {
+    "adjust": (_step_pointwise, False),
+    "binarize": (_step_pointwise, True),
+    "blur": (_step_blur, False),
+    "convolve": (_step_convolve, True),
+    "erode": (_step_morphology, True),
+    "dilate": (_step_morphology, True),
+    "opening": (_step_morphology, True),
+    "closing": (_step_morphology, True),
+}
+
+_morph_operations = {
+    "erode": cv.MORPH_ERODE,
+    "dilate": cv.MORPH_DILATE,
+    "opening": cv.MORPH_OPEN,
+    "closing": cv.MORPH_CLOSE,
+}
+
+
+class ProcessPipeline:
+    """
+    Class to represent a lazy chain of image processes.
+
+    Processes are only recorded by :meth:`add`. They are compiled (fusion of
+    adjacent morphological steps) and executed by :meth:`run`.
+
+    :param steps: List of the recorded steps (process name, parameters).
+    :type steps: list[tuple[str, dict]]
+
+    """
+
+    def __init__(self) -> None:
+        """
+        Initialize the ProcessPipeline object.
+
+        """
+        self.steps = []
+        self._compiled = None  # List of (function, params, gray) after fusion
+        self._buffers = {}  # Ping-pong buffers, by (index, shape, dtype)
+
+    def add(self, process_name: str, params_dict: dict = None) -> 'ProcessPipeline':
+        """
+        Record a new process at the end of the chain.
+
+        :param process_name: Name of the process (as in *process_list*).
+        :type process_name: str
+        :param params_dict: Dictionary of parameters of the process.
+        :type params_dict: dict
+
+        :return: The pipeline itself, to chain calls.
+        :rtype: ProcessPipeline
+
+        """
+        if process_name not in _steps:
+            raise ValueError(f'ProcessPipeline.add: unknown process {process_name}')
+        if params_dict is None:
+            params_dict = {}
+        self.steps.append((process_name, dict(params_dict)))
+        self._compiled = None
+        return self
+
+    def clear(self) -> None:
+        """
+        Remove all the recorded processes.
+
+        """
+        self.steps = []
+        self._compiled = None
+
+    def __len__(self) -> int:
+        """
+        Return the number of recorded processes.
+
+        """
+        return len(self.steps)
+
+    def compile(self) -> list:
+        """
+        Return the list of the steps to execute, after fusion.
+
+        Adjacent erosions (or dilatations) with the same kernel are merged
+        in a single call with several iterations. An erosion followed by
+        a dilatation with the same kernel is an opening, a dilatation followed
+        by an erosion is a closing. Adjacent pointwise steps are merged in
+        a single lookup table, if no grayscale conversion is needed between them.
+
+        :return: List of (function, parameters, grayscale required).
+        :rtype: list
+
+        """
+        if self._compiled is not None:
+            return self._compiled
+        compiled = []
+        for process_name, params in self.steps:
+            function, gray = _steps[process_name]
+            if function is _step_pointwise:
+                if compiled and compiled[-1][0] is _step_pointwise and (compiled[-1][2] or not gray):
+                    compiled[-1][1]['operations'].append((process_name, params))
+                    continue
+                params = {'operations': [(process_name, params)]}
+            if function is _step_morphology:
+                params = {
+                    'operation': _morph_operations[process_name],
+                    'kernel': params['kernel'],
+                    'iterations': 1
+                }
+                if compiled and compiled[-1][0] is _step_morphology:
+                    previous = compiled[-1][1]
+                    if _same_kernel(previous['kernel'], params['kernel']):
+                        fused = self._fuse(previous, params)
+                        if fused is not None:
+                            compiled[-1] = (_step_morphology, fused, True)
+                            continue
+            compiled.append((function, params, gray))
+        self._compiled = compiled
+        return compiled
+
+    @staticmethod
+    def _fuse(previous: dict, params: dict) -> dict:
+        """
+        Fuse two morphological steps with the same kernel, if possible.
+
+        :return: Parameters of the fused step, or None.
+        :rtype: dict
+
+        """
+        op_prev = previous['operation']
+        op_new = params['operation']
+        if op_prev == op_new and op_new in (cv.MORPH_ERODE, cv.MORPH_DILATE):
+            fused = dict(previous)
+            fused['iterations'] = previous['iterations'] + 1
+            return fused
+        if previous['iterations'] == 1:
+            if op_prev == cv.MORPH_ERODE and op_new == cv.MORPH_DILATE:
+                return {'operation': cv.MORPH_OPEN, 'kernel': params['kernel'], 'iterations': 1}
+            if op_prev == cv.MORPH_DILATE and op_new == cv.MORPH_ERODE:
+                return {'operation': cv.MORPH_CLOSE, 'kernel': params['kernel'], 'iterations': 1}
+        return None
+
+    def halo(self) -> int:
+        """
+        Return the number of pixels around a region needed to process it.
+
+        Each step reads the neighbours of a pixel up to the radius of its
+        kernel (multiplied by the number of iterations, twice for an opening
+        or a closing). The halo of the chain is the sum of the radii.
+
+        :return: Size of the halo, in pixels.
+        :rtype: int
+
+        """
+        halo = 0
+        for function, params, _ in self.compile():
+            if function is _step_blur:
+                halo += int(params['size']) // 2
+            elif function is _step_convolve:
+                halo += max(resize_kernel(params['kernel'], params.get('size')).shape[:2]) // 2
+            elif function is _step_morphology:
+                radius = max(params['kernel'].shape[:2]) // 2
+                if params['operation'] in (cv.MORPH_OPEN, cv.MORPH_CLOSE):
+                    radius *= 2
+                halo += radius * params['iterations']
+        return halo
+
+    def output_shape(self, shape: tuple) -> tuple:
+        """
+        Return the shape of the processed image, for an input image shape.
+
+        :param shape: Shape of the input image.
+        :type shape: tuple
+
+        :return: Shape of the output image (grayscale if a step requires it).
+        :rtype: tuple
+
+        """
+        if any(gray for _, _, gray in self.compile()):
+            return tuple(shape[:2])
+        return tuple(shape)
+
+    def _get_buffer(self, index: int, shape: tuple, dtype: np.dtype) -> np.ndarray:
+        """
+        Return a ping-pong buffer, allocated only the first time a size is used.
+
+        """
+        key = (index, shape, np.dtype(dtype).str)
+        buffer = self._buffers.get(key)
+        if buffer is None:
+            buffer = np.empty(shape, dtype=dtype)
+            self._buffers[key] = buffer
+        return buffer
+
+    def run(self, image: Image, dst=None) -> Image:
+        """
+        Process an image with all the recorded processes.
+
+        :param image: Image to process.
+        :type image: Image
+        :param dst: Image or array where to write the result. Default None, a new image.
+            With the same destination at each call, no array is allocated
+            once the buffers are created.
+        :type dst: Image | np.ndarray
+
+        :return: Processed image (dst if given as an Image).
+        :rtype: Image
+
+        """
+        compiled = self.compile()
+        current = image.getPixels()
+        if len(compiled) == 0:
+            result, output = get_output_image(dst, current.shape, current.dtype, image.bit_depth)
+            if output is not current:
+                np.copyto(output, current)
+            return result
+        index = 0
+        last = len(compiled) - 1
+        for k, (function, params, gray) in enumerate(compiled):
+            if function is _step_pointwise:
+                params = dict(params, max_value=image.get_max_value())
+            if gray and current.ndim > 2:
+                gray_buffer = self._get_buffer(index, current.shape[:2], current.dtype)
+                cv.cvtColor(current, cv.COLOR_BGR2GRAY, dst=gray_buffer)
+                current = gray_buffer
+                index = 1 - index
+            # The last step writes directly in the result.
+            if k == last:
+                result, output = get_output_image(dst, current.shape, current.dtype, image.bit_depth)
+            else:
+                output = self._get_buffer(index, current.shape, current.dtype)
+            function(current, output, params)
+            current = output
+            index = 1 - index
+        return result
+
+
+if __name__ == "__main__":
+    from image_process import kernels
+    import time
+
+    image = Image()
+    image.open("../_data/robot.jpg")
+    print(image)
+
+    pipeline = ProcessPipeline()
+    pipeline.add('adjust', {'contrast': 150, 'brightness': -20})
+    pipeline.add('adjust', {'contrast': 80, 'brightness': 0})
+    pipeline.add('blur', {'size': 3}).add('binarize', {'threshold': 100})
+    pipeline.add('erode', {'kernel': kernels['cross3']})
+    pipeline.add('dilate', {'kernel': kernels['cross3']})
+    print(f'{len(pipeline)} processes / {len(pipeline.compile())} steps after fusion')
+
+    t1 = time.perf_counter()
+    image_pipeline = pipeline.run(image)
+    t2 = time.perf_counter()
+    print(f'Pipeline : {(t2 - t1) * 1000:.2f} ms')
+    image_pipeline.display()
@@ -0,0 +1,426 @@
+# -*- coding: utf-8 -*-
+"""*process_registry* file.
+
+*process_registry* file that contains :
+
+    * :class::ProcessParameter
+    * :class::ProcessOperation
+
+Registry of the available processes. Each process declares its function,
+its parameters (type, limits, initial value) and a hint of its cost. The
+parameters are parsed only once, when the process is registered.
+
+The processes of *process_list* are registered first. Other processes can be
+added without modifying *process_list*::
+
+    from process_registry import ProcessParameter, register_process
+
+    register_process('median', median_filter,
+                     [ProcessParameter('size', 'odd', 1, 15, 3)], cost=4.0)
+
+.. note:: LEnsE - Institut d'Optique - version 0.1
+
+.. moduleauthor:: Julien VILLEMEJANE <julien.villemejane@institutoptique.fr>
+"""
+
+import numpy as np
+
+parameter_types = ('int', 'odd', 'ker')
+
+
+class ProcessParameter:
+    """
+    Class to represent a parameter of a process.
+
+    :param name: Name of the parameter (key of the dictionary of parameters).
+    :type name: str
+    :param type: Type of the parameter, 'int', 'odd' (odd integer) or 'ker' (kernel).
+    :type type: str
+    :param min: Minimum value (integers only).
+    :type min: int
+    :param max: Maximum value (integers only).
+    :type max: int
+    :param init: Initial value (integers), or initial kernel.
+    :type init: int | np.ndarray
+    :param options: Parameters of a kernel (as its size).
+    :type options: list[ProcessParameter]
+
+    """
+
+    def __init__(self, name: str, type: str, min: int = 0, max: int = 0, init=None,
+                 options: list = None) -> None:
+        """
+        Initialize the ProcessParameter object.
+
+        :param name: Name of the parameter.
+        :type name: str
+        :param type: Type of the parameter, 'int', 'odd' or 'ker'.
+        :type type: str
+        :param min: Minimum value. Default 0.
+        :type min: int
+        :param max: Maximum value. Default 0.
+        :type max: int
+        :param init: Initial value. Default None, min for integers and a
+            3x3 square for kernels.
+        :type init: int | np.ndarray
+        :param options: Parameters of a kernel. Default None.
+        :type options: list[ProcessParameter]
+
+        """
+        if type not in parameter_types:
+            raise ValueError(f'ProcessParameter: unknown type {type} for {name}')
+        self.name = name
+        self.type = type
+        self.min = int(min)
+        self.max = int(max)
+        if type == 'ker':
+            self.init = np.ones((3, 3), dtype=np.uint8) if init is None else init
+        else:
+            self.init = self.min if init is None else int(init)
+        self.options = [] if options is None else list(options)
+
+    @classmethod
+    def from_spec(cls, name: str, spec: str, process_dict: dict = None) -> 'ProcessParameter':
+        """
+        Create a parameter from its description in *process_list*.
+
+        :param name: Name of the parameter.
+        :type name: str
+        :param spec: Description, as 'int:0:255:40', 'odd:1:7:3' or 'ker:size'.
+        :type spec: str
+        :param process_dict: Description of the process, for the initial
+            kernel ('kernel_init') and the parameters of a kernel ('kernel_size').
+        :type process_dict: dict
+
+        :return: Parameter.
+        :rtype: ProcessParameter
+
+        """
+        values = spec.split(':')
+        if values[0] == 'ker':
+            options = [cls.from_spec(option, process_dict[name + '_' + option])
+                       for option in values[1:]]
+            init = None
+            if len(options) > 0:
+                init = process_dict.get(name + '_init')
+            return cls(name, 'ker', init=init, options=options)
+        min_v, max_v, init_v = [int(v) for v in values[1:4]]
+        return cls(name, values[0], min_v, max_v, init_v)
+
+    def is_kernel(self) -> bool:
+        """
+        Return True if the parameter is a kernel.
+
+        """
+        return self.type == 'ker'
+
+    def check(self, value):
+        """
+        Check a value of the parameter.
+
+        :param value: Value to check.
+        :type value: int | np.ndarray
+
+        :return: Value (converted to int for integers).
+        :rtype: int | np.ndarray
+
+        :raises ValueError: If the value is out of range, or not odd.
+
+        """
+        if self.is_kernel():
+            return value
+        value = int(value)
+        if value < self.min or value > self.max:
+            raise ValueError(f'{self.name}={value} is not in [{self.min}, {self.max}]')
+        if self.type == 'odd' and value % 2 == 0:
+            raise ValueError(f'{self.name} must be odd')
+        return value
+
+    def __repr__(self) -> str:
+        """Description of the parameter."""
+        if self.is_kernel():
+            return f'ProcessParameter({self.name}, ker, options={self.options})'
+        return f'ProcessParameter({self.name}, {self.type}, {self.min}:{self.max}:{self.init})'
+
+
+class ProcessOperation:
+    """
+    Class to represent a process of the registry.
+
+    :param name: Name of the process.
+    :type name: str
+    :param function: Function of the process, function(image, params_dict, dst=None) -> Image.
+    :type function: callable
+    :param parameters: Parameters of the process.
+    :type parameters: list[ProcessParameter]
+    :param cost: Relative cost of the process, per pixel (1.0 for a binarization).
+    :type cost: float
+    :param kernel_cost: Additional cost per pixel and per element of the kernel.
+    :type kernel_cost: float
+
+    """
+
+    def __init__(self, name: str, function, parameters: list = None,
+                 cost: float = 1.0, kernel_cost: float = 0.0) -> None:
+        """
+        Initialize the ProcessOperation object.
+
+        :param name: Name of the process.
+        :type name: str
+        :param function: Function of the process.
+        :type function: callable
+        :param parameters: Parameters of the process. Default None.
+        :type parameters: list[ProcessParameter]
+        :param cost: Relative cost of the process, per pixel. Default 1.0.
+        :type cost: float
+        :param kernel_cost: Additional cost per pixel and element of the kernel. Default 0.
+        :type kernel_cost: float
+
+        """
+        self.name = name
+        self.function = function
+        self.parameters = [] if parameters is None else list(parameters)
+        self.cost = cost
+        self.kernel_cost = kernel_cost
+        self._by_name = {}
+        for parameter in self.parameters:
+            self._by_name[parameter.name] = parameter
+            for option in parameter.options:
+                self._by_name[option.name] = option
+
+    def get_parameter(self, name: str) -> ProcessParameter:
+        """
+        Return a parameter (or a parameter of a kernel) from its name.
+
+        :param name: Name of the parameter.
+        :type name: str
+
+        :return: Parameter.
+        :rtype: ProcessParameter
+
+        """
+        return self._by_name[name]
+
+    def get_value_parameters(self) -> list[ProcessParameter]:
+        """
+        Return the parameters set by a value in the interface : integers,
+        and the options of the kernels (as their size).
+
+        :return: Parameters, in the order of the process.
+        :rtype: list[ProcessParameter]
+
+        """
+        parameters = []
+        for parameter in self.parameters:
+            if parameter.is_kernel():
+                parameters.extend(parameter.options)
+            else:
+                parameters.append(parameter)
+        return parameters
+
+    def default_params(self) -> dict:
+        """
+        Return the initial values of all the parameters.
+
+        :return: Dictionary of parameters, with the parameters of the kernels.
+        :rtype: dict
+
+        """
+        params_dict = {}
+        for parameter in self.parameters:
+            params_dict[parameter.name] = parameter.init
+            for option in parameter.options:
+                params_dict[option.name] = option.init
+        return params_dict
+
+    def check_params(self, params_dict: dict) -> dict:
+        """
+        Check the values of the parameters. Missing parameters take their initial value.
+
+        :param params_dict: Dictionary of parameters.
+        :type params_dict: dict
+
+        :return: Dictionary of all the parameters, checked.
+        :rtype: dict
+
+        :raises ValueError: If a parameter is unknown or out of range.
+
+        """
+        unknown = [name for name in params_dict if name not in self._by_name]
+        if len(unknown) > 0:
+            raise ValueError(f'{self.name}: unknown options {", ".join(unknown)}')
+        result = self.default_params()
+        for name, value in params_dict.items():
+            try:
+                result[name] = self._by_name[name].check(value)
+            except ValueError as e:
+                raise ValueError(f'{self.name}: {e}')
+        return result
+
+    def estimate_cost(self, shape: tuple, params_dict: dict = None) -> float:
+        """
+        Return the estimated cost of the process for an image.
+
+        :param shape: Shape of the image.
+        :type shape: tuple
+        :param params_dict: Parameters of the process (size of the kernels). Default None.
+        :type params_dict: dict
+
+        :return: Cost, in the unit of a binarization of one pixel.
+        :rtype: float
+
+        """
+        if params_dict is None:
+            params_dict = self.default_params()
+        pixels = float(np.prod(shape[:2]))
+        cost = self.cost
+        if self.kernel_cost > 0:
+            for parameter in self.parameters:
+                if parameter.is_kernel() and parameter.name in params_dict:
+                    cost += self.kernel_cost * np.prod(self._kernel_shape(parameter, params_dict))
+        return cost * pixels
+
+    @staticmethod
+    def _kernel_shape(parameter: ProcessParameter, params_dict: dict) -> tuple[int, int]:
+        """Return the shape of a kernel. The options of a kernel (as its size) give its shape."""
+        kernel = params_dict.get(parameter.name, parameter.init)
+        if len(parameter.options) > 0:
+            side = max(int(params_dict.get(option.name, option.init)) for option in parameter.options)
+            return side, side
+        if isinstance(kernel, np.ndarray):
+            return kernel.shape[:2]
+        return 1, 1
+
+    def halo(self, params_dict: dict = None) -> int:
+        """
+        Return the number of pixels around a region needed to process it.
+
+        Each kernel reads the neighbours of a pixel up to its radius (the
+        radius given by its size option, if any).
+
+        :param params_dict: Parameters of the process. Default None, initial values.
+        :type params_dict: dict
+
+        :return: Size of the halo, in pixels.
+        :rtype: int
+
+        """
+        if params_dict is None:
+            params_dict = self.default_params()
+        halo = 0
+        for parameter in self.parameters:
+            if parameter.is_kernel():
+                halo += max(self._kernel_shape(parameter, params_dict)) // 2
+        return halo
+
+    def __call__(self, image, params_dict: dict, dst=None):
+        """Process an image (same as function)."""
+        return self.function(image, params_dict, dst=dst)
+
+
+# Registered processes, by name (in the order of registration)
+_registry = {}
+_builtin_loaded = False
+
+
+def _load_builtin() -> None:
+    """Register the processes of *process_list*, once."""
+    global _builtin_loaded
+    if not _builtin_loaded:
+        _builtin_loaded = True
+        import process_list  # Registers its processes at import
+
+
+def register_process(name: str, function, parameters: list = None, cost: float = 1.0,
+                     kernel_cost: float = 0.0, replace: bool = False) -> ProcessOperation:
+    """
+    Add a process to the registry.
+
+    :param name: Name of the process.
+    :type name: str
+    :param function: Function of the process, function(image, params_dict, dst=None) -> Image.
+    :type function: callable
+    :param parameters: Parameters of the process. Default None.
+    :type parameters: list[ProcessParameter]
+    :param cost: Relative cost of the process, per pixel. Default 1.0.
+    :type cost: float
+    :param kernel_cost: Additional cost per pixel and element of the kernel. Default 0.
+    :type kernel_cost: float
+    :param replace: Replace a process with the same name. Default False.
+    :type replace: bool
+
+    :return: Registered process.
+    :rtype: ProcessOperation
+
+    :raises ValueError: If a process with the same name exists.
+
+    """
+    if name in _registry and not replace:
+        raise ValueError(f'register_process: {name} is already registered')
+    operation = ProcessOperation(name, function, parameters, cost, kernel_cost)
+    _registry[name] = operation
+    return operation
+
+
+def register_from_dict(name: str, process_dict: dict, cost: float = 1.0,
+                       kernel_cost: float = 0.0) -> ProcessOperation:
+    """
+    Add a process described as in *process_list* ('params': 'threshold',
+    'threshold': 'int:0:255:40'...) to the registry.
+
+    :param name: Name of the process.
+    :type name: str
+    :param process_dict: Description of the process.
+    :type process_dict: dict
+    :param cost: Relative cost of the process, per pixel. Default 1.0.
+    :type cost: float
+    :param kernel_cost: Additional cost per pixel and element of the kernel. Default 0.
+    :type kernel_cost: float
+
+    :return: Registered process.
+    :rtype: ProcessOperation
+
+    """
+    parameters = [ProcessParameter.from_spec(option, process_dict[option], process_dict)
+                  for option in process_dict['params'].split(';') if option != '']
+    return register_process(name, process_dict['function'], parameters, cost, kernel_cost,
+                            replace=True)
+
+
+def get_process(name: str) -> ProcessOperation:
+    """
+    Return a registered process.
+
+    :param name: Name of the process.
+    :type name: str
+
+    :return: Process.
+    :rtype: ProcessOperation
+
+    :raises ValueError: If the process is not registered.
+
+    """
+    _load_builtin()
+    operation = _registry.get(name)
+    if operation is None:
+        raise ValueError(f'unknown process {name} (available: {", ".join(_registry)})')
+    return operation
+
+
+def get_process_names() -> list[str]:
+    """
+    Return the names of the registered processes, in the order of registration.
+
+    """
+    _load_builtin()
+    return list(_registry)
+
+
+if __name__ == "__main__":
+    # Same module as the one imported by process_list
+    import process_registry
+
+    for process_name in process_registry.get_process_names():
+        operation = process_registry.get_process(process_name)
+        print(f'{process_name} : {operation.parameters} / '
+              f'cost FHD = {operation.estimate_cost((1080, 1920)):.3g}')
@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+"""*process_worker* file.
+
+*process_worker* file that contains :
+
+    * :class::ProcessSignals
+    * :class::ProcessRunnable
+    * :class::ProcessExecutor
+
+Image processes are executed in a background thread (QThreadPool), so that
+the graphical interface is not frozen during the processing of large images.
+
+.. note:: LEnsE - Institut d'Optique - version 0.1
+
+.. moduleauthor:: Julien VILLEMEJANE <julien.villemejane@institutoptique.fr>
+"""
+
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+
+class ProcessSignals(QObject):
+    """Signals of a :class:`ProcessRunnable`. Children of QObject.
+
+    A QRunnable is not a QObject and can not emit signals by itself.
+
+    """
+
+    finished = pyqtSignal(object, object)
+
+
+class ProcessRunnable(QRunnable):
+    """Process an image in a thread of a QThreadPool. Children of QRunnable.
+
+    The signal *finished* of :attr:`signals` is emitted with the tag of the job
+    and the processed image (None if the process failed or was cancelled).
+
+    """
+
+    def __init__(self, function, image, params_dict: dict, tag=None) -> None:
+        """
+        Default constructor of the class.
+
+        :param function: Process to apply, as in *process_list* ('function' entry).
+        :type function: callable
+        :param image: Image to process.
+        :type image: Image
+        :param params_dict: Dictionary of parameters of the process.
+        :type params_dict: dict
+        :param tag: Data sent back with the result. Default None.
+        :type tag: object
+
+        """
+        super().__init__()
+        self.function = function
+        self.image = image
+        self.params_dict = params_dict
+        self.tag = tag
+        self.cancelled = False
+        self.signals = ProcessSignals()
+
+    def cancel(self) -> None:
+        """
+        Cancel the job. A job already started is not interrupted, but its
+        result is not sent.
+
+        """
+        self.cancelled = True
+
+    def run(self) -> None:
+        """
+        Process the image. Called by the QThreadPool.
+
+        """
+        result = None
+        if not self.cancelled:
+            try:
+                result = self.function(self.image, self.params_dict)
+            except Exception as e:
+                print("Exception - ProcessRunnable.run: " + str(e) + "")
+        if self.cancelled:
+            result = None
+        self.signals.finished.emit(self.tag, result)
+
+
+class ProcessExecutor(QObject):
+    """Execute image processes in a background thread. Children of QObject.
+
+    Only one process is running at a time. When several processes are
+    submitted while a process is running (for example when a slider is moved),
+    only the latest one is kept : the older ones are cancelled and their
+    results are never sent.
+
+    A request can be refined by other jobs (for example a fast preview first,
+    then the full resolution image), executed one after the other.
+
+    """
+
+    processed = pyqtSignal(object, object)
+
+    def __init__(self) -> None:
+        """
+        Default constructor of the class.
+
+        """
+        super().__init__()
+        self.pool = QThreadPool()
+        self.pool.setMaxThreadCount(1)
+        self._generation = 0  # Incremented at each new request
+        self._running = None
+        self._pending = []  # Jobs of the latest request, waiting
+
+    def submit(self, function, image, params_dict: dict, tag=None) -> None:
+        """
+        Submit a new process. Previous requests are considered as stale.
+
+        :param function: Process to apply, as in *process_list* ('function' entry).
+        :type function: callable
+        :param image: Image to process.
+        :type image: Image
+        :param params_dict: Dictionary of parameters of the process.
+        :type params_dict: dict
+        :param tag: Data sent back with the result by the processed signal. Default None.
+        :type tag: object
+
+        """
+        self._generation += 1
+        self._pending = []
+        if self._running is not None:
+            # The running job can not be interrupted, its result will be ignored.
+            self._running.cancel()
+        self.refine(function, image, params_dict, tag)
+
+    def refine(self, function, image, params_dict: dict, tag=None) -> None:
+        """
+        Add a job to the latest request, executed after the previous ones.
+
+        :param function: Process to apply, as in *process_list* ('function' entry).
+        :type function: callable
+        :param image: Image to process.
+        :type image: Image
+        :param params_dict: Dictionary of parameters of the process.
+        :type params_dict: dict
+        :param tag: Data sent back with the result by the processed signal. Default None.
+        :type tag: object
+
+        """
+        job = ProcessRunnable(function, image, params_dict, (self._generation, tag))
+        if self._running is None:
+            self._start(job)
+        else:
+            self._pending.append(job)
+
+    def cancel(self) -> None:
+        """
+        Cancel all the submitted processes.
+
+        """
+        self._generation += 1
+        self._pending = []
+        if self._running is not None:
+            self._running.cancel()
+
+    def is_busy(self) -> bool:
+        """
+        Return True if a process is running or waiting.
+
+        """
+        return self._running is not None or len(self._pending) > 0
+
+    def wait_for_done(self, msecs: int = -1) -> bool:
+        """
+        Wait for the end of the running process.
+
+        :param msecs: Maximum time to wait, in milliseconds. Default -1, no limit.
+        :type msecs: int
+
+        :return: True if the process ended.
+        :rtype: bool
+
+        """
+        return self.pool.waitForDone(msecs)
+
+    def _start(self, job: ProcessRunnable) -> None:
+        """Start a job in the thread pool."""
+        self._running = job
+        job.signals.finished.connect(self._job_finished)
+        self.pool.start(job)
+
+    def _job_finished(self, job_tag, result) -> None:
+        """Action performed when a job is finished (in the main thread)."""
+        generation, tag = job_tag
+        self._running = None
+        if len(self._pending) > 0:
+            self._start(self._pending.pop(0))
+        if generation == self._generation and result is not None:
+            self.processed.emit(tag, result)
+
+
+if __name__ == "__main__":
+    import sys
+    from PyQt6.QtCore import QCoreApplication, QTimer
+    from image import Image
+    from image_process import ImageProcess
+
+    def action_processed(tag, result):
+        print(f'Processed {tag} : {result}')
+        QTimer.singleShot(100, app.quit)
+
+    app = QCoreApplication(sys.argv)
+    image = Image()
+    image.open("../_data/robot.jpg")
+
+    executor = ProcessExecutor()
+    executor.processed.connect(action_processed)
+    # Only the last request is processed and sent
+    for threshold in range(10, 200, 10):
+        executor.submit(ImageProcess.binarize, image, {'threshold': threshold}, threshold)
+    sys.exit(app.exec())
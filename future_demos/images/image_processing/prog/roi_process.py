@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+"""*roi_process* file.
+
+*roi_process* file that contains :
+
+    * :class::RoiProcessor
+
+Processing of a region of interest (ROI) of an image. The image is divided
+in tiles : only the tiles covering the ROI are processed, each one with a
+halo of neighbour pixels (radius of the kernels) so that the result is the
+same as the processing of the whole image. Processed tiles are cached : when
+the ROI moves, the tiles already processed are reused.
+
+The ROI is composited back in the initial image (converted to grayscale if
+the process returns a grayscale image).
+
+.. note:: LEnsE - Institut d'Optique - version 0.1
+
+.. moduleauthor:: Julien VILLEMEJANE <julien.villemejane@institutoptique.fr>
+"""
+
+import threading
+
+import numpy as np
+import cv2 as cv
+from image import Image
+from process_cache import ProcessCache, hash_array
+from process_registry import get_process
+
+
+class RoiProcessor:
+    """
+    Class to process a region of interest of an image, tile by tile.
+
+    :param tile_size: Size of the (square) tiles, in pixels.
+    :type tile_size: int
+    :param cache: Processed tiles.
+    :type cache: ProcessCache
+
+    """
+
+    def __init__(self, tile_size: int = 128, max_bytes: int = 128 * 1024 * 1024) -> None:
+        """
+        Initialize the RoiProcessor object.
+
+        :param tile_size: Size of the (square) tiles, in pixels. Default 128.
+        :type tile_size: int
+        :param max_bytes: Maximum size of the cached tiles, in bytes. Default 128 MB.
+        :type max_bytes: int
+
+        """
+        self.tile_size = tile_size
+        self.cache = ProcessCache(max_bytes)
+        self._lock = threading.Lock()  # Processes are executed in another thread
+        self._pixels = None  # Last processed array, with its hash and its grayscale version
+        self._hash = None
+        self._gray = None
+
+    def clear(self) -> None:
+        """
+        Remove all the cached tiles.
+
+        """
+        with self._lock:
+            self.cache.clear()
+            self._pixels = None
+            self._hash = None
+            self._gray = None
+
+    def _get_hash(self, pixels: np.ndarray) -> str:
+        """Return the hash of the pixels, computed again only for a new (or writeable) array."""
+        if pixels is not self._pixels or pixels.flags.writeable:
+            self._pixels = pixels
+            self._hash = hash_array(pixels)
+            self._gray = None
+        return self._hash
+
+    def _get_base(self, pixels: np.ndarray, ndim: int) -> np.ndarray:
+        """Return the initial pixels, in grayscale if the result is in grayscale."""
+        if ndim == pixels.ndim:
+            return pixels
+        if self._gray is None:
+            self._gray = cv.cvtColor(pixels, cv.COLOR_BGR2GRAY)
+        return self._gray
+
+    def get_tiles(self, roi: tuple, height: int, width: int) -> list[tuple]:
+        """
+        Return the tiles covering a region.
+
+        :param roi: Region (x, y, width, height), in pixels.
+        :type roi: tuple
+        :param height: Height of the image.
+        :type height: int
+        :param width: Width of the image.
+        :type width: int
+
+        :return: Regions (y, x, height, width) of the tiles.
+        :rtype: list[tuple]
+
+        """
+        x, y, w, h = roi
+        size = self.tile_size
+        tiles = []
+        for ty in range(y // size * size, y + h, size):
+            for tx in range(x // size * size, x + w, size):
+                tiles.append((ty, tx, min(size, height - ty), min(size, width - tx)))
+        return tiles
+
+    def process(self, process_name: str, image: Image, params_dict: dict, roi: tuple) -> Image:
+        """
+        Process a region of an image.
+
+        :param process_name: Name of the process (in *process_registry*).
+        :type process_name: str
+        :param image: Image to process.
+        :type image: Image
+        :param params_dict: Dictionary of parameters of the process.
+        :type params_dict: dict
+        :param roi: Region to process (x, y, width, height), in pixels.
+        :type roi: tuple
+
+        :return: Initial image with the processed region, None if the region is empty.
+        :rtype: Image
+
+        """
+        with self._lock:
+            operation = get_process(process_name)
+            pixels = image.getPixels()
+            height, width = pixels.shape[:2]
+            x1, y1 = max(0, int(roi[0])), max(0, int(roi[1]))
+            x2, y2 = min(width, int(roi[0] + roi[2])), min(height, int(roi[1] + roi[3]))
+            if x2 <= x1 or y2 <= y1:
+                return None
+            roi = (x1, y1, x2 - x1, y2 - y1)
+            image_hash = self._get_hash(pixels)
+            halo = operation.halo(params_dict)
+
+            tiles = []
+            for tile in self.get_tiles(roi, height, width):
+                key = self.cache.make_tile_key(image_hash, process_name, params_dict, tile)
+                result = self.cache.get(key)
+                if result is None:
+                    result = self._process_tile(operation, image, params_dict, tile, halo)
+                    self.cache.put(key, result)
+                tiles.append((tile, result.getPixels()))
+
+            # Composition of the region in the initial image
+            output = self._get_base(pixels, tiles[0][1].ndim).copy()
+            for (ty, tx, _, _), tile_pixels in tiles:
+                # Part of the tile in the region
+                ry1, rx1 = max(y1, ty), max(x1, tx)
+                ry2 = min(y2, ty + tile_pixels.shape[0])
+                rx2 = min(x2, tx + tile_pixels.shape[1])
+                output[ry1:ry2, rx1:rx2] = tile_pixels[ry1 - ty:ry2 - ty, rx1 - tx:rx2 - tx]
+            result = Image()
+            result.create(output, image.bit_depth)
+            return result
+
+    @staticmethod
+    def _process_tile(operation, image: Image, params_dict: dict, tile: tuple, halo: int) -> Image:
+        """Process a tile with its halo (clipped at the borders of the image)."""
+        pixels = image.getPixels()
+        height, width = pixels.shape[:2]
+        y, x, t_height, t_width = tile
+        y1, x1 = max(0, y - halo), max(0, x - halo)
+        y2, x2 = min(height, y + t_height + halo), min(width, x + t_width + halo)
+        region = Image()
+        region.create(np.ascontiguousarray(pixels[y1:y2, x1:x2]), image.bit_depth)
+        result = operation.function(region, params_dict).getPixels()
+        tile_image = Image()
+        tile_image.create(np.ascontiguousarray(
+            result[y - y1:y - y1 + t_height, x - x1:x - x1 + t_width]), image.bit_depth)
+        return tile_image
+
+
+if __name__ == "__main__":
+    import time
+    from image_process import kernels
+
+    image = Image()
+    image.open("../_data/robot.jpg")
+    large = Image()
+    large.create(cv.resize(image.getPixels(), (3840, 2160)))
+    large.getPixels().setflags(write=False)
+
+    processor = RoiProcessor()
+    params = {'kernel': kernels['cross5']}
+    t1 = time.perf_counter()
+    full = get_process('erode').function(large, params)
+    t2 = time.perf_counter()
+    print(f'Whole image : {(t2 - t1) * 1000:.1f} ms')
+    for roi in [(1000, 800, 300, 200), (1040, 820, 300, 200), (1040, 820, 300, 200)]:
+        t1 = time.perf_counter()
+        result = processor.process('erode', large, params, roi)
+        t2 = time.perf_counter()
+        x, y, w, h = roi
+        same = np.array_equal(result.getPixels()[y:y + h, x:x + w], full.getPixels()[y:y + h, x:x + w])
+        print(f'ROI {roi} : {(t2 - t1) * 1000:.1f} ms / same result {same} / {processor.cache.get_stats()}')
@@ -34,6 +34,7 @@ class SourceWidget(QWidget):
     """
     
     load_image = pyqtSignal(str)
+    load_video = pyqtSignal(str)
     start_webcam = pyqtSignal(str)
     start_sensor = pyqtSignal(str)
     
@@ -63,9 +64,13 @@ class SourceWidget(QWidget):
         self.image_source_button = QPushButton('Load Image')
         self.image_source_button.clicked.connect(self.action_image_button)
         self.webcam_source_label = QLabel('Webcam :')
-        self.webcam_source_name_label = QLabel('NOT YET IMPLEMENTED')
+        self.webcam_source_name_label = QLabel('NO WEBCAM')
         self.webcam_source_button = QPushButton('Start Webcam')
         self.webcam_source_button.clicked.connect(self.action_webcam_button)
+        self.video_source_label = QLabel('Video :')
+        self.video_source_name_label = QLabel('NO VIDEO')
+        self.video_source_button = QPushButton('Load Video')
+        self.video_source_button.clicked.connect(self.action_video_button)
         self.sensor_source_label = QLabel('Sensor :')
         self.sensor_source_name_label = QLabel('NOT YET IMPLEMENTED')
         self.sensor_source_button = QPushButton('Start Sensor')
@@ -81,10 +86,13 @@ class SourceWidget(QWidget):
         self.main_layout.addWidget(self.webcam_source_label, 3, 0)
         self.main_layout.addWidget(self.webcam_source_name_label, 3, 1)
         self.main_layout.addWidget(self.webcam_source_button, 3, 2)
-        self.main_layout.addWidget(self.sensor_source_label, 4, 0)
-        self.main_layout.addWidget(self.sensor_source_name_label, 4, 1)
-        self.main_layout.addWidget(self.sensor_source_button, 4, 2)
-        self.main_layout.addWidget(self.list_name, 5, 0, 1, 3)
+        self.main_layout.addWidget(self.video_source_label, 4, 0)
+        self.main_layout.addWidget(self.video_source_name_label, 4, 1)
+        self.main_layout.addWidget(self.video_source_button, 4, 2)
+        self.main_layout.addWidget(self.sensor_source_label, 5, 0)
+        self.main_layout.addWidget(self.sensor_source_name_label, 5, 1)
+        self.main_layout.addWidget(self.sensor_source_button, 5, 2)
+        self.main_layout.addWidget(self.list_name, 6, 0, 1, 3)
         self.main_layout.setColumnStretch(0, 1)
         self.main_layout.setColumnStretch(1, 1)
         self.main_layout.setColumnStretch(2, 1)
@@ -94,6 +102,7 @@ class SourceWidget(QWidget):
         self.main_layout.setRowStretch(3, 1)
         self.main_layout.setRowStretch(4, 1)
         self.main_layout.setRowStretch(5, 1)
+        self.main_layout.setRowStretch(6, 1)
         
         self.setLayout(self.main_layout)
 
@@ -107,7 +116,7 @@ class SourceWidget(QWidget):
             self,
             "Select an Image File", 
             "", 
-            "Images (*.png *.jpg)"
+            "Images (*.png *.jpg *.tif *.tiff *.pgm)"
         )
         file_name = filename.split('/')
         self.image_source_name_label.setText(file_name[-1])
@@ -122,6 +131,56 @@ class SourceWidget(QWidget):
         print('Webcam')
         self.start_webcam.emit('webcam;')
 
+    def action_video_button(self, event):
+        """
+        Action performed after a click on the "load video" button.
+
+        :param event: Triggering event.
+        """
+        if self.video_source_button.text() == 'Stop Video':
+            self.load_video.emit('stop;')
+            return
+        filename, ok = QFileDialog.getOpenFileName(
+            self,
+            "Select a Video File",
+            "",
+            "Videos (*.mp4 *.avi *.mov *.mkv)"
+        )
+        if filename != '':
+            self.load_video.emit('video;'+filename+';')
+
+    def set_live_state(self, source_type: str = '', name: str = '') -> None:
+        """
+        Update the buttons and the labels of the live sources.
+
+        :param source_type: Running live source, 'webcam', 'video' or '' (none).
+        :type source_type: str
+        :param name: Name of the running source.
+        :type name: str
+
+        """
+        self.webcam_source_button.setText('Stop Webcam' if source_type == 'webcam' else 'Start Webcam')
+        self.video_source_button.setText('Stop Video' if source_type == 'video' else 'Load Video')
+        if source_type == 'webcam':
+            self.webcam_source_name_label.setText(name)
+        elif source_type == 'video':
+            self.video_source_name_label.setText(name)
+
+    def set_live_info(self, source_type: str, text: str) -> None:
+        """
+        Display information about a running live source (frame rate, latency).
+
+        :param source_type: Live source, 'webcam' or 'video'.
+        :type source_type: str
+        :param text: Text to display.
+        :type text: str
+
+        """
+        if source_type == 'webcam':
+            self.webcam_source_name_label.setText(text)
+        elif source_type == 'video':
+            self.video_source_name_label.setText(text)
+
     def action_sensor_button(self, event):
         """
         Action performed after a click on the "start sensor" button.
@@ -1,3 +1,4 @@
 __all__ = [
     "conversion",      # refers to the 'conversion.py' file
+    "histogram",       # refers to the 'histogram.py' file
 ]
\ No newline at end of file
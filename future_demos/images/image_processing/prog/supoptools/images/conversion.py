@@ -37,21 +37,75 @@ def resize_image(im_array: np.ndarray,
     return resized_image
 
 
-def array_to_qimage(array: np.ndarray) -> QImage:
+# Types of pixels converted to 8 bits for the display (by cv2.convertScaleAbs)
+display_types = (np.uint8, np.int8, np.uint16, np.int16, np.int32, np.float32, np.float64)
+
+
+def get_window(array: np.ndarray) -> tuple[float, float]:
+    """Return the automatic display window of an array (minimum and maximum values).
+
+    :param array: Array containing image data.
+    :type array: numpy.ndarray
+    :return: Values displayed as black and white.
+    :rtype: tuple[float, float]
+
+    """
+    if array.size == 0:
+        return 0.0, 255.0
+    return float(array.min()), float(array.max())
+
+
+def array_to_8bits(array: np.ndarray, window: tuple[float, float] = None) -> np.ndarray:
+    """Convert an array to 8 bits for the display, with a window of values.
+
+    8 bits arrays are returned as they are (contiguous). Other types are
+    windowed and converted in one pass (values outside the window are saturated).
+
+    :param array: Array containing image data, gray (2D) or BGR (3D).
+    :type array: numpy.ndarray
+    :param window: Values (low, high) displayed as black and white.
+        Default None, minimum and maximum of the array.
+    :type window: tuple[float, float]
+    :return: Contiguous 8 bits array.
+    :rtype: numpy.ndarray
+    :raises ValueError: If the type of the pixels or the number of channels is not supported.
+
+    """
+    if array.ndim not in (2, 3) or (array.ndim == 3 and array.shape[2] != 3):
+        raise ValueError(f'array_to_8bits: gray or BGR array required, not shape {array.shape}')
+    if array.dtype not in display_types:
+        raise ValueError(f'array_to_8bits: type {array.dtype} is not supported')
+    if array.dtype == np.uint8:
+        return np.ascontiguousarray(array)
+    low, high = get_window(array) if window is None else window
+    alpha = 255.0 / (high - low) if high > low else 1.0
+    return cv2.convertScaleAbs(array, alpha=alpha, beta=-low * alpha)
+
+
+def array_to_qimage(array: np.ndarray, window: tuple[float, float] = None) -> QImage:
     """Transcode an array to a QImage.
 
+    Gray images (2D) and BGR images (3D) are displayed in 8 bits. Other
+    types than 8 bits are windowed and converted to 8 bits (see array_to_8bits).
+
     :param array: Array containing image data.
     :type array: numpy.ndarray
+    :param window: Values (low, high) displayed as black and white (not for 8 bits
+        arrays). Default None, minimum and maximum of the array.
+    :type window: tuple[float, float]
     :return: Image to display.
     :rtype: QImage
+    :raises ValueError: If the type of the pixels or the number of channels is not supported.
 
     """
-    shape_size = len(array.shape)
-    if shape_size == 2:
-        height, width = array.shape
+    buffer = array_to_8bits(array, window)
+    height, width = buffer.shape[:2]
+    if buffer.ndim == 2:
+        image_format = QImage.Format.Format_Grayscale8
     else:
-        height, width, _ = array.shape
-    bytes_per_line = width  # only in 8 bits gray
-
-    return QImage(array, width, height, bytes_per_line,
-                  QImage.Format.Format_Grayscale8)
+        image_format = QImage.Format.Format_BGR888
+    q_image = QImage(buffer, width, height, buffer.strides[0], image_format)
+    if buffer is not array:
+        # The QImage does not own the data of the temporary array
+        q_image = q_image.copy()
+    return q_image
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""*histogram* file.
+
+*histogram* file, from supoptools directory,
+that contains fast histograms of 8 and 16 bits images
+(cv2.calcHist for 8 bits, np.bincount for 16 bits).
+
+Used by the statistics of the images of the demo (*image_stats*) and by
+the histograms of the cameras (*HistWidget*).
+
+.. note:: LEnsE - Institut d'Optique - version 0.1
+
+.. moduleauthor:: Julien VILLEMEJANE <julien.villemejane@institutoptique.fr>
+"""
+
+import cv2 as cv
+import numpy as np
+
+
+def as_mask(mask: np.ndarray) -> np.ndarray:
+    """Return a mask as an 8 bits array (nonzero values are in the region), or None."""
+    if mask is None:
+        return None
+    if mask.dtype != np.uint8:
+        mask = (mask != 0).astype(np.uint8)
+    return mask
+
+
+def get_channels(pixels: np.ndarray) -> list[np.ndarray]:
+    """Return the list of the channels of an array."""
+    if pixels.ndim == 2:
+        return [pixels]
+    return [pixels[..., k] for k in range(pixels.shape[2])]
+
+
+def histogram(pixels: np.ndarray, mask: np.ndarray = None) -> np.ndarray:
+    """
+    Return the histogram of an 8 or 16 bits array, one bin per value.
+
+    :param pixels: Array of pixels (gray or color).
+    :type pixels: np.ndarray
+    :param mask: Region of interest, nonzero values are used. Default None, all the pixels.
+    :type mask: np.ndarray
+
+    :return: Histogram, shape (channels, 256) for 8 bits, (channels, 65536) for 16 bits.
+    :rtype: np.ndarray
+
+    """
+    mask = as_mask(mask)
+    if pixels.dtype == np.uint8:
+        n_channels = 1 if pixels.ndim == 2 else pixels.shape[2]
+        hist = [cv.calcHist([pixels], [k], mask, [256], [0, 256]).ravel()
+                for k in range(n_channels)]
+        return np.rint(hist).astype(np.int64)
+    if pixels.dtype == np.uint16:
+        hist = []
+        for channel in get_channels(pixels):
+            values = channel[mask != 0] if mask is not None else channel.ravel()
+            hist.append(np.bincount(values, minlength=65536))
+        return np.array(hist, dtype=np.int64)
+    raise ValueError(f'histogram: 8 or 16 bits array required, not {pixels.dtype}')
+
+
+def histogram_bins(data: np.ndarray, bins) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Return the histogram of all the values of an array, as np.histogram(data, bins).
+
+    For 8 and 16 bits data with bins of width 1 from 0 (0, 1, ..., N), as
+    used by the histograms of the cameras, the fast path of histogram() is
+    used. Other data and bins are processed by np.histogram.
+
+    :param data: Array of values (image of any number of channels).
+    :type data: np.ndarray
+    :param bins: Edges of the bins (or number of bins, for np.histogram).
+    :type bins: np.ndarray | int
+
+    :return: Histogram and edges of the bins.
+    :rtype: tuple[np.ndarray, np.ndarray]
+
+    """
+    data = np.asarray(data)
+    edges = np.asarray(bins)
+    if (data.dtype not in (np.uint8, np.uint16) or edges.ndim != 1 or len(edges) < 2
+            or not np.array_equal(edges, np.arange(len(edges)))):
+        return np.histogram(data, bins=bins)
+    n_bins = len(edges) - 1
+    # All the values in a single channel
+    counts = histogram(np.ascontiguousarray(data).reshape(-1, 1))[0]
+    hist = np.zeros(n_bins, dtype=np.int64)
+    used = min(n_bins, len(counts))
+    hist[:used] = counts[:used]
+    if n_bins < len(counts):
+        # Last bin includes its right edge, greater values are not counted
+        hist[-1] += counts[n_bins]
+    return hist, edges.astype(np.float64)
@@ -179,9 +179,9 @@ class WidgetIncDecStep(QWidget):
 
     def get_real_value(self):
         if self.integer:
-            return int(self.slider.value() / self.ratio_slider)
+            return int(self.real_value)
         else:
-            return self.slider.value() / self.ratio_slider
+            return self.real_value
 
     def set_value(self, value):
         self.real_value = value
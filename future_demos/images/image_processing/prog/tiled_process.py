@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+"""*tiled_process* file.
+
+*tiled_process* file that contains functions to process images larger than
+the memory, tile by tile.
+
+The input image is memory-mapped (raw file, .npy file or uncompressed TIFF
+file), each tile is read with a halo (overlap) sized from the kernels of the
+chain of processes (:meth:`ProcessPipeline.halo`), processed, cropped and
+written to a memory-mapped output. The memory used depends on the size of the
+tiles, not on the size of the image.
+
+Example::
+
+    python tiled_process.py scan.tif scan_out.tif -p blur:size=5 -p binarize:threshold=100
+    python tiled_process.py mosaic.raw out.npy --shape 40000 60000 3 -p erode:kernel=cross5
+
+TIFF files require the *tifffile* package.
+
+.. note:: LEnsE - Institut d'Optique - version 0.1
+
+.. moduleauthor:: Julien VILLEMEJANE <julien.villemejane@institutoptique.fr>
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+from image import Image
+from process_pipeline import ProcessPipeline
+
+try:
+    import tifffile
+except ImportError:
+    tifffile = None
+
+
+def _check_tifffile() -> None:
+    """Raise an ImportError if the tifffile package is not installed."""
+    if tifffile is None:
+        raise ImportError('tiled_process: the tifffile package is required for TIFF files')
+
+
+def open_source(filename: str, shape: tuple = None, dtype: str = 'uint8') -> np.ndarray:
+    """
+    Return a memory-mapped array of an image file (read only).
+
+    :param filename: Path of the image (.npy, .raw or uncompressed .tif/.tiff).
+    :type filename: str
+    :param shape: Shape of the image (height, width[, channels]), for raw files only. Default None.
+    :type shape: tuple
+    :param dtype: Type of the pixels, for raw files only. Default 'uint8'.
+    :type dtype: str
+
+    :return: Memory-mapped array of the pixels.
+    :rtype: np.ndarray
+
+    """
+    extension = os.path.splitext(filename)[1].lower()
+    if extension == '.npy':
+        return np.load(filename, mmap_mode='r')
+    if extension in ('.tif', '.tiff'):
+        _check_tifffile()
+        try:
+            return tifffile.memmap(filename, mode='r')
+        except ValueError as e:
+            raise ValueError(f'open_source: {filename} can not be memory-mapped '
+                             f'(compressed or tiled TIFF) - {e}')
+    if shape is None:
+        raise ValueError(f'open_source: the shape of the raw file {filename} is required')
+    return np.memmap(filename, dtype=dtype, mode='r', shape=tuple(shape))
+
+
+def create_output(filename: str, shape: tuple, dtype: np.dtype) -> np.ndarray:
+    """
+    Create a memory-mapped image file and return its array.
+
+    :param filename: Path of the image (.npy, .raw or .tif/.tiff).
+    :type filename: str
+    :param shape: Shape of the image (height, width[, channels]).
+    :type shape: tuple
+    :param dtype: Type of the pixels.
+    :type dtype: np.dtype
+
+    :return: Memory-mapped array of the pixels, to write.
+    :rtype: np.ndarray
+
+    """
+    extension = os.path.splitext(filename)[1].lower()
+    if extension == '.npy':
+        return np.lib.format.open_memmap(filename, mode='w+', dtype=dtype, shape=tuple(shape))
+    if extension in ('.tif', '.tiff'):
+        _check_tifffile()
+        return tifffile.memmap(filename, shape=tuple(shape), dtype=dtype)
+    return np.memmap(filename, dtype=dtype, mode='w+', shape=tuple(shape))
+
+
+def iter_tiles(height: int, width: int, tile_size: int):
+    """
+    Generate the regions of the tiles of an image.
+
+    :param height: Height of the image.
+    :type height: int
+    :param width: Width of the image.
+    :type width: int
+    :param tile_size: Size of the (square) tiles.
+    :type tile_size: int
+
+    :return: Regions (y, x, height, width) of the tiles.
+    :rtype: generator
+
+    """
+    for y in range(0, height, tile_size):
+        for x in range(0, width, tile_size):
+            yield y, x, min(tile_size, height - y), min(tile_size, width - x)
+
+
+def process_tiled(source: np.ndarray, pipeline: ProcessPipeline, output: np.ndarray,
+                  tile_size: int = 1024, progress=None) -> np.ndarray:
+    """
+    Process an image tile by tile.
+
+    Each tile is read with a halo of :meth:`ProcessPipeline.halo` pixels, so
+    that the result is the same as the processing of the whole image. At the
+    borders of the image, there is no halo : each process applies its own
+    border method, as for the whole image.
+
+    :param source: Pixels of the image (can be memory-mapped).
+    :type source: np.ndarray
+    :param pipeline: Chain of processes to apply.
+    :type pipeline: ProcessPipeline
+    :param output: Array where to write the result (can be memory-mapped),
+        of shape pipeline.output_shape(source.shape).
+    :type output: np.ndarray
+    :param tile_size: Size of the (square) tiles. Default 1024.
+    :type tile_size: int
+    :param progress: Function called after each tile, with the number of
+        processed tiles and the total number of tiles. Default None.
+    :type progress: callable
+
+    :return: The output array.
+    :rtype: np.ndarray
+
+    """
+    height, width = source.shape[:2]
+    if tuple(output.shape) != pipeline.output_shape(source.shape):
+        raise ValueError(f'process_tiled: output shape {output.shape} is not '
+                         f'{pipeline.output_shape(source.shape)}')
+    halo = pipeline.halo()
+    n_tiles = len(range(0, height, tile_size)) * len(range(0, width, tile_size))
+    tile = Image()
+    for k, (y, x, t_height, t_width) in enumerate(iter_tiles(height, width, tile_size)):
+        y1, x1 = max(0, y - halo), max(0, x - halo)
+        y2, x2 = min(height, y + t_height + halo), min(width, x + t_width + halo)
+        tile.create(np.ascontiguousarray(source[y1:y2, x1:x2]))
+        result = pipeline.run(tile).getPixels()
+        output[y:y + t_height, x:x + t_width] = \
+            result[y - y1:y - y1 + t_height, x - x1:x - x1 + t_width]
+        if progress is not None:
+            progress(k + 1, n_tiles)
+    return output
+
+
+def main(argv: list[str] = None) -> int:
+    """
+    Entry point of the tiled processing.
+
+    :param argv: Arguments of the command line. Default None, sys.argv.
+    :type argv: list[str]
+
+    :return: Exit code.
+    :rtype: int
+
+    """
+    from batch_process import parse_process
+
+    parser = argparse.ArgumentParser(
+        description='Apply a chain of processes (from process_list) to a large image, by tiles.')
+    parser.add_argument('source', help='image to process (.npy, .raw, .tif)')
+    parser.add_argument('output', help='processed image (.npy, .raw, .tif)')
+    parser.add_argument('-p', '--process', action='append', required=True,
+                        help='process to apply, name:option=value,... (repeat to chain)')
+    parser.add_argument('-t', '--tile', type=int, default=1024, help='size of the tiles (default: 1024)')
+    parser.add_argument('--shape', type=int, nargs='+', help='height width [channels] of a raw file')
+    parser.add_argument('--dtype', default='uint8', help='type of the pixels of a raw file (default: uint8)')
+    args = parser.parse_args(argv)
+
+    pipeline = ProcessPipeline()
+    try:
+        for process_spec in args.process:
+            pipeline.add(*parse_process(process_spec))
+        source = open_source(args.source, args.shape, args.dtype)
+        output = create_output(args.output, pipeline.output_shape(source.shape), source.dtype)
+    except (ValueError, ImportError) as e:
+        parser.error(str(e))
+
+    def print_progress(n_done, n_tiles):
+        print(f'\r{n_done}/{n_tiles} tiles', end='', flush=True)
+
+    t1 = time.perf_counter()
+    process_tiled(source, pipeline, output, args.tile, print_progress)
+    if isinstance(output, np.memmap):
+        output.flush()
+    t2 = time.perf_counter()
+    print(f'\n{source.shape} processed in {t2 - t1:.2f} s (halo {pipeline.halo()} px)')
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+"""*video_source* file.
+
+*video_source* file that contains :
+
+    * :class::FrameRateCounter
+    * :class::VideoSource
+
+Frames of a camera (or of a video file standing in for a camera) are read by
+a capture thread into a small ring buffer. When the buffer is full, the oldest
+frames are dropped : the consumer always gets the newest frame and never
+builds up a backlog.
+
+.. note:: LEnsE - Institut d'Optique - version 0.1
+
+.. moduleauthor:: Julien VILLEMEJANE <julien.villemejane@institutoptique.fr>
+"""
+
+import threading
+import time
+from collections import deque
+
+import numpy as np
+import cv2 as cv
+from PyQt6.QtCore import QThread, pyqtSignal
+
+
+class FrameRateCounter:
+    """
+    Class to measure a rate of frames (smoothed).
+
+    :param fps: Smoothed number of frames per second.
+    :type fps: float
+
+    """
+
+    def __init__(self, smoothing: float = 0.1) -> None:
+        """
+        Initialize the FrameRateCounter object.
+
+        :param smoothing: Weight of the last frame in the average. Default 0.1.
+        :type smoothing: float
+
+        """
+        self.smoothing = smoothing
+        self.fps = 0.0
+        self._last_time = None
+
+    def tick(self, now: float = None) -> float:
+        """
+        Count a new frame.
+
+        :param now: Time of the frame (time.perf_counter). Default None, current time.
+        :type now: float
+
+        :return: Smoothed number of frames per second.
+        :rtype: float
+
+        """
+        if now is None:
+            now = time.perf_counter()
+        if self._last_time is not None and now > self._last_time:
+            fps = 1.0 / (now - self._last_time)
+            if self.fps == 0:
+                self.fps = fps
+            else:
+                self.fps += self.smoothing * (fps - self.fps)
+        self._last_time = now
+        return self.fps
+
+    def reset(self) -> None:
+        """
+        Reset the counter.
+
+        """
+        self.fps = 0.0
+        self._last_time = None
+
+
+class VideoSource(QThread):
+    """Read frames of a camera or a video file in a thread. Children of QThread.
+
+    The signal *frame_ready* is emitted when a new frame is put in the
+    empty buffer (the notifications do not pile up if the consumer is slow).
+    The signal *error* is emitted (with a message) if the source can not be
+    opened or read.
+
+    :param capture_counter: Rate of the captured frames.
+    :type capture_counter: FrameRateCounter
+    :param dropped: Number of frames dropped (never read by the consumer).
+    :type dropped: int
+
+    """
+
+    frame_ready = pyqtSignal()
+    error = pyqtSignal(str)
+
+    def __init__(self, source=0, buffer_size: int = 2, loop: bool = True) -> None:
+        """
+        Default constructor of the class.
+
+        :param source: Index of the camera, or path of a video file. Default 0.
+        :type source: int | str
+        :param buffer_size: Number of frames kept in the buffer. Default 2.
+        :type buffer_size: int
+        :param loop: Play a video file in a loop. Default True.
+        :type loop: bool
+
+        """
+        super().__init__()
+        self.source = source
+        self.loop = loop
+        self.capture_counter = FrameRateCounter()
+        self.dropped = 0
+        self._frames = deque(maxlen=buffer_size)  # (pixels, timestamp)
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+
+    def is_file(self) -> bool:
+        """
+        Return True if the source is a video file.
+
+        """
+        return isinstance(self.source, str)
+
+    def get_latest(self) -> tuple[np.ndarray, float]:
+        """
+        Return the newest frame and empty the buffer.
+
+        :return: Pixels of the frame (BGR) and time of the capture
+            (time.perf_counter), or None if there is no new frame.
+        :rtype: tuple[np.ndarray, float]
+
+        """
+        with self._lock:
+            if len(self._frames) == 0:
+                return None
+            frame = self._frames.pop()
+            self.dropped += len(self._frames)
+            self._frames.clear()
+        return frame
+
+    def stop(self) -> None:
+        """
+        Stop the capture and wait for the end of the thread.
+
+        """
+        self._stop_event.set()
+        self.wait()
+
+    def run(self) -> None:
+        """
+        Read the frames. Executed in the thread.
+
+        """
+        capture = cv.VideoCapture(self.source)
+        if not capture.isOpened():
+            self.error.emit(f'VideoSource: {self.source} can not be opened')
+            return
+        # A video file is played at its own frame rate, as a camera.
+        period = 0
+        if self.is_file():
+            file_fps = capture.get(cv.CAP_PROP_FPS)
+            if file_fps > 0:
+                period = 1.0 / file_fps
+        next_time = time.perf_counter()
+        try:
+            while not self._stop_event.is_set():
+                success, pixels = capture.read()
+                if not success:
+                    if self.is_file() and self.loop and capture.get(cv.CAP_PROP_POS_FRAMES) > 0:
+                        capture.set(cv.CAP_PROP_POS_FRAMES, 0)
+                        continue
+                    self.error.emit(f'VideoSource: no more frames from {self.source}')
+                    break
+                timestamp = time.perf_counter()
+                self.capture_counter.tick(timestamp)
+                with self._lock:
+                    # Only one notification is waiting : the consumer reads the newest frame.
+                    notify = len(self._frames) == 0
+                    if len(self._frames) == self._frames.maxlen:
+                        self.dropped += 1
+                    self._frames.append((pixels, timestamp))
+                if notify:
+                    self.frame_ready.emit()
+                if period > 0:
+                    next_time = max(next_time + period, timestamp)
+                    self._stop_event.wait(max(0.0, next_time - time.perf_counter()))
+        finally:
+            capture.release()
+
+
+if __name__ == "__main__":
+    import sys
+    from PyQt6.QtCore import QCoreApplication, QTimer
+
+    def action_frame():
+        frame = video.get_latest()
+        if frame is not None:
+            pixels, timestamp = frame
+            # Slow consumer : the frames are dropped, no backlog
+            time.sleep(0.1)
+            print(f'{pixels.shape} / latency {(time.perf_counter() - timestamp) * 1000:.1f} ms / '
+                  f'capture {video.capture_counter.fps:.1f} fps / dropped {video.dropped}')
+
+    app = QCoreApplication(sys.argv)
+    video = VideoSource(sys.argv[1] if len(sys.argv) > 1 else 0)
+    video.frame_ready.connect(action_frame)
+    video.error.connect(print)
+    video.start()
+    QTimer.singleShot(3000, app.quit)
+    app.exec()
+    video.stop()
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Outils Numériques pour l'Ingénieur.e en Physique.
+
+Mini-Project: Illuminance Map
+File Name: illuminance_service.py
+
+This file contains the implementation of the IlluminanceService class, which computes the illuminance maps of the planes of a scene.
+Each map is computed only once for a given state of the system (version of the scene) and kept in a cache.
+Maps can be computed progressively, from a coarse grid to the grid of the planes, so that large scenes give feedback early,
+and the computation can be cancelled at any time.
+
+It is part of the course project "Outils Numériques pour l'Ingénieur.e en Physique" and was developed by Marion Bonvarlet and Dorian Mendes.
+
+Created on Thi Apr 11, 2024
+
+@author:
+    - Marion Bonvarlet
+    - Dorian Mendes
+"""
+
+from collections import OrderedDict
+import threading
+
+
+class IlluminanceService():
+    """
+    Computes and caches the illuminance maps of the planes of a scene.
+
+    Attributes
+    ----------
+    version : int
+        Version of the scene of the maps in the cache. Maps of another version are removed.
+    max_maps : int
+        Maximum number of maps in the cache (least recently used maps are removed first).
+    computed_maps : int
+        Number of maps computed since the creation of the service.
+
+    Methods
+    -------
+    __init__(self, max_maps=64)
+        Initializes an empty cache.
+
+    get_illuminance(self, plane, scene, resolution=None, cancel_event=None) -> tuple
+        Returns the grid and the illuminance map of a plane, computed only if it is not in the cache.
+
+    refine(self, scene, resolutions=(20, None), cancel_event=None)
+        Yields the maps of all the planes, from the coarsest to the finest grid.
+
+    clear(self)
+        Removes all the maps of the cache.
+    """
+
+    def __init__(self, max_maps: int = 64) -> None:
+        """
+        Initialize an empty cache.
+
+        Parameters
+        ----------
+        max_maps : int, optional
+            Maximum number of maps in the cache. Default is 64.
+        """
+        self.version = None
+        self.max_maps = max_maps
+        self.computed_maps = 0
+        self._maps = OrderedDict()
+
+    def clear(self) -> None:
+        """
+        Remove all the maps of the cache.
+        """
+        self._maps.clear()
+        self.version = None
+
+    @staticmethod
+    def get_shape(plane, resolution: int = None) -> tuple:
+        """
+        Get the number of points of the grid of a plane at a given resolution.
+
+        Parameters
+        ----------
+        plane : Plane
+            Plane of the system.
+        resolution : int, optional
+            Maximum number of points along each axis. Default is None, the grid of the plane.
+
+        Returns
+        -------
+        tuple
+            Number of points (N_x, N_y) of the grid.
+        """
+        if resolution is None:
+            return plane.N_x, plane.N_y
+        return min(resolution, plane.N_x), min(resolution, plane.N_y)
+
+    def get_illuminance(self, plane, scene, resolution: int = None, cancel_event: threading.Event = None) -> tuple:
+        """
+        Get the grid and the illuminance map of a plane, computed only if it is not in the cache.
+
+        Parameters
+        ----------
+        plane : Plane
+            Plane of the scene.
+        scene : Scene
+            Light sources and planes. The cache is cleared when its version changes.
+        resolution : int, optional
+            Maximum number of points along each axis. Default is None, the grid of the plane.
+        cancel_event : threading.Event, optional
+            Event set to cancel the computation. Default is None.
+
+        Returns
+        -------
+        tuple or None
+            x, y, z-coordinates of the points and illuminance E, or None if the computation was cancelled.
+        """
+        if scene.version != self.version:
+            self._maps.clear()
+            self.version = scene.version
+        N_x, N_y = self.get_shape(plane, resolution)
+        key = (plane, N_x, N_y)
+        if key in self._maps:
+            self._maps.move_to_end(key)
+            return self._maps[key]
+
+        if (N_x, N_y) == (plane.N_x, plane.N_y):
+            x, y, z = plane.x, plane.y, plane.z
+        else:
+            x, y, z = plane.get_grid(N_x, N_y)
+        E = scene.compute_illuminance(x, y, z, (plane.a, plane.b, plane.c), cancel_event)
+        if E is None:
+            return None
+        self.computed_maps += 1
+        self._maps[key] = (x, y, z, E)
+        while len(self._maps) > self.max_maps:
+            self._maps.popitem(last=False)
+        return self._maps[key]
+
+    def refine(self, scene, resolutions: tuple = (20, None), cancel_event: threading.Event = None):
+        """
+        Yield the illuminance maps of all the planes of a scene, from the coarsest to the finest grid.
+
+        Parameters
+        ----------
+        scene : Scene
+            Light sources and planes.
+        resolutions : tuple, optional
+            Maximum numbers of points along each axis, from the coarsest grid (None for the grid of the planes).
+            Default is (20, None).
+        cancel_event : threading.Event, optional
+            Event set to stop the refinement. Default is None.
+
+        Yields
+        ------
+        tuple
+            Resolution and list of the maps (x, y, z, E) of the planes. Grids identical to the previous ones are not yielded again,
+            and nothing is yielded for a scene without plane.
+        """
+        if len(scene.planes) == 0:
+            return
+        previous_shapes = None
+        for resolution in resolutions:
+            shapes = [self.get_shape(plane, resolution) for plane in scene.planes]
+            if shapes == previous_shapes:
+                continue
+            maps = []
+            for plane in scene.planes:
+                result = self.get_illuminance(plane, scene, resolution, cancel_event)
+                if result is None:
+                    return
+                maps.append(result)
+            previous_shapes = shapes
+            yield resolution, maps
+
+
+if __name__ == '__main__':
+    import time
+    from light_source import LightSource
+    from plane import Plane
+    from scene import Scene
+
+    scene = Scene()
+    scene.add_light_source(LightSource(x=0, y=0, z=2, elevation_angle=0, azimuth_angle=0, intensity=100, beam_divergence_angle=30))
+    scene.add_plane(Plane([-1, 1], [-1, 1], [0, 0, 1], [0, 0, 0], N_x=200, N_y=200))
+    service = IlluminanceService()
+
+    for resolution, maps in service.refine(scene):
+        print(f"Resolution {resolution}: max illuminance {max(E.max() for x, y, z, E in maps):.2f}")
+    # Same version of the scene: nothing is computed again
+    list(service.refine(scene))
+    print(f"{service.computed_maps} maps computed")
+
+    # Cancellation after 10 ms, with many light sources
+    for k in range(2000):
+        scene.add_light_source(LightSource(x=0, y=0, z=2, elevation_angle=0, azimuth_angle=0, intensity=100, beam_divergence_angle=30))
+    cancel_event = threading.Event()
+    threading.Timer(0.01, cancel_event.set).start()
+    t = time.perf_counter()
+    levels = [resolution for resolution, maps in service.refine(scene, cancel_event=cancel_event)]
+    print(f"Cancelled after {time.perf_counter() - t:.3f} s, levels computed: {levels}")
@@ -33,10 +33,6 @@ class LightSource():
 
     Attributes
     ----------
-    instances : list
-        List containing all instances of LightSource created.
-    intensity_max : float
-        Maximum intensity among all light sources.
     x, y, z : float
         Coordinates of the position of the light source.
     elevation_angle : float
@@ -66,9 +62,6 @@ class LightSource():
 
     """
 
-    instances = []
-    intensity_max = 0
-
     def __init__(self, x: float, y: float, z: float, elevation_angle: float, azimuth_angle: float, intensity: float, beam_divergence_angle: float) -> None:
         """
         Initialize a LightSource object with the given parameters.
@@ -91,9 +84,6 @@ class LightSource():
         - `elevation_angle` is measured in degrees and is given for the negative z-axis.
         - `azimuth_angle` is measured in degrees and is given for the xy-plane.
         """
-        # Add the newly created instance to 'instances'
-        self.__class__.instances.append(self)
-
         # Initialize attributes
         self.x = x
         self.y = y
@@ -108,10 +98,8 @@ class LightSource():
         self.y_dir = sin(self.elevation_angle) * sin(self.azimuth_angle)
         self.z_dir = cos(self.elevation_angle)
 
-        #  Calculate intensity and update maximum intensity
+        # Maximum intensity
         self.intensity = intensity
-        self.__class__.intensity_max = max(
-            self.__class__.intensity_max, self.intensity)
 
         # Angle of divergence of the light beam
         self.beam_divergence_angle = beam_divergence_angle
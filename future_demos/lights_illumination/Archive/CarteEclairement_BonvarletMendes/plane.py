@@ -29,8 +29,6 @@ class Plane():
 
     Attributes
     ----------
-    instances : list
-        List containing all instances of planes created.
     x_min, y_min, z_min : float
         Minimum values of the x, y, and z-coordinates defining the boundaries of the plane.
     x_max, y_max, z_max : float
@@ -41,19 +39,22 @@ class Plane():
         Meshgrid array containing y-coordinates of points in the plane.
     z : ndarray
         Array containing z-coordinates of points in the plane, calculated based on the plane equation.
+    N_x, N_y : int
+        Number of points along the x-axis and the y-axis of the meshgrid.
 
     Methods
     -------
     __init__(self, x_lim, y_lim, normal_vector, point_in_plane, N_x, N_y)
         Initializes a plane object with the given parameters.
 
+    get_grid(self, N_x=None, N_y=None) -> tuple
+        Returns the meshgrid of the plane with another number of points.
+
     Notes
     -----
     The plane should not be vertical (a wall), so the coefficient c in the normal vector must not be 0.
     """
 
-    instances = []
-
     def __init__(self, x_lim: list, y_lim: list, normal_vector: list, point_in_plane: list, N_x: int, N_y: int) -> None:
         """
         Initialize a plane object with the given parameters.
@@ -83,21 +84,38 @@ class Plane():
             raise ValueError(
                 "The plane should not be vertical (a wall). The coefficient 'c' in the normal vector must not be 0.")
 
-        # Add the newly created instance to 'instances'
-        self.__class__.instances.append(self)
-
         # Initialize attributes
         self.x_min, self.x_max = x_min, x_max
         self.y_min, self.y_max = y_min, y_max
         self.a, self.b, self.c = a, b, c
+        self.point_in_plane = (x0, y0, z0)
+        self.N_x, self.N_y = N_x, N_y
+
+        # Create meshgrid for x and y coordinates, and z-coordinates based on the plane equation
+        self.x, self.y, self.z = self.get_grid()
 
-        # Create meshgrid for x and y coordinates
-        x = np.linspace(self.x_min, self.x_max, N_x)
-        y = np.linspace(self.y_min, self.y_max, N_y)
-        self.x, self.y = np.meshgrid(x, y)
+    def get_grid(self, N_x: int = None, N_y: int = None) -> tuple:
+        """
+        Get the meshgrid of the plane with a given number of points.
 
-        # Calculate z-coordinates based on the plane equation
-        self.z = self.a/self.c*(x0-self.x) + self.b/self.c*(y0-self.y) + z0
+        Parameters
+        ----------
+        N_x : int, optional
+            Number of points along the x-axis. Default is None, the number of points of the plane.
+        N_y : int, optional
+            Number of points along the y-axis. Default is None, the number of points of the plane.
+
+        Returns
+        -------
+        tuple of ndarray
+            x, y and z-coordinates of the points of the meshgrid.
+        """
+        x0, y0, z0 = self.point_in_plane
+        x = np.linspace(self.x_min, self.x_max, self.N_x if N_x is None else N_x)
+        y = np.linspace(self.y_min, self.y_max, self.N_y if N_y is None else N_y)
+        x, y = np.meshgrid(x, y)
+        z = self.a/self.c*(x0-x) + self.b/self.c*(y0-y) + z0
+        return x, y, z
 
 
 if __name__ == '__main__':
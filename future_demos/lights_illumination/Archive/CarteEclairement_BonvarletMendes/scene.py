@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Outils Numériques pour l'Ingénieur.e en Physique.
+
+Mini-Project: Illuminance Map
+File Name: scene.py
+
+This file contains the implementation of the Scene class, which holds the light sources and the surfaces of a system.
+The parameters of the light sources are also stored as arrays, to evaluate all the sources at once.
+
+The illuminance of a surface is computed by patches (a grid of small blocks of points of the surface).
+Each patch is bounded by a sphere : the sources that cannot reach the patch are culled before the evaluation,
+either because they are behind the plane, or because the whole patch is in the negligible tail of their gaussian beam.
+The sources are first binned into a grid of cells of the plane, by the footprint of their beam (index of the sources) :
+only the sources of the cell of a patch are tested. For scenes with many narrow-beam sources, most of the pairs
+source / patch are never tested nor evaluated.
+
+It is part of the course project "Outils Numériques pour l'Ingénieur.e en Physique" and was developed by Marion Bonvarlet and Dorian Mendes.
+
+Created on Thi Apr 11, 2024
+
+@author:
+    - Marion Bonvarlet
+    - Dorian Mendes
+"""
+
+import threading
+
+import numpy as np
+
+from auxiliary_functions import angle_between_two_vectors
+
+
+class Scene():
+    """
+    Represents the light sources and the surfaces of a system.
+
+    Attributes
+    ----------
+    lights : list
+        Light sources (LightSource objects) of the scene.
+    planes : list
+        Surfaces (Plane objects) of the scene.
+    version : int
+        Version of the scene, incremented each time a light source or a surface is added.
+    patch_size : int
+        Number of points along each axis of the patches of the surfaces.
+    min_relative_intensity : float
+        Sources whose intensity towards a patch is lower than this fraction of their maximum intensity are culled.
+
+    Methods
+    -------
+    __init__(self, patch_size=16, min_relative_intensity=1e-6)
+        Initializes an empty scene.
+
+    add_light_source(self, light)
+        Adds a light source to the scene.
+
+    add_plane(self, plane)
+        Adds a surface to the scene.
+
+    get_source_arrays(self) -> tuple
+        Returns the positions, directions, intensities and divergence angles of all the sources.
+
+    get_visible_sources(self, x, y, z, normal_vector, candidates=None) -> ndarray
+        Returns the indices of the sources that can reach a patch.
+
+    index_sources(self, centers, radius, normal_vector) -> list
+        Returns the indices of the sources that may reach each patch of a surface.
+
+    compute_illuminance(self, x, y, z, normal_vector, cancel_event=None) -> ndarray
+        Calculates the illuminance of all the sources on the points of a surface.
+    """
+
+    def __init__(self, patch_size: int = 16, min_relative_intensity: float = 1e-6) -> None:
+        """
+        Initialize an empty scene.
+
+        Parameters
+        ----------
+        patch_size : int, optional
+            Number of points along each axis of the patches of the surfaces. Default is 16.
+        min_relative_intensity : float, optional
+            Fraction of the maximum intensity of a source under which it is culled. Default is 1e-6 (0 disables the culling of the tails).
+        """
+        self.lights = []
+        self.planes = []
+        self.version = 0
+        self.patch_size = patch_size
+        self.min_relative_intensity = min_relative_intensity
+        self._arrays = None  # Parameters of the sources, as arrays
+
+    @property
+    def intensity_max(self) -> float:
+        """
+        Maximum intensity among all light sources (0 without source).
+        """
+        return max((light.intensity for light in self.lights), default=0)
+
+    def add_light_source(self, light) -> None:
+        """
+        Add a light source to the scene.
+
+        Parameters
+        ----------
+        light : LightSource
+            Light source to add.
+        """
+        self.lights.append(light)
+        self._arrays = None
+        self.version += 1
+
+    def add_plane(self, plane) -> None:
+        """
+        Add a surface to the scene.
+
+        Parameters
+        ----------
+        plane : Plane
+            Surface to add.
+        """
+        self.planes.append(plane)
+        self.version += 1
+
+    def get_source_arrays(self) -> tuple:
+        """
+        Get the parameters of all the light sources, as arrays.
+
+        Returns
+        -------
+        tuple of ndarray
+            Positions (N, 3), directions of the light (N, 3), maximum intensities (N,) and divergence angles in degrees (N,).
+        """
+        if self._arrays is None:
+            positions = np.array([(light.x, light.y, light.z) for light in self.lights], dtype=float).reshape(-1, 3)
+            directions = np.array([light.get_light_direction() for light in self.lights], dtype=float).reshape(-1, 3)
+            intensities = np.array([light.intensity for light in self.lights], dtype=float)
+            divergences = np.array([light.beam_divergence_angle for light in self.lights], dtype=float)
+            self._arrays = (positions, directions, intensities, divergences)
+        return self._arrays
+
+    def get_visible_sources(self, x: np.ndarray, y: np.ndarray, z: np.ndarray, normal_vector: tuple, candidates: np.ndarray = None) -> np.ndarray:
+        """
+        Get the indices of the light sources that can reach a patch of a surface.
+
+        Parameters
+        ----------
+        x, y, z : ndarray
+            Coordinates of the points of the patch.
+        normal_vector : tuple
+            Coefficients (a, b, c) of the normal vector of the surface.
+        candidates : ndarray, optional
+            Indices of the sources to test (from index_sources). Default is None, all the sources.
+
+        Returns
+        -------
+        ndarray
+            Indices of the sources in front of the surface, whose beam is not negligible on the patch.
+
+        Notes
+        -----
+        The patch is bounded by a sphere of center C and radius r. Seen from a source at a distance d of C, all the points
+        of the patch are in a cone of half-angle arcsin(r / d) around the direction of C : the smallest angle between the
+        direction of the light and a point of the patch gives the highest intensity of the source on the patch.
+        """
+        positions, directions, intensities, divergences = self.get_source_arrays()
+        if candidates is None:
+            candidates = np.arange(len(positions))
+        positions, directions, divergences = positions[candidates], directions[candidates], divergences[candidates]
+        points = np.column_stack((x.ravel(), y.ravel(), z.ravel()))
+        center = points.mean(axis=0)
+        radius = np.sqrt(np.max(np.sum((points - center)**2, axis=1)))
+
+        # Sources behind the plane (or in the plane) do not light it
+        normal = np.asarray(normal_vector, dtype=float)
+        normal = normal / np.linalg.norm(normal)
+        to_sources = positions - center
+        in_front = to_sources @ normal > 0
+
+        # Smallest angle between the direction of the light and a point of the patch
+        distances = np.sqrt(np.sum(to_sources**2, axis=1))
+        distances = np.maximum(distances, np.finfo(float).tiny)
+        cos_center = -np.sum(to_sources * directions, axis=1) / distances
+        angle_center = np.arccos(np.clip(cos_center, -1, 1))
+        angle_patch = np.arcsin(np.minimum(radius / distances, 1))
+        angle_min = np.where(radius < distances, np.maximum(angle_center - angle_patch, 0), 0)
+        relative_intensity = np.exp(-4 * np.log(2) * (np.rad2deg(angle_min) / divergences)**2)
+        reached = relative_intensity >= self.min_relative_intensity
+
+        return candidates[in_front & reached]
+
+    def index_sources(self, centers: np.ndarray, radius: float, normal_vector: tuple) -> list:
+        """
+        Get the indices of the light sources that may reach each patch of a plane surface.
+
+        Parameters
+        ----------
+        centers : ndarray
+            Centers of the bounding spheres of the patches (P, 3).
+        radius : float
+            Largest radius of the bounding spheres of the patches.
+        normal_vector : tuple
+            Coefficients (a, b, c) of the normal vector of the surface.
+
+        Returns
+        -------
+        list of ndarray
+            For each patch, the indices of the sources to test with get_visible_sources.
+
+        Notes
+        -----
+        The plane is divided into square cells, of the size of a patch. Beyond the half-angle theta where the relative
+        intensity of a source is lower than min_relative_intensity, its light is negligible. A source at a height h above
+        the plane, whose direction makes an angle beta with the normal, only lights the points of the disk of radius
+        h * tan(beta + theta) around its projection on the plane (if beta + theta < 90 degrees). Each source is added to
+        the cells covered by this disk (extended by the radius of the patches) : a patch only tests the sources of
+        its cell, and the sources without a bounded footprint. Sources behind the plane are never tested.
+        The cost is O(S + P + number of pairs cell / source), instead of O(S * P) for S sources and P patches.
+        """
+        positions, directions, intensities, divergences = self.get_source_arrays()
+        normal = np.asarray(normal_vector, dtype=float)
+        normal = normal / np.linalg.norm(normal)
+        origin = centers.mean(axis=0)
+        # Orthonormal basis (u, v) of the plane
+        u = np.cross(normal, [1.0, 0.0, 0.0] if abs(normal[0]) < 0.9 else [0.0, 1.0, 0.0])
+        u = u / np.linalg.norm(u)
+        v = np.cross(normal, u)
+        cell = max(2 * radius, np.finfo(float).tiny)
+        patch_cells = np.floor(np.column_stack(((centers - origin) @ u, (centers - origin) @ v)) / cell).astype(int)
+        cell_min, cell_max = patch_cells.min(axis=0), patch_cells.max(axis=0)
+
+        # Footprint of the beams on the plane
+        heights = (positions - origin) @ normal
+        cos_beta = -(directions @ normal) / np.maximum(np.linalg.norm(directions, axis=1), np.finfo(float).tiny)
+        beta = np.arccos(np.clip(cos_beta, -1, 1))
+        if self.min_relative_intensity > 0:
+            theta = np.deg2rad(divergences * np.sqrt(np.log(1 / self.min_relative_intensity) / (4 * np.log(2))))
+        else:
+            theta = np.full(len(positions), np.inf)
+        extreme = beta + theta
+        bounded = extreme < np.pi / 2
+        footprints = np.where(bounded, heights * np.tan(np.where(bounded, extreme, 0)), np.inf) + radius
+        feet = positions - heights[:, None] * normal - origin
+        feet = np.column_stack((feet @ u, feet @ v))
+
+        cells = {}
+        unbounded = []
+        for k in np.flatnonzero(heights > 0):
+            if not bounded[k]:
+                unbounded.append(k)
+                continue
+            low = np.maximum(np.floor((feet[k] - footprints[k]) / cell).astype(int), cell_min)
+            high = np.minimum(np.floor((feet[k] + footprints[k]) / cell).astype(int), cell_max)
+            if np.any(low > high):
+                continue  # Footprint out of the surface
+            if (high[0] - low[0] + 1) * (high[1] - low[1] + 1) > len(centers):
+                unbounded.append(k)  # Large footprint: tested by all the patches
+                continue
+            for i in range(low[0], high[0] + 1):
+                for j in range(low[1], high[1] + 1):
+                    cells.setdefault((i, j), []).append(k)
+        return [np.array(sorted(cells.get(tuple(c), []) + unbounded), dtype=int) for c in patch_cells]
+
+    def _patch_illuminance(self, x: np.ndarray, y: np.ndarray, z: np.ndarray, normal_vector: tuple, sources: np.ndarray) -> np.ndarray:
+        """
+        Calculate the illuminance of some light sources on the points of a patch (all the sources at once).
+        """
+        positions, directions, intensities, divergences = self.get_source_arrays()
+        a, b, c = normal_vector
+        # Vectors from the sources to the points (sources x points)
+        d_x = x.ravel() - positions[sources, 0, None]
+        d_y = y.ravel() - positions[sources, 1, None]
+        d_z = z.ravel() - positions[sources, 2, None]
+
+        angle_alpha = angle_between_two_vectors(
+            d_x, d_y, d_z, directions[sources, 0, None], directions[sources, 1, None], directions[sources, 2, None])
+        intensity = intensities[sources, None] * np.exp(
+            -4 * np.log(2) * (np.rad2deg(angle_alpha) / divergences[sources, None])**2)
+        angle_psi = angle_between_two_vectors(a, b, c, -d_x, -d_y, -d_z)
+        d_PS_2 = d_x**2 + d_y**2 + d_z**2
+        E = np.sum(intensity * np.cos(angle_psi) / d_PS_2, axis=0)
+        return E.reshape(x.shape)
+
+    def compute_illuminance(self, x: np.ndarray, y: np.ndarray, z: np.ndarray, normal_vector: tuple, cancel_event: threading.Event = None) -> np.ndarray:
+        """
+        Calculate the illuminance of all the light sources on the points of a surface.
+
+        Parameters
+        ----------
+        x, y, z : ndarray
+            Coordinates of the points of the surface (meshgrid arrays).
+        normal_vector : tuple
+            Coefficients (a, b, c) of the normal vector of the surface.
+        cancel_event : threading.Event, optional
+            Event set to cancel the computation. Default is None.
+
+        Returns
+        -------
+        ndarray or None
+            Illuminance at each point, or None if the computation was cancelled.
+        """
+        E = np.zeros_like(x, dtype=float)
+        if len(self.lights) == 0:
+            return E
+        n_rows, n_cols = x.shape
+        size = self.patch_size
+        patches = [(slice(i, i + size), slice(j, j + size))
+                   for i in range(0, n_rows, size) for j in range(0, n_cols, size)]
+        # Bounding spheres of the patches
+        centers = np.zeros((len(patches), 3))
+        radius = 0
+        for k, patch in enumerate(patches):
+            points = np.column_stack((x[patch].ravel(), y[patch].ravel(), z[patch].ravel()))
+            centers[k] = points.mean(axis=0)
+            radius = max(radius, np.sqrt(np.max(np.sum((points - centers[k])**2, axis=1))))
+        candidates = self.index_sources(centers, radius, normal_vector)
+
+        for patch, patch_candidates in zip(patches, candidates):
+            if cancel_event is not None and cancel_event.is_set():
+                return None
+            if patch_candidates.size == 0:
+                continue
+            sources = self.get_visible_sources(x[patch], y[patch], z[patch], normal_vector, patch_candidates)
+            if sources.size > 0:
+                E[patch] = self._patch_illuminance(x[patch], y[patch], z[patch], normal_vector, sources)
+        return E
+
+
+if __name__ == '__main__':
+    import time
+    from light_source import LightSource
+    from plane import Plane
+
+    # Ceiling of 20 x 20 narrow-beam sources, 3 m above the floor
+    scene = Scene()
+    for x in np.linspace(-4, 4, 20):
+        for y in np.linspace(-4, 4, 20):
+            scene.add_light_source(LightSource(x, y, 3, elevation_angle=0, azimuth_angle=0,
+                                               intensity=100, beam_divergence_angle=5))
+    floor = Plane([-5, 5], [-5, 5], [0, 0, 1], [0, 0, 0], N_x=200, N_y=200)
+    scene.add_plane(floor)
+
+    t = time.perf_counter()
+    E = scene.compute_illuminance(floor.x, floor.y, floor.z, (floor.a, floor.b, floor.c))
+    t_culled = time.perf_counter() - t
+
+    # Without culling: every source on every point
+    t = time.perf_counter()
+    E_all = scene._patch_illuminance(floor.x, floor.y, floor.z, (floor.a, floor.b, floor.c), np.arange(len(scene.lights)))
+    t_all = time.perf_counter() - t
+    print(f"With culling: {t_culled:.2f} s / without culling: {t_all:.2f} s / "
+          f"max relative difference: {np.max(np.abs(E - E_all)) / np.max(E_all):.1e}")
@@ -19,14 +19,17 @@ Created on Thi Apr 11, 2024
     - Dorian Mendes
 """
 
+import threading
+
 import matplotlib.pyplot as plt
 import matplotlib.colors as mcolors
 import matplotlib.cm as cm
 import numpy as np
 
-from auxiliary_functions import angle_between_two_vectors
+from illuminance_service import IlluminanceService
 from light_source import LightSource
 from plane import Plane
+from scene import Scene
 
 
 class System():
@@ -45,11 +48,15 @@ class System():
         Minimum and maximum values of the z-coordinate defining the boundaries of the system.
     irradiance_cmap : LinearSegmentedColormap
         Custom colormap for visualizing irradiance.
+    scene : Scene
+        Light sources and surfaces of the system.
+    illuminance_service : IlluminanceService
+        Service computing (once per version of the scene) the illuminance maps of the surfaces.
 
     Methods
     -------
     __init__(self)
-        Initializes a System object with an empty list of light sources and plans.
+        Initializes a System object with an empty scene (no light sources and no plans).
 
     add_light_source(self, x, y, z, elevation_angle, azimuth_angle, intensity, beam_divergence_angle)
         Adds a new light source to the system with the specified parameters.
@@ -63,13 +70,13 @@ class System():
     plot_sources(self)
         Plots the light sources in the system on the 3D axes.
 
-    plot_illuminance(self)
-        Plots the irradiance distribution in the system on the 3D axes.
+    plot_illuminance(self, resolutions=(20, None), cancel_event=None)
+        Plots the irradiance distribution in the system on the 3D axes, from a coarse to a fine map.
     """
 
     def __init__(self) -> None:
         """
-        Initialize a System object with an empty list of light sources and plans.
+        Initialize a System object with an empty scene (no light sources and no plans).
 
         Attributes
         ----------
@@ -83,6 +90,10 @@ class System():
             Minimum and maximum values of the z-coordinate defining the boundaries of the system.
         irradiance_cmap : LinearSegmentedColormap
             Custom colormap for visualizing irradiance.
+        scene : Scene
+            Light sources and surfaces of the system.
+        illuminance_service : IlluminanceService
+            Service computing the illuminance maps of the surfaces.
         """
         # Initialize 3D axes object
         self.ax = plt.figure(
@@ -104,6 +115,10 @@ class System():
         self.irradiance_cmap = mcolors.LinearSegmentedColormap.from_list(
             'lamp_light', [(0, 0, 0), (1, 1, 0.8)], N=256)
 
+        # Light sources and surfaces, and their illuminance maps computed once for each version of the scene
+        self.scene = Scene()
+        self.illuminance_service = IlluminanceService()
+
     def add_light_source(self, x: float, y: float, z: float, elevation_angle: float, azimuth_angle: float, intensity: float, beam_divergence_angle: float) -> None:
         """
         Initialize a LightSource object with the given parameters.
@@ -127,8 +142,8 @@ class System():
         - `azimuth_angle` is measured in degrees and is given for the xy-plane.
         """
         # Create a new LightSource instance
-        LightSource(x, y, z, elevation_angle, azimuth_angle,
-                    intensity, beam_divergence_angle)
+        self.scene.add_light_source(LightSource(x, y, z, elevation_angle, azimuth_angle,
+                                                intensity, beam_divergence_angle))
 
     def add_surface(self, x_lim: list, y_lim: list, normal_vector: list, point_in_plan: list, N_x=50, N_y=50) -> None:
         """
@@ -151,7 +166,7 @@ class System():
             Number of points along the y-axis for the meshgrid. Default is 50.
         """
         # Create a new plane instance
-        Plane(x_lim, y_lim, normal_vector, point_in_plan, N_x, N_y)
+        self.scene.add_plane(Plane(x_lim, y_lim, normal_vector, point_in_plan, N_x, N_y))
 
     def update_boundaries(self, x: float, y: float, z: float) -> None:
         """
@@ -187,7 +202,7 @@ class System():
         The cones representing the light sources are oriented according to the direction of emitted light, and their color is determined by the intensity (intensity) of each source.
         """
         # Plot light sources as cones
-        for light in LightSource.instances:
+        for light in self.scene.lights:
             self.update_boundaries(light.x, light.y, light.z)
 
             # Function to generate rotation matrix for rotating a vector around a specified axis by a given angle
@@ -254,11 +269,11 @@ class System():
                 rot_mat[2, 0]*X+rot_mat[2, 1]*Y+rot_mat[2, 2]*Z
 
             self.ax.plot_surface(X + light.x, Y + light.y, Z + light.z, alpha=0.75,
-                                 color=cm.Wistia(light.intensity/LightSource.intensity_max))
+                                 color=cm.Wistia(light.intensity/self.scene.intensity_max))
 
         # Create a ScalarMappable instance specific to intensity
         sm_intensity = cm.ScalarMappable(cmap=cm.Wistia, norm=plt.Normalize(
-            vmin=0, vmax=LightSource.intensity_max))
+            vmin=0, vmax=self.scene.intensity_max))
         sm_intensity.set_array([])
 
         # Add a colorbar linked to the ScalarMappable instance specific to intensity
@@ -272,56 +287,37 @@ class System():
         # self.ax.scatter(light.x, light.y, light.z, color='blue')
         # self.ax.quiver(light.x, light.y, light.z, light.x_dir, light.y_dir, light.z_dir, color='blue')
 
-    def plot_illuminance(self) -> None:
+    def plot_illuminance(self, resolutions: tuple = (20, None), cancel_event: threading.Event = None) -> None:
         """
         Plot the irradiance distribution over the defined surfaces in the system.
 
         Calculates and visualizes the irradiance distribution over the surfaces defined in the system,
         taking into account the illumination from all light sources.
 
+        Parameters
+        ----------
+        resolutions : tuple, optional
+            Maximum numbers of points along each axis of the successive maps, from the coarsest
+            (None for the grid of the surfaces). Default is (20, None).
+        cancel_event : threading.Event, optional
+            Event set to stop the refinement of the maps. Default is None.
+
         Notes
         -----
         The irradiance distribution is visualized using a color map, where different colors represent
         different irradiance values, with higher irradiance indicated by warmer colors.
 
-        """
-        max_irradiance = 0
+        The map of each surface is computed only once by the illuminance service (as long as the system
+        is not modified). A coarse map is drawn first, then replaced by the finer ones.
 
-        # Calculer la valeur maximale de l'irradiance parmi toutes les surfaces
-        for plane in Plane.instances:
+        """
+        for plane in self.scene.planes:
             self.update_boundaries(plane.x.min(), plane.y.min(), plane.z.min())
             self.update_boundaries(plane.x.max(), plane.y.max(), plane.z.max())
 
-            E = np.zeros_like(plane.x)
-
-            for light in LightSource.instances:
-                angle_psi = angle_between_two_vectors(
-                    plane.a, plane.b, plane.c, light.x-plane.x, light.y-plane.y, light.z-plane.z)
-                d_PS_2 = (light.x - plane.x)**2 + (light.y -
-                                                   plane.y)**2 + (light.z - plane.z)**2
-                E += light.get_intensity(plane.x, plane.y,
-                                         plane.z) * np.cos(angle_psi) / d_PS_2
-            max_irradiance = max(max_irradiance, np.max(E))
-
-        # Tracer les surfaces avec une échelle de couleur normalisée
-        for plane in Plane.instances:
-            E = np.zeros_like(plane.x)
-
-            for light in LightSource.instances:
-                angle_psi = angle_between_two_vectors(
-                    plane.a, plane.b, plane.c, light.x-plane.x, light.y-plane.y, light.z-plane.z)
-                d_PS_2 = (light.x - plane.x)**2 + (light.y -
-                                                   plane.y)**2 + (light.z - plane.z)**2
-                E += light.get_intensity(plane.x, plane.y,
-                                         plane.z) * np.cos(angle_psi) / d_PS_2
-
-            # Tracer la surface avec l'échelle de couleur normalisée
-            self.ax.plot_surface(
-                plane.x, plane.y, plane.z, facecolors=self.irradiance_cmap(E/max_irradiance), edgecolor='none', rstride=1, cstride=1)
-
-        # Créer une instance de ScalarMappable avec la colormap personnalisée et la valeur maximale de l'éclairement
+        # Créer une instance de ScalarMappable avec la colormap personnalisée, mise à jour à chaque niveau
         sm = cm.ScalarMappable(cmap=self.irradiance_cmap,
-                               norm=plt.Normalize(vmin=0, vmax=max_irradiance))
+                               norm=plt.Normalize(vmin=0, vmax=1))
         sm.set_array([])
 
         # Ajouter une colorbar liée à l'instance ScalarMappable
@@ -331,8 +327,25 @@ class System():
         # Assurer un aspect orthonormé dans l'espace 3D
         self.ax.set_box_aspect([np.ptp([self.x_min, self.x_max]), np.ptp(
             [self.y_min, self.y_max]), np.ptp([self.z_min, self.z_max])])
-        plt.show()
 
+        surfaces = []
+        for resolution, maps in self.illuminance_service.refine(self.scene, resolutions, cancel_event):
+            # Valeur maximale de l'irradiance parmi toutes les surfaces
+            max_irradiance = max((np.max(E) for x, y, z, E in maps), default=0)
+            max_irradiance = max(max_irradiance, np.finfo(float).tiny)
+
+            # Tracer les surfaces avec une échelle de couleur normalisée (à la place du niveau précédent)
+            for surface in surfaces:
+                surface.remove()
+            surfaces = [self.ax.plot_surface(
+                x, y, z, facecolors=self.irradiance_cmap(E/max_irradiance), edgecolor='none', rstride=1, cstride=1)
+                for x, y, z, E in maps]
+            sm.set_norm(plt.Normalize(vmin=0, vmax=max_irradiance))
+            cbar.update_normal(sm)
+            if resolution is not None:
+                # Afficher le niveau grossier avant de calculer le suivant
+                plt.pause(0.001)
+        plt.show()
 
 if __name__ == '__main__':
     # Create an instance of the System class
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""*illuminance_kernel* file.
+
+*illuminance_kernel* file that contains the computation of the illuminance of a set of point sources
+on a set of receiver points : gaussian emission pattern of the sources, cosine of incidence on the receiver
+and inverse-square falloff.
+
+When numba is installed, the illuminance is computed by a compiled kernel, in a single pass per receiver
+point (no temporary arrays), the points being shared between the threads (prange).
+Otherwise, the same formula is evaluated with broadcasted NumPy expressions on (sources x points) arrays.
+
+.. note:: LEnsE - Institut d'Optique - version 0.1
+
+.. moduleauthor:: Julien VILLEMEJANE <julien.villemejane@institutoptique.fr>
+"""
+
+import numpy as np
+
+try:
+    from numba import njit, prange
+    numba_available = True
+except ImportError:
+    numba_available = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        '''Without numba, the kernel stays a Python function (only used for tests of small sizes).'''
+        def decorator(function):
+            return function
+        return decorator
+
+# Factor of the gaussian emission pattern : I = I0 * exp(-4 ln(2) (angle / delta)**2)
+gauss_factor = 4 * np.log(2)
+
+
+def gauss_coefficients(delta):
+    '''Coefficients of the emission pattern of the sources, 4 ln(2) / delta**2.
+
+    :param delta: array (N,), half-angles of emission (in radian)
+    :return: array (N,), coefficients of the gaussian
+    '''
+    return gauss_factor / np.square(np.asarray(delta, dtype=np.float64))
+
+
+@njit(parallel=True, fastmath=True, cache=True)
+def led_illuminance_kernel(p_x, p_y, p_z, normal, positions, directions, I0, gauss):
+    '''Illuminance of all the sources on each receiver point (compiled with numba).
+
+    :param p_x: array (M,), x-axis coordinates of the points (in meter)
+    :param p_y: array (M,), y-axis coordinates of the points (in meter)
+    :param p_z: array (M,), z-axis coordinates of the points (in meter)
+    :param normal: array (3,), unit normal vector of the receiver (towards the sources)
+    :param positions: array (N, 3), positions of the sources (in meter)
+    :param directions: array (N, 3), unit main directions of emission
+    :param I0: array (N,), maximal light intensities
+    :param gauss: array (N,), coefficients of the emission pattern (see gauss_coefficients)
+    :return: array (M,), illuminance at each point
+    '''
+    n_points = p_x.shape[0]
+    n_sources = positions.shape[0]
+    illuminance = np.zeros(n_points)
+    for i in prange(n_points):
+        total = 0.0
+        for j in range(n_sources):
+            d_x = p_x[i] - positions[j, 0]
+            d_y = p_y[i] - positions[j, 1]
+            d_z = p_z[i] - positions[j, 2]
+            dist2 = d_x * d_x + d_y * d_y + d_z * d_z
+            if dist2 <= 0.0:
+                continue
+            dist = np.sqrt(dist2)
+            # Cosine of the angle of incidence, no light when the point is behind
+            cos_i = -(d_x * normal[0] + d_y * normal[1] + d_z * normal[2]) / dist
+            if cos_i <= 0.0:
+                continue
+            cos_a = (d_x * directions[j, 0] + d_y * directions[j, 1] + d_z * directions[j, 2]) / dist
+            cos_a = min(max(cos_a, -1.0), 1.0)
+            angle = np.arccos(cos_a)
+            total += I0[j] * np.exp(-gauss[j] * angle * angle) * cos_i / dist2
+        illuminance[i] = total
+    return illuminance
+
+
+def led_illuminance_numpy(p_x, p_y, p_z, normal, positions, directions, I0, gauss):
+    '''Illuminance of all the sources on each receiver point (broadcasted NumPy expressions).
+
+    Same parameters as led_illuminance_kernel. Temporary arrays have a size (N x M) : the sources
+    and the points must be given by chunks.
+
+    :return: array (M,), illuminance at each point
+    '''
+    n_x, n_y, n_z = normal
+    # Vectors from the sources to the points (sources x points)
+    d_x = p_x - positions[:, 0, None]
+    d_y = p_y - positions[:, 1, None]
+    d_z = p_z - positions[:, 2, None]
+    dist2 = d_x * d_x + d_y * d_y + d_z * d_z
+    np.maximum(dist2, np.finfo(np.float64).tiny, out=dist2)
+    dist = np.sqrt(dist2)
+    # Cosine of the angle of incidence on the receiver
+    cos_i = d_x * n_x + d_y * n_y + d_z * n_z
+    np.divide(cos_i, -dist, out=cos_i)
+    np.maximum(cos_i, 0, out=cos_i)
+    # Angle between the direction of the source and the point
+    angle = d_x * directions[:, 0, None]
+    angle += d_y * directions[:, 1, None]
+    angle += d_z * directions[:, 2, None]
+    angle /= dist
+    np.clip(angle, -1, 1, out=angle)
+    np.arccos(angle, out=angle)
+    np.square(angle, out=angle)
+    angle *= -gauss[:, None]
+    np.exp(angle, out=angle)
+    angle *= I0[:, None]
+    # E = I * cos(i) / d**2
+    angle *= cos_i
+    angle /= dist2
+    return angle.sum(axis=0)
+
+
+if __name__ == "__main__":
+    import time
+
+    rng = np.random.default_rng(0)
+    n_sources, n_points = 100, 10000
+    positions = np.column_stack((rng.uniform(-4, 4, (n_sources, 2)), np.full(n_sources, 3.0)))
+    directions = np.tile([0.0, 0.0, -1.0], (n_sources, 1))
+    I0 = np.ones(n_sources)
+    gauss = gauss_coefficients(np.full(n_sources, np.radians(40)))
+    p_x, p_y = rng.uniform(-5, 5, (2, n_points))
+    p_z = np.zeros(n_points)
+    normal = np.array([0.0, 0.0, 1.0])
+
+    print(f'numba available : {numba_available}')
+    t1 = time.perf_counter()
+    e_kernel = led_illuminance_kernel(p_x, p_y, p_z, normal, positions, directions, I0, gauss)
+    t2 = time.perf_counter()
+    e_numpy = led_illuminance_numpy(p_x, p_y, p_z, normal, positions, directions, I0, gauss)
+    t3 = time.perf_counter()
+    print(f'kernel {t2 - t1:.3f} s / numpy {t3 - t2:.3f} s / same result {np.allclose(e_kernel, e_numpy)}')
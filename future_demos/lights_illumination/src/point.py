@@ -2,6 +2,8 @@
 """*point* file.
 
 *point* file that contains :class::Point. This class modelize a point in a 3D space.
+It also contains :class::PointArray. This class modelize a set of points stored in a single
+(N, 3) array, for large scenes (grids of receivers, ceilings of sources).
 
 .. note:: LEnsE - Institut d'Optique - version 0.1
 
@@ -9,16 +11,106 @@
 """
 
 import numpy as np
+from vector import Vector, VectorArray
 
 class Point:
+    __slots__ = ('x', 'y', 'z')
+
     def __init__(self, x=0, y=0, z=0):
         '''
 
-        :param x:  float, x-axis coordinate of the point 
-        :param y:  float, y-axis coordinate of the point 
-        :param z:  float, z-axis coordinate of the point 
+        :param x:  float, x-axis coordinate of the point
+        :param y:  float, y-axis coordinate of the point
+        :param z:  float, z-axis coordinate of the point
         '''
         self.x = x
         self.y = y
         self.z = z
-        
+
+    def __repr__(self):
+        return f'Point({self.x}, {self.y}, {self.z})'
+
+    def get_coords(self):
+        return self.x, self.y, self.z
+
+    def vector_to(self, point) -> Vector:
+        '''Return the vector from this point to another point.
+
+        :param point:  Point, end of the vector
+        :return: Vector
+        '''
+        return Vector(point.x - self.x, point.y - self.y, point.z - self.z)
+
+
+class PointArray:
+    def __init__(self, coords=None):
+        '''
+
+        :param coords:  array (N, 3), coordinates (x, y, z) of the points
+        '''
+        if coords is None:
+            coords = np.zeros((0, 3))
+        self.coords = np.array(coords, dtype=np.float64).reshape(-1, 3)
+
+    @classmethod
+    def from_points(cls, points):
+        '''Create an array from a list of Point.
+
+        :param points:  list of Point
+        :return: PointArray
+        '''
+        return cls([point.get_coords() for point in points])
+
+    @classmethod
+    def from_grid(cls, x, y, z=0.0):
+        '''Create an array from the coordinates of a grid (as given by np.meshgrid).
+
+        :param x:  array, x-axis coordinates of the points
+        :param y:  array, y-axis coordinates of the points
+        :param z:  float or array, z-axis coordinates of the points
+        :return: PointArray
+        '''
+        x, y, z = np.broadcast_arrays(x, y, z)
+        return cls(np.stack((x.ravel(), y.ravel(), z.ravel()), axis=1))
+
+    def __len__(self):
+        return len(self.coords)
+
+    def __getitem__(self, index):
+        '''Return a Point (integer index) or a PointArray (slice, mask or list of indices).'''
+        if np.ndim(index) == 0 and not isinstance(index, slice):
+            return Point(*self.coords[index].tolist())
+        return PointArray(self.coords[index])
+
+    def __repr__(self):
+        return f'PointArray({len(self)} points)'
+
+    @property
+    def x(self):
+        return self.coords[:, 0]
+
+    @property
+    def y(self):
+        return self.coords[:, 1]
+
+    @property
+    def z(self):
+        return self.coords[:, 2]
+
+    def vector_to(self, point) -> VectorArray:
+        '''Return the vectors from the points to a point (or to the points of another array).
+
+        :param point:  Point or PointArray (same length), ends of the vectors
+        :return: VectorArray
+        '''
+        if isinstance(point, PointArray):
+            return VectorArray(point.coords - self.coords)
+        return VectorArray(np.asarray(point.get_coords(), dtype=np.float64) - self.coords)
+
+    def distance_to(self, point):
+        '''Return the distances from the points to a point (or to the points of another array).
+
+        :param point:  Point or PointArray (same length)
+        :return: array (N,), distances (in meter)
+        '''
+        return self.vector_to(point).get_norm()
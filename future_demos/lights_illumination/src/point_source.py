@@ -49,24 +49,23 @@ class PointSource:
     def led_illumination(self, distance: float, angle: float):
         """
 
-        :param distance:    float, distance (in meter) between light source and the point of view (in meters)
-        :param angle:   float, angle (in radian) between normal vector of the light source and the point of view (in degrees)
+        :param distance:    float, distance (in meter) between light source and the point of view
+        :param angle:   float, angle (in radian) between normal vector of the light source and the point of view
         :return:
             illumination value at a specific distance and angle
 
         help from : https://fr.wikibooks.org/wiki/Photographie/Photom%C3%A9trie/Calculs_photom%C3%A9triques_usuels
         """
-        angle_new = angle * np.pi / 180
-        return self.led_intensity(angle) * np.cos(angle_new) / (distance**2)
+        return self.led_intensity(angle) * np.cos(angle) / (distance**2)
 
     def get_coords(self):
-        return self.position.x, self.position.y, self.position.z
+        return self.position.get_coords()
 
     def get_params(self):
         return self.I0, self.zeta, self.theta
 
     def get_direction_vector(self):
-        return self.direction_vector.ux, self.direction_vector.uy, self.direction_vector.uz
+        return self.direction_vector.get_coords()
 
     def get_radiation_from_angle(self, alpha=None):
         if alpha is None:
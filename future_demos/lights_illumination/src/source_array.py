@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""*source_array* file.
+
+*source_array* file that contains :class::PointSourceArray. This class modelize a set of point sources
+(for example a ceiling of LEDs) stored as arrays : positions, directions, maximal intensities and
+half-angles of emission of all the sources.
+
+The illuminance of all the sources on a grid of points is computed by the compiled kernel of
+*illuminance_kernel* when numba is installed. Otherwise, it is computed with broadcasted NumPy expressions,
+by chunks of sources to limit the memory used. Large grids are also divided in blocks of points, so that
+the temporary arrays stay in the cache of the processor.
+
+.. note:: LEnsE - Institut d'Optique - version 0.1
+
+.. moduleauthor:: Julien VILLEMEJANE <julien.villemejane@institutoptique.fr>
+"""
+
+import numpy as np
+from point import PointArray
+from vector import VectorArray
+from point_source import PointSource
+from illuminance_kernel import numba_available, gauss_coefficients, led_illuminance_kernel, led_illuminance_numpy
+
+# Maximum size of the temporary arrays of a chunk of sources (in bytes)
+max_chunk_bytes = 256 * 1024 * 1024
+# Number of temporary arrays (sources x points) used in a chunk
+_chunk_arrays = 6
+# Number of values (sources x points) of a block, small enough to stay in the cache of the processor
+block_values = 1 << 16
+
+
+class PointSourceArray:
+    def __init__(self, positions=None, directions=None, I0=None, delta=None):
+        '''
+
+        :param positions: PointArray or array (N, 3), positions of the sources (in meter)
+        :param directions: VectorArray or array (N, 3), main directions of emission
+        :param I0: array (N,), maximal light intensities
+        :param delta: array (N,), half-angles of emission (in degree)
+        '''
+        self.positions = positions if isinstance(positions, PointArray) else PointArray(positions)
+        n_sources = len(self.positions)
+        if directions is None:
+            directions = np.tile([0.0, 0.0, -1.0], (n_sources, 1))
+        if not isinstance(directions, VectorArray):
+            directions = VectorArray(directions)
+        self.directions = directions.normalize()
+        self.I0 = np.broadcast_to(np.asarray(1.0 if I0 is None else I0, dtype=np.float64), (n_sources,)).copy()
+        delta_deg = np.broadcast_to(np.asarray(60.0 if delta is None else delta, dtype=np.float64), (n_sources,))
+        self.delta = np.radians(delta_deg)
+        if len(self.directions) != n_sources:
+            raise ValueError('PointSourceArray: positions and directions must have the same length')
+
+    @classmethod
+    def from_sources(cls, sources):
+        '''Create an array from a list of PointSource.
+
+        :param sources: list of PointSource
+        :return: PointSourceArray
+        '''
+        positions = PointArray.from_points([source.position for source in sources])
+        directions = VectorArray.from_vectors([source.direction_vector for source in sources])
+        return cls(positions, directions, [source.I0 for source in sources],
+                   [source.delta_deg for source in sources])
+
+    def __len__(self):
+        return len(self.positions)
+
+    def __str__(self):
+        return f'{len(self)} LED'
+
+    def add_source(self, source: PointSource):
+        '''Add a point source.
+
+        :param source: PointSource
+        '''
+        direction = VectorArray(source.get_direction_vector()).normalize()
+        self.positions = PointArray(np.vstack((self.positions.coords, source.get_coords())))
+        self.directions = VectorArray(np.vstack((self.directions.coords, direction.coords)))
+        self.I0 = np.append(self.I0, source.I0)
+        self.delta = np.append(self.delta, source.delta)
+
+    def get_chunk_size(self, n_points: int, max_bytes: int = None) -> int:
+        '''Return the number of sources processed at once.
+
+        :param n_points: int, number of points of the grid
+        :param max_bytes: int, maximum size of the temporary arrays (in bytes)
+        :return: int, number of sources of a chunk
+        '''
+        if max_bytes is None:
+            max_bytes = max_chunk_bytes
+        return int(max(1, max_bytes // (_chunk_arrays * 8 * max(n_points, 1))))
+
+    def illuminance(self, x, y, z=0.0, normal=(0, 0, 1), max_bytes: int = None, use_numba: bool = True):
+        '''Illuminance of all the sources on points of a receiver.
+
+        For each source and each point, the intensity is given by the gaussian pattern of the source
+        at the angle between its direction and the point. The illuminance is I * cos(i) / d**2, where
+        i is the angle of incidence on the receiver (no light when the point is behind, cos clamped at 0).
+
+        :param x: array, x-axis coordinates of the points (in meter), as given by np.meshgrid
+        :param y: array, y-axis coordinates of the points (in meter)
+        :param z: float or array, z-axis coordinates of the points (in meter)
+        :param normal: tuple, normal vector of the receiver (towards the sources)
+        :param max_bytes: int, maximum size of the temporary arrays of a chunk (in bytes)
+        :param use_numba: bool, use the compiled kernel if numba is installed
+        :return: array, illuminance at each point (same shape as x and y)
+        '''
+        x, y, z = np.broadcast_arrays(np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64),
+                                      np.asarray(z, dtype=np.float64))
+        shape = x.shape
+        p_x, p_y, p_z = x.ravel(), y.ravel(), z.ravel()
+        normal = np.asarray(normal, dtype=np.float64)
+        normal = normal / np.linalg.norm(normal)
+        positions, directions = self.positions.coords, self.directions.coords
+        gauss = gauss_coefficients(self.delta)
+        if use_numba and numba_available:
+            return led_illuminance_kernel(np.ascontiguousarray(p_x), np.ascontiguousarray(p_y),
+                                          np.ascontiguousarray(p_z), normal, positions, directions,
+                                          self.I0, gauss).reshape(shape)
+
+        illuminance = np.zeros(p_x.size)
+        # Blocks of points and chunks of sources of about block_values values
+        n_block = max(1, min(p_x.size, 4096))
+        chunk = min(self.get_chunk_size(n_block, max_bytes), max(1, block_values // n_block))
+        for first in range(0, p_x.size, n_block):
+            points = slice(first, first + n_block)
+            for start in range(0, len(self), chunk):
+                sources = slice(start, start + chunk)
+                illuminance[points] += led_illuminance_numpy(p_x[points], p_y[points], p_z[points], normal,
+                                                             positions[sources], directions[sources],
+                                                             self.I0[sources], gauss[sources])
+        return illuminance.reshape(shape)
+
+
+if __name__ == "__main__":
+    import time
+    from matplotlib import pyplot as plt
+    from point import Point
+
+    # Ceiling of 20 x 20 LED, 3 m above the floor
+    s_x, s_y = np.meshgrid(np.linspace(-4, 4, 20), np.linspace(-4, 4, 20))
+    positions = PointArray.from_grid(s_x, s_y, 3.0)
+    ceiling = PointSourceArray(positions, I0=1.0, delta=40)
+
+    x, y = np.meshgrid(np.linspace(-5, 5, 1000), np.linspace(-5, 5, 1000))
+    t1 = time.perf_counter()
+    map_e = ceiling.illuminance(x, y)
+    t2 = time.perf_counter()
+    print(f'{ceiling} / {x.size} points : {t2 - t1:.2f} s')
+
+    # Same result as a single PointSource
+    led = PointSource(2, 40, Point(1, 0, 3), theta=0, zeta=0)
+    single = PointSourceArray.from_sources([led])
+    print(single.illuminance(1, 0, 0), led.I0 / 3**2)
+
+    plt.figure()
+    plt.imshow(map_e, extent=(-5, 5, -5, 5))
+    plt.colorbar()
+    plt.show()
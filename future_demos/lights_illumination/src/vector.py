@@ -2,6 +2,8 @@
 """*vector* file.
 
 *vector* file that contains :class::Vector. This class modelize a vector in a 3D space.
+It also contains :class::VectorArray. This class modelize a set of vectors stored in a single
+(N, 3) array, with vectorized operations (norm, dot product, angle, normalization, rotation).
 
 .. note:: LEnsE - Institut d'Optique - version 0.1
 
@@ -11,24 +13,40 @@
 import numpy as np
 
 class Vector:
+    __slots__ = ('u_x', 'u_y', 'u_z')
+
     def __init__(self, u_x: float=0, u_y: float=0, u_z: float=1):
         '''
 
-        :param u_x:  float, x-axis coordinate of the vector 
-        :param u_y:  float, y-axis coordinate of the vector 
-        :param u_z:  float, z-axis coordinate of the vector 
+        :param u_x:  float, x-axis coordinate of the vector
+        :param u_y:  float, y-axis coordinate of the vector
+        :param u_z:  float, z-axis coordinate of the vector
         '''
         self.u_x = u_x
         self.u_y = u_y
         self.u_z = u_z
-       
+
+    def __repr__(self):
+        return f'Vector({self.u_x}, {self.u_y}, {self.u_z})'
+
+    def get_coords(self):
+        return self.u_x, self.u_y, self.u_z
+
     def get_norm(self) -> float:
         '''Return the norm of the vector.
-        
+
         :return: float, norm of the vector
         '''
         return np.sqrt(self.u_x**2 + self.u_y**2 + self.u_z**2)
-        
+
+    def dot(self, vect) -> float:
+        '''Return the dot product with another vector.
+
+        :param vect:  Vector, second vector
+        :return: float, dot product
+        '''
+        return self.u_x*vect.u_x + self.u_y*vect.u_y + self.u_z*vect.u_z
+
     def angle_with_vector(self, vect) -> float:
         """
         Calculate the angle between two vectors using the dot product definition.
@@ -44,12 +62,111 @@ class Vector:
         """
         norm_u = self.get_norm()
         norm_v = vect.get_norm()
-        dot_product = self.u_x*vect.u_x + self.u_y*vect.u_y + self.u_y*vect.u_y
-        return np.arccos(dot_product/norm_u/norm_v)
-        
+        dot_product = self.dot(vect)
+        return np.arccos(np.clip(dot_product/norm_u/norm_v, -1, 1))
+
+
+class VectorArray:
+    def __init__(self, coords=None):
+        '''
+
+        :param coords:  array (N, 3), coordinates (u_x, u_y, u_z) of the vectors
+        '''
+        if coords is None:
+            coords = np.zeros((0, 3))
+        self.coords = np.array(coords, dtype=np.float64).reshape(-1, 3)
+
+    @classmethod
+    def from_vectors(cls, vectors):
+        '''Create an array from a list of Vector.
+
+        :param vectors:  list of Vector
+        :return: VectorArray
+        '''
+        return cls([vect.get_coords() for vect in vectors])
+
+    def __len__(self):
+        return len(self.coords)
+
+    def __getitem__(self, index):
+        '''Return a Vector (integer index) or a VectorArray (slice, mask or list of indices).'''
+        if np.ndim(index) == 0 and not isinstance(index, slice):
+            return Vector(*self.coords[index].tolist())
+        return VectorArray(self.coords[index])
+
+    def __repr__(self):
+        return f'VectorArray({len(self)} vectors)'
+
+    @property
+    def u_x(self):
+        return self.coords[:, 0]
+
+    @property
+    def u_y(self):
+        return self.coords[:, 1]
+
+    @property
+    def u_z(self):
+        return self.coords[:, 2]
+
+    def get_norm(self):
+        '''Return the norms of the vectors.
+
+        :return: array (N,), norms of the vectors
+        '''
+        return np.sqrt(np.einsum('ij,ij->i', self.coords, self.coords))
+
+    def dot(self, vect):
+        '''Return the dot products with a vector or with the vectors of another array.
+
+        :param vect:  Vector or VectorArray (same length), second vectors
+        :return: array (N,), dot products
+        '''
+        if isinstance(vect, VectorArray):
+            return np.einsum('ij,ij->i', self.coords, vect.coords)
+        return self.coords @ np.asarray(vect.get_coords(), dtype=np.float64)
+
+    def angle_with_vector(self, vect):
+        '''Return the angles with a vector or with the vectors of another array.
+
+        :param vect:  Vector or VectorArray (same length), second vectors
+        :return: array (N,), angles (in radian)
+        '''
+        cos_angle = self.dot(vect) / self.get_norm() / vect.get_norm()
+        return np.arccos(np.clip(cos_angle, -1, 1))
+
+    def normalize(self):
+        '''Return the unit vectors of the same directions.
+
+        :return: VectorArray, normalized vectors
+        '''
+        return VectorArray(self.coords / self.get_norm()[:, None])
+
+    def rotate(self, axis: Vector, angle):
+        '''Return the vectors rotated around an axis (Rodrigues' rotation formula).
+
+        :param axis:  Vector, axis of the rotation
+        :param angle:  float or array (N,), angle of the rotation (in radian)
+        :return: VectorArray, rotated vectors
+        '''
+        k = np.asarray(axis.get_coords(), dtype=np.float64)
+        k = k / np.linalg.norm(k)
+        angle = np.asarray(angle, dtype=np.float64)[..., None]
+        cos_a, sin_a = np.cos(angle), np.sin(angle)
+        coords = self.coords * cos_a
+        coords += np.cross(k, self.coords) * sin_a
+        coords += np.outer(self.coords @ k, k) * (1 - cos_a)
+        return VectorArray(coords)
+
+
 if __name__ == '__main__':
     vect1 = Vector(1,0,0)
     vect2 = Vector(0,0,1)
     angle_1_2 = vect1.angle_with_vector(vect2)
-    
-    print(f"{angle_1_2} rad, {np.rad2deg(angle_1_2)} deg")
\ No newline at end of file
+
+    print(f"{angle_1_2} rad, {np.rad2deg(angle_1_2)} deg")
+
+    # One million of vectors, rotated around the z-axis
+    vectors = VectorArray(np.random.default_rng(0).normal(size=(1000000, 3))).normalize()
+    rotated = vectors.rotate(Vector(0, 0, 1), np.pi / 2)
+    print(vectors[0], rotated[0], np.allclose(vectors.angle_with_vector(vect2), rotated.angle_with_vector(vect2)))